@@ -0,0 +1,105 @@
+import functools
+import logging
+import threading
+import time
+
+from config import (SCRAPE_LIMIT_MIN, SCRAPE_LIMIT_MAX, SCRAPE_LIMIT_INITIAL,
+                    SCRAPE_LIMIT_TOLERANCE, SCRAPE_LIMIT_BACKOFF)
+
+class AdaptiveLimit:
+    """Concurrency limit tuned by AIMD from the latency and errors of portal calls
+
+    Each healthy sample adds 1/limit (one slot per window of `limit` calls).
+    An error, or a smoothed latency above `tolerance` times the baseline (the
+    lowest latency seen, drifting slowly upwards), multiplies the limit by
+    `backoff`, at most once per smoothed latency so calls that started before
+    a cut do not cut it again. Latency and baseline are kept per kind of call,
+    so a slow export is only compared with other exports, not with logins.
+    """
+
+    def __init__(self, min_limit=SCRAPE_LIMIT_MIN, max_limit=SCRAPE_LIMIT_MAX, initial=SCRAPE_LIMIT_INITIAL,
+                 tolerance=SCRAPE_LIMIT_TOLERANCE, backoff=SCRAPE_LIMIT_BACKOFF, clock=time.monotonic):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.value = float(min(self.max_limit, max(self.min_limit, initial)))
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self.clock = clock
+        self.lock = threading.Lock()
+        # call -> exponentially smoothed seconds, and the baseline they are compared with
+        self.latency = {}
+        self.baseline = {}
+        self.last_decrease = None
+        self.counters = {'samples': 0, 'errors': 0, 'increases': 0, 'decreases': 0}
+
+    @property
+    def limit(self):
+        return int(self.value)
+
+    def observe(self, seconds, ok=True, call='portal'):
+        """Record one portal call of a kind; errors count regardless of their latency"""
+        with self.lock:
+            self.counters['samples'] += 1
+            if ok:
+                latency, baseline = self.latency.get(call), self.baseline.get(call)
+                self.latency[call] = seconds if latency is None else 0.8 * latency + 0.2 * seconds
+                self.baseline[call] = seconds if baseline is None else min(
+                    seconds, baseline + 0.01 * (seconds - baseline))
+            else:
+                self.counters['errors'] += 1
+
+            if not ok or self.latency[call] > self.tolerance * self.baseline[call]:
+                self._decrease(call)
+            elif self.value < self.max_limit:
+                before = self.limit
+                self.value = min(self.max_limit, self.value + 1 / self.value)
+                if self.limit > before:
+                    self.counters['increases'] += 1
+
+    def _decrease(self, call):
+        # One reaction per latency window of the slowest call a scrape makes
+        now = self.clock()
+        if self.last_decrease is not None and now - self.last_decrease < max(self.latency.values(), default=0):
+            return
+        before = self.limit
+        self.value = max(self.min_limit, self.value * self.backoff)
+        self.last_decrease = now
+        if self.limit < before:
+            self.counters['decreases'] += 1
+            logging.info(f"Scrape limit lowered to {self.limit} ({call} latency "
+                         f"{self.latency.get(call, 0):.2f}s, baseline {self.baseline.get(call, 0):.2f}s)")
+
+    def measure(self, func):
+        """Decorator feeding the limit with func's latency, as a call named after func
+
+        func returns (result, message): a truthy result is a healthy sample, a
+        falsy one (wrong password, expired session) is not a sample, and an
+        exception (timeouts, unreachable portal) is an error.
+        """
+        call = func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except Exception:
+                self.observe(time.perf_counter() - start, ok=False, call=call)
+                raise
+            if result[0]:
+                self.observe(time.perf_counter() - start, call=call)
+            return result
+        return wrapper
+
+    def stats(self):
+        with self.lock:
+            return {
+                'limit': self.limit,
+                'min': self.min_limit,
+                'max': self.max_limit,
+                'latency': {call: round(value, 3) for call, value in self.latency.items()},
+                'baseline': {call: round(value, 3) for call, value in self.baseline.items()},
+                **self.counters,
+            }
+
+scrape_limit = AdaptiveLimit()
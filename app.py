@@ -1,70 +1,47 @@
-from flask import Flask, request
+from flask import Flask, Response, request
 from telegram import Bot, Update
 from telegram.ext import Application, CommandHandler, MessageHandler, filters
+from telegram.request import HTTPXRequest
 import os
 from dotenv import load_dotenv
 from scrapper import get_attendance_report
-from model import init_db, save_user, get_user
+from model import init_db, asave_user, run_db, user_directory, asave_group, aget_group, claim_lease
+from history import recent_changes, last_snapshot
+from config import SCRAPER_ENGINE, SNAPSHOT_MAX_AGE, PROJECTION_THRESHOLDS
+from config import BOT_MODE, WEBHOOK_URL, WEBHOOK_PATH, WEBHOOK_SECRET, BACKGROUND_LEASE
+from config import SCRAPE_BACKEND, BROKER_INFLIGHT, TELEGRAM_API_URL, UPDATE_CONCURRENCY
+from broker import remote_attendance_report, get_default_broker
+from metrics import Gauge, HANDLER_SECONDS, TELEGRAM_SECONDS, render_metrics
+from session_cache import session_cache
+from circuit_breaker import portal_breaker, PORTAL_UNAVAILABLE
+from outbox import Outbox
+import progress
+from bulk import parse_students, check_all, format_result, format_summary, split_message
+from driver_pool import get_driver_pool
+from report_cache import ReportCache, is_error_report
+from report import render, escape_markdown
+from projection import what_if, needed, skippable, project_report
+from scheduler import RefreshScheduler
+from job_queue import JobQueue, PRIORITY_KEYWORD, PRIORITY_CHECK, PRIORITY_BACKGROUND
+from adaptive_limit import scrape_limit
+from update_processor import ChatOrderedUpdateProcessor
 import logging
 import asyncio
-from functools import lru_cache
-from concurrent.futures import ThreadPoolExecutor
-
-# Add this at the top of your file with other constants
-MARKDOWN_ESCAPE_TABLE = str.maketrans({
-    '_': '\\_', '*': '\\*', '[': '\\[', ']': '\\]',
-    '(': '\\(', ')': '\\)', '~': '\\~', '`': '\\`',
-    '>': '\\>', '#': '\\#', '+': '\\+', '-': '\\-',
-    '=': '\\=', '|': '\\|', '{': '\\{', '}': '\\}',
-    '.': '\\.', '!': '\\!'
-})
-
-# Create a thread pool for background tasks
-executor = ThreadPoolExecutor(max_workers=3)
-
-# Cache formatted reports for 5 minutes
-@lru_cache(maxsize=32)
-def format_report_for_markdown(report):
-    """Format report with better alignment and cleaner output"""
-    sections = report.split('\n\n')
-    formatted = []
-    
-    for section in sections:
-        if 'Hi ' in section:
-            formatted.append(f"*{section.replace('Hi ', '')}*")
-        elif 'Total:' in section:
-            p = section.split()
-            n = p[1].split('/')
-            formatted.append(f"*{p[0]}: {n[0]}/{n[1]} ({p[2]})*")
-        elif "Today's Attendance:" in section:
-            lines = [line for line in section.split('\n') if ':' in line]
-            attendance = [f"• {s}: {st}" for s, st in 
-                        (line.split(':', 1) for line in lines[1:])
-                        if st.strip() in ['P', 'A']]
-            if attendance:
-                formatted.append(f"{lines[0]}\n{chr(10).join(attendance)}")
-            else:
-                formatted.append(lines[0])
-        elif 'You can skip' in section:
-            # Format skippable hours message
-            formatted.append(f"*{section}*")
-        elif 'Subject-wise Attendance:' in section:
-            lines = section.split('\n')
-            subjects = []
-            for line in lines[1:]:
-                if not line.strip(): continue
-                parts = line.replace('..', ' ').split()
-                if len(parts) < 2: continue
-                i = next((i for i, p in enumerate(parts) 
-                         if '/' in p), None)
-                if i is None: continue
-                subject = ' '.join(parts[:i])
-                attendance = parts[i]
-                percentage = parts[i+1] if i+1 < len(parts) else ''
-                subjects.append(f"{subject:<20} *{attendance}* {percentage}")
-            formatted.append(f"{lines[0]}\n{chr(10).join(subjects)}")
-    
-    return '\n\n'.join(formatted)
+import hmac
+import math
+import socket
+import threading
+import time
+
+# Bounded, prioritised scrape queue: as many slots as the adaptive limit
+# allows, or one per in-flight job when scrapes run on broker-fed workers
+if SCRAPE_BACKEND == 'broker':
+    job_queue = JobQueue(remote_attendance_report, workers=BROKER_INFLIGHT)
+else:
+    job_queue = JobQueue(get_attendance_report, limit=scrape_limit)
+
+# Reports per portal username (stale-while-revalidate, single-flight)
+report_cache = ReportCache()
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -79,12 +56,206 @@ if not TELEGRAM_TOKEN:
 # Initialize Flask app
 flask_app = Flask(__name__)
 
+def fetch_report(username, password, key=None, priority=PRIORITY_CHECK, on_position=None):
+    """Queue a scrape for a fresh report (awaitable); key limits waiting jobs per user"""
+    return job_queue.submit(key or username, username, password, priority, on_position)
+
+# Off-peak pre-fetching of every saved account, behind interactive checks
+scheduler = RefreshScheduler(
+    report_cache,
+    lambda username, password: fetch_report(username, password, priority=PRIORITY_BACKGROUND)
+)
+
+background_task = None
+
+async def post_init(application):
+    """Start background work once the bot's event loop is running"""
+    global background_task
+    if background_task is None:
+        background_task = asyncio.get_running_loop().create_task(run_background_work())
+
+async def run_background_work():
+    """Register the webhook and run the scheduler and outbox in one process only
+
+    Processes sharing the database (gunicorn workers) compete for a lease
+    the owner keeps renewing; another one takes over once it lapses.
+    """
+    owner, running = f"{socket.gethostname()}:{os.getpid()}", False
+    while True:
+        try:
+            held = await run_db(claim_lease, 'background_owner', owner, BACKGROUND_LEASE)
+        except Exception as e:
+            logging.error(f"Background lease check failed: {str(e)}")
+            held = running
+        if held and not running:
+            logging.info("This process runs the refresh scheduler and outbox")
+            await register_webhook()
+            scheduler.start()
+            outbox.start()
+        elif running and not held:
+            logging.warning("Lost the background lease, stopping the refresh scheduler and outbox")
+            scheduler.stop()
+            outbox.stop()
+        running = held
+        await asyncio.sleep(BACKGROUND_LEASE / 3)
+
+async def register_webhook():
+    if BOT_MODE != 'webhook' or not WEBHOOK_URL:
+        return
+    try:
+        await app.bot.set_webhook(
+            url=WEBHOOK_URL.rstrip('/') + WEBHOOK_PATH,
+            secret_token=WEBHOOK_SECRET or None,
+            allowed_updates=Update.ALL_TYPES
+        )
+    except Exception as e:
+        logging.error(f"Failed to set webhook: {str(e)}")
+
+class TimedRequest(HTTPXRequest):
+    """Bot API transport that records each call's latency by method name"""
+
+    async def do_request(self, url, method, *args, **kwargs):
+        with TELEGRAM_SECONDS.time(method=url.rsplit('/', 1)[-1]):
+            return await super().do_request(url, method, *args, **kwargs)
+
+# Updates from different chats are handled concurrently, each chat's in order
+update_processor = ChatOrderedUpdateProcessor(UPDATE_CONCURRENCY)
+
 # Initialize Bot
-bot = Bot(token=TELEGRAM_TOKEN)
-app = Application.builder().token(TELEGRAM_TOKEN).build()
+bot = Bot(token=TELEGRAM_TOKEN, base_url=TELEGRAM_API_URL)
+app = (
+    Application.builder()
+    .token(TELEGRAM_TOKEN)
+    .base_url(TELEGRAM_API_URL)
+    .request(TimedRequest(connection_pool_size=256))
+    .concurrent_updates(update_processor)
+    .post_init(post_init)
+    .build()
+)
+
+# Change notices and daily digests, sent under Telegram's flood limits
+outbox = Outbox(app.bot)
+
+# Queue depth and in-flight work, read when /metrics is scraped
+Gauge('ecap_job_queue_jobs', 'Scrape jobs waiting and running',
+      lambda: {('waiting',): len(job_queue.pending), ('running',): job_queue.running}, ('state',))
+Gauge('ecap_update_chats', 'Chats with updates being handled or waiting',
+      lambda: len(update_processor.chats))
+if SCRAPE_BACKEND == 'local':
+    Gauge('ecap_scrape_limit', 'Scrapes allowed to run at once (adaptive)', lambda: scrape_limit.limit)
+    Gauge('ecap_scrape_limit_latency_seconds', 'Portal call latency the scrape limit reacts to',
+          lambda: {**{(call, 'smoothed'): value for call, value in list(scrape_limit.latency.items())},
+                   **{(call, 'baseline'): value for call, value in list(scrape_limit.baseline.items())}},
+          ('call', 'kind'))
+Gauge('ecap_report_cache_entries', 'Cached reports', lambda: len(report_cache.entries))
+Gauge('ecap_report_cache_inflight', 'Scrapes in flight behind the report cache',
+      lambda: len(report_cache.inflight))
+Gauge('ecap_portal_sessions', 'Cached portal sessions', lambda: session_cache.stats()['sessions'])
+Gauge('ecap_portal_circuit_state', 'Portal circuit breaker state (1 for the current one)',
+      lambda: {(state,): int(portal_breaker.state == state) for state in ('closed', 'open', 'half_open')},
+      ('state',))
+if SCRAPE_BACKEND == 'local':
+    Gauge('ecap_driver_pool_drivers', 'Pooled browsers by state',
+          lambda: {(state,): get_driver_pool().stats()[state] for state in ('idle', 'in_use')}, ('state',))
 
-# Initialize database
+# Initialize database and load saved users into memory
 init_db()
+user_directory.load()
+
+def format_queue_position(position, eta):
+    """MarkdownV2 status text while a scrape waits in the job queue"""
+    if not position:
+        return "🔄 *Fetching\\.\\.\\.*"
+    wait = f"{math.ceil(eta / 60)} min" if eta >= 60 else f"{int(eta)} s"
+    return (
+        "⏳ *Queued*\n\n"
+        + escape_markdown(f"Position in queue: {position}\nEstimated wait: about {wait}")
+    )
+
+PROGRESS_STEPS = (
+    ('browser', "Browser ready"),
+    ('login', "Logged in to e-cap"),
+    ('export', "Attendance register downloaded"),
+)
+
+def format_progress(stage):
+    """MarkdownV2 status text for a scrape stage"""
+    reached = [name for name, _ in PROGRESS_STEPS].index(stage)
+    lines = [f"✅ {escape_markdown(label)}" for _, label in PROGRESS_STEPS[:reached + 1]]
+    if reached + 1 < len(PROGRESS_STEPS):
+        lines.append(f"⏳ {escape_markdown(PROGRESS_STEPS[reached + 1][1] + '...')}")
+    return "🔄 *Fetching\\.\\.\\.*\n\n" + '\n'.join(lines)
+
+async def seed_from_snapshot(username, password):
+    """Put a saved account's stored snapshot in the report cache when it has none
+
+    After a restart (or when another process pre-fetched the report) keyword
+    lookups are then answered from the snapshot and refreshed in the background.
+    Snapshots fetched with a different password are never used.
+    """
+    if report_cache.last_known(username, password) is not None:
+        return
+    snapshot = await run_db(last_snapshot, username, password)
+    if snapshot and report_cache.last_known(username, password) is None:
+        report_cache.put(username, password, *snapshot)
+
+async def last_known_report(username, password):
+    """(report, age) to show while the portal is down: the cached report however
+    old, else the stored snapshot, either only if fetched with this password"""
+    known = report_cache.last_known(username, password)
+    if known is None:
+        snapshot = await run_db(last_snapshot, username, password)
+        if snapshot:
+            known = snapshot[0], time.time() - snapshot[1]
+    return known
+
+def format_age(seconds):
+    minutes = int(seconds // 60)
+    if minutes >= 120:
+        return f"{minutes // 60} h"
+    return f"{minutes} min"
+
+async def send_report(status_msg, username, password, key, priority, stale_ttl=None, saved=False):
+    """Fetch (or reuse) a report and show it in place of the status message
+
+    While a scrape runs the message follows its queue position and stages
+    (shared by everyone waiting on the same account), edited at most every
+    PROGRESS_EDIT_INTERVAL seconds and only when the text changes. Saved
+    accounts missing from the cache start from their stored snapshot. If the
+    portal is down the last known report is shown, marked as stale.
+    """
+    status = progress.StatusMessage(status_msg)
+    if saved:
+        await seed_from_snapshot(username, password)
+    
+    async def show_position(position, eta):
+        await status.show(format_queue_position(position, eta))
+    
+    async def show_stage(stage):
+        await status.show(format_progress(stage))
+    
+    unsubscribe = progress.subscribe(username, password, show_stage)
+    try:
+        report, age = await report_cache.get(
+            username, password,
+            lambda: fetch_report(username, password, key, priority, show_position),
+            stale_ttl=stale_ttl
+        )
+    finally:
+        unsubscribe()
+    
+    stale = report == PORTAL_UNAVAILABLE and await last_known_report(username, password)
+    if stale:
+        report, age = stale
+    if is_error_report(report):
+        await status.finish(report, parse_mode=None)
+        return
+    
+    note = f"\n\n🕒 _Updated {int(age // 60)} min ago_" if age >= 60 else ""
+    if stale:
+        note = (f"\n\n⚠️ _{escape_markdown('The portal is not responding, this report is from')} "
+                f"{escape_markdown(format_age(age))} ago_")
+    await status.finish(f"📊 *Attendance Report*\n\n{render(report)}{note}")
 
 async def start(update, context):
     """Send welcome message when /start is issued"""
@@ -95,7 +266,13 @@ async def start(update, context):
         "2️⃣ One\\-time check:\n"
         "`/check username password`\n\n"
         "3️⃣ Quick access:\n"
-        "Send your saved keyword"
+        "Send your saved keyword\n\n"
+        "4️⃣ Plan ahead:\n"
+        "`/stats`, `/whatif miss 3 subject` or `/whatif attend 5`\n\n"
+        "5️⃣ Recent changes:\n"
+        "`/changes`\n\n"
+        "6️⃣ Whole class:\n"
+        "`/group name roll:password ...` then `/bulk name`"
     )
     await update.message.reply_text(welcome_msg, parse_mode='MarkdownV2')
 
@@ -115,7 +292,7 @@ async def set_credentials(update, context):
         keyword = keyword.lower()
         
         # Save credentials
-        save_user(user_id, username, password, keyword)
+        await asave_user(user_id, username, password, keyword)
         
         await update.message.reply_text(
             f"✅ *Account Setup Successful\\!*\n\n"
@@ -129,6 +306,7 @@ async def set_credentials(update, context):
         logging.error(f"Error in set command: {str(e)}")
         await update.message.reply_text(f"❌ Error: {str(e)}")
 
+@HANDLER_SECONDS.timed(handler='check')
 async def check_attendance(update, context):
     """Handle /check command"""
     try:
@@ -144,51 +322,244 @@ async def check_attendance(update, context):
             parse_mode='MarkdownV2'
         )
         
-        # Run in thread pool
-        report = await asyncio.get_running_loop().run_in_executor(
-            executor, 
-            get_attendance_report,
-            *context.args
-        )
+        # Served from the report cache when recent, queued for a scrape otherwise
+        username, password = context.args
+        await send_report(status_msg, username, password,
+                          str(update.effective_user.id), PRIORITY_CHECK)
+        
+    except Exception as e:
+        logging.error(f"Error: {str(e)}")
+        await update.message.reply_text(f"❌ Error: {str(e)}")
+
+def format_what_if(result, action, count):
+    """MarkdownV2 reply for a /whatif projection"""
+    subject = result['subject']
+    target = f" of {subject[0]}" if subject else ""
+    lines = [f"🔮 *{escape_markdown(f'If you {action} the next {count} classes{target}')}*", ""]
+    if subject:
+        name, present, total, pct = subject
+        lines.append(escape_markdown(f"{name}: {present}/{total} ({pct:.2f}%)"))
+    present, total, pct = result['overall']
+    lines.append(escape_markdown(f"Overall: {present}/{total} ({pct:.2f}%)"))
+    lines.append("")
+    for threshold in PROJECTION_THRESHOLDS:
+        if pct >= threshold:
+            lines.append(escape_markdown(f"✅ {threshold}%: can still skip {int(skippable(present, total, threshold))}"))
+        else:
+            lines.append(escape_markdown(f"❌ {threshold}%: attend {int(needed(present, total, threshold))} to recover"))
+    return '\n'.join(lines)
+
+async def saved_report(user):
+    """Report for a saved account: cached or stored within SNAPSHOT_MAX_AGE, else scraped"""
+    await seed_from_snapshot(user[1], user[2])
+    report, _ = await report_cache.get(
+        user[1], user[2],
+        lambda: fetch_report(user[1], user[2], user[0], PRIORITY_KEYWORD),
+        stale_ttl=SNAPSHOT_MAX_AGE
+    )
+    if report == PORTAL_UNAVAILABLE:
+        known = await last_known_report(user[1], user[2])
+        report = known[0] if known else report
+    return report
+
+@HANDLER_SECONDS.timed(handler='whatif')
+async def what_if_command(update, context):
+    """Handle /whatif command: /whatif miss|attend N [subject]"""
+    try:
+        args = context.args
+        if len(args) < 2 or args[0].lower() not in ('miss', 'attend') or not args[1].isdigit():
+            await update.message.reply_text(
+                "❌ *Invalid Format*\n\nUse: `/whatif miss 3 subject` or `/whatif attend 5`",
+                parse_mode='MarkdownV2'
+            )
+            return
+        
+        user = await user_directory.aget(str(update.effective_user.id))
+        if not user:
+            await update.message.reply_text("❌ Save your account first with /set")
+            return
+        
+        action, count = args[0].lower(), int(args[1])
+        subject = ' '.join(args[2:]) or None
+        report = await saved_report(user)
+        if is_error_report(report):
+            await update.message.reply_text(report)
+            return
+        
+        result = what_if(report, **{action: count}, subject=subject)
+        await update.message.reply_text(format_what_if(result, action, count), parse_mode='MarkdownV2')
+        
+    except ValueError as e:
+        await update.message.reply_text(f"❌ {str(e)}")
+    except Exception as e:
+        logging.error(f"Error in whatif command: {str(e)}")
+        await update.message.reply_text(f"❌ Error: {str(e)}")
+
+def format_stats(report, projection, thresholds=PROJECTION_THRESHOLDS):
+    """MarkdownV2 table of classes that can be missed (+) or must be attended (-) per threshold"""
+    def margin(values):
+        return ' '.join(f"{f'+{values[t][0]}' if values[t][1] == 0 else f'-{values[t][1]}':>5}" for t in thresholds)
+
+    lines = [f"{'Subject':<14}" + ' '.join(f"{f'{t}%':>5}" for t in thresholds),
+             f"{'Overall':<14}" + margin(projection['overall'])]
+    lines.extend(f"{subject.name[:14]:<14}" + margin(projection['subjects'][subject.name])
+                 for subject in report.subjects if subject.total)
+    table = '\n'.join(lines).replace('\\', '\\\\').replace('`', '\\`')
+    return (f"📈 *{escape_markdown(f'Projections for {report.student_id}')}*\n\n```\n{table}\n```\n"
+            + escape_markdown("+N: classes you can miss and stay at that line, -N: classes to attend to reach it"))
+
+@HANDLER_SECONDS.timed(handler='stats')
+async def stats_command(update, context):
+    """Handle /stats command: skip/recover margins overall and per subject"""
+    try:
+        user = await user_directory.aget(str(update.effective_user.id))
+        if not user:
+            await update.message.reply_text("❌ Save your account first with /set")
+            return
+        
+        report = await saved_report(user)
+        if is_error_report(report):
+            await update.message.reply_text(report)
+            return
+        
+        await update.message.reply_text(format_stats(report, project_report(report)), parse_mode='MarkdownV2')
+        
+    except Exception as e:
+        logging.error(f"Error in stats command: {str(e)}")
+        await update.message.reply_text(f"❌ Error: {str(e)}")
+
+def format_changes(history):
+    """MarkdownV2 reply listing stored attendance changes, newest first"""
+    if not history:
+        return escape_markdown("No changes recorded yet. Check your attendance first.")
+    blocks = []
+    for fetched_at, changes in history:
+        lines = [f"🗓 *{escape_markdown(time.strftime('%d/%m %H:%M', time.localtime(fetched_at)))}*"]
+        for change in changes:
+            marks = []
+            if change['new_present']:
+                marks.append(f"{change['new_present']:+d} P")
+            if change['new_absent']:
+                marks.append(f"{change['new_absent']:+d} A")
+            lines.append(escape_markdown(
+                f"• {change['subject']}: {', '.join(marks)} ({change['present']}/{change['total']})"
+            ))
+        blocks.append('\n'.join(lines))
+    return '\n\n'.join(blocks)
+
+async def changes_command(update, context):
+    """Handle /changes command: what changed since previous checks"""
+    try:
+        user = await user_directory.aget(str(update.effective_user.id))
+        if not user:
+            await update.message.reply_text("❌ Save your account first with /set")
+            return
+        
+        history = await run_db(recent_changes, user[1], user[2])
+        await update.message.reply_text(format_changes(history), parse_mode='MarkdownV2')
         
-        # Format report (cached)
-        escaped_report = format_report_for_markdown(report).translate(MARKDOWN_ESCAPE_TABLE)
+    except Exception as e:
+        logging.error(f"Error in changes command: {str(e)}")
+        await update.message.reply_text(f"❌ Error: {str(e)}")
+
+async def group_command(update, context):
+    """Handle /group command: /group name roll:password ..."""
+    try:
+        if len(context.args) < 2:
+            await update.message.reply_text(
+                "❌ *Invalid Format*\n\nUse: `/group name roll:password roll:password ...`",
+                parse_mode='MarkdownV2'
+            )
+            return
         
-        await status_msg.edit_text(
-            f"📊 *Attendance Report*\n\n{escaped_report}",
+        name, students = context.args[0].lower(), parse_students(context.args[1:])
+        await asave_group(str(update.effective_user.id), name, students)
+        await update.message.reply_text(
+            f"✅ *Group saved\\!*\n\n{len(students)} students in `{escape_markdown(name)}`\n"
+            f"Run `/bulk {escape_markdown(name)}` to check them all",
             parse_mode='MarkdownV2'
         )
         
+    except ValueError as e:
+        await update.message.reply_text(f"❌ {str(e)}")
     except Exception as e:
-        logging.error(f"Error: {str(e)}")
+        logging.error(f"Error in group command: {str(e)}")
         await update.message.reply_text(f"❌ Error: {str(e)}")
 
+@HANDLER_SECONDS.timed(handler='bulk')
+async def bulk_command(update, context):
+    """Handle /bulk command: /bulk group_name or /bulk roll:password ..."""
+    try:
+        args = context.args
+        user_id = str(update.effective_user.id)
+        if not args:
+            await update.message.reply_text(
+                "❌ *Invalid Format*\n\nUse: `/bulk group_name` or `/bulk roll:password ...`",
+                parse_mode='MarkdownV2'
+            )
+            return
+        
+        if len(args) == 1 and ':' not in args[0]:
+            students = await aget_group(user_id, args[0])
+            if not students:
+                await update.message.reply_text(f"❌ No group named {args[0]}. Save one with /group")
+                return
+        else:
+            students = parse_students(args)
+        
+        status_msg = await update.message.reply_text(f"🔄 Checking {len(students)} students...")
+        
+        # Each student goes through the report cache and the shared job queue,
+        # so pooled browsers and portal sessions are reused across the batch
+        async def fetch(username, password):
+            report, _ = await report_cache.get(
+                username, password,
+                lambda: fetch_report(username, password, f"bulk:{user_id}:{username}", PRIORITY_CHECK)
+            )
+            return report
+        
+        results, lines, last_edit = [], [], 0
+        async for username, report in check_all(students, fetch):
+            results.append((username, report))
+            lines.append(format_result(username, report))
+            done = len(results) == len(students)
+            if done or time.monotonic() - last_edit >= 2:
+                last_edit = time.monotonic()
+                heading = "✅ Checked" if done else "🔄 Checked"
+                try:
+                    await status_msg.edit_text(
+                        f"{heading} {len(results)}/{len(students)} students\n\n" + '\n'.join(lines[-40:])
+                    )
+                except Exception as e:
+                    logging.warning(f"Bulk progress update failed: {str(e)}")
+        
+        for chunk in split_message(format_summary(results)):
+            escaped = chunk.replace('\\', '\\\\').replace('`', '\\`')
+            await update.message.reply_text(f"```\n{escaped}\n```", parse_mode='MarkdownV2')
+        
+    except ValueError as e:
+        await update.message.reply_text(f"❌ {str(e)}")
+    except Exception as e:
+        logging.error(f"Error in bulk command: {str(e)}")
+        await update.message.reply_text(f"❌ Error: {str(e)}")
+
+@HANDLER_SECONDS.timed(handler='message')
 async def handle_message(update, context):
     """Handle regular messages (keywords)"""
     try:
         user_id = str(update.effective_user.id)
-        user = get_user(user_id)
+        # Plain dict lookup: chatter that is not a saved keyword never hits the database
+        user = await user_directory.amatch(user_id, update.message.text)
         
-        if user and update.message.text.lower() == user[3]:
+        if user:
             status_msg = await update.message.reply_text(
                 "🔄 *Fetching\\.\\.\\.*",
                 parse_mode='MarkdownV2'
             )
             
-            # Run in thread pool
-            report = await asyncio.get_running_loop().run_in_executor(
-                executor,
-                get_attendance_report,
-                user[1], user[2]
-            )
-            
-            # Format report (cached)
-            escaped_report = format_report_for_markdown(report).translate(MARKDOWN_ESCAPE_TABLE)
-            
-            await status_msg.edit_text(
-                f"📊 *Attendance Report*\n\n{escaped_report}",
-                parse_mode='MarkdownV2'
-            )
+            # Answered from the latest pre-fetched report, refreshed in the background
+            await send_report(status_msg, user[1], user[2], user_id, PRIORITY_KEYWORD,
+                              stale_ttl=SNAPSHOT_MAX_AGE, saved=True)
     except Exception as e:
         logging.error(f"Error: {str(e)}")
         await update.message.reply_text(f"❌ Error: {str(e)}")
@@ -196,26 +567,116 @@ async def handle_message(update, context):
 @flask_app.route("/")
 async def index():
     """Health check endpoint"""
-    return {"status": "online", "bot": bot.username}
+    status = {
+        "status": "online",
+        "bot": bot.username,
+        "job_queue": job_queue.stats(),
+        "user_directory": user_directory.stats(),
+        "updates": update_processor.stats(),
+        "outbox": outbox.stats(),
+        "portal_circuit": portal_breaker.stats(),
+    }
+    if SCRAPE_BACKEND == 'broker':
+        status["broker"] = get_default_broker().stats()
+    else:
+        status["driver_pool"] = get_driver_pool().stats()
+        status["scrape_limit"] = scrape_limit.stats()
+    return status
+
+@flask_app.route("/metrics")
+def metrics():
+    """Prometheus scrape endpoint"""
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
+@flask_app.post(WEBHOOK_PATH)
+def telegram_webhook():
+    """Receive a Telegram update and hand it to the bot's update queue"""
+    if WEBHOOK_SECRET:
+        token = request.headers.get('X-Telegram-Bot-Api-Secret-Token', '')
+        if not hmac.compare_digest(token, WEBHOOK_SECRET):
+            return {"ok": False, "error": "invalid secret token"}, 403
+    
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or 'update_id' not in data:
+        return {"ok": False, "error": "invalid update"}, 400
+    
+    loop = ensure_bot_running()
+    update = Update.de_json(data, app.bot)
+    asyncio.run_coroutine_threadsafe(app.update_queue.put(update), loop).result(timeout=5)
+    return {"ok": True}
+
+# Event loop running the Application in webhook mode (one per process/worker)
+bot_loop = None
+bot_loop_lock = threading.Lock()
+
+async def start_application():
+    """Initialize and start the Application without its own update fetching"""
+    await app.initialize()
+    await post_init(app)
+    await app.start()
+
+def ensure_bot_running():
+    """Start the bot on a background event loop once per process (gunicorn-safe)"""
+    global bot_loop
+    with bot_loop_lock:
+        if bot_loop is None:
+            register_handlers()
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name='telegram-bot', daemon=True).start()
+            asyncio.run_coroutine_threadsafe(start_application(), loop).result(timeout=60)
+            bot_loop = loop
+            logging.info(f"Bot started in webhook mode on {WEBHOOK_PATH}")
+        return bot_loop
 
 def run_flask():
     """Run Flask app"""
     flask_app.run(host='0.0.0.0', port=5000)
 
+def register_handlers(application=app):
+    """Add command handlers (once)"""
+    if application.handlers:
+        return
+    application.add_handler(CommandHandler("start", start))
+    application.add_handler(CommandHandler("set", set_credentials))
+    application.add_handler(CommandHandler("check", check_attendance))
+    application.add_handler(CommandHandler("whatif", what_if_command))
+    application.add_handler(CommandHandler("stats", stats_command))
+    application.add_handler(CommandHandler("changes", changes_command))
+    application.add_handler(CommandHandler("group", group_command))
+    application.add_handler(CommandHandler("bulk", bulk_command))
+    application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
+
 def main():
     """Start both Flask and Telegram bot"""
-    # Add command handlers
-    app.add_handler(CommandHandler("start", start))
-    app.add_handler(CommandHandler("set", set_credentials))
-    app.add_handler(CommandHandler("check", check_attendance))
-    app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
+    register_handlers()
+    
+    # Resolve the driver binary and warm up browsers in the background;
+    # handlers are registered already, so updates are answered meanwhile
+    if SCRAPER_ENGINE == 'selenium' and SCRAPE_BACKEND == 'local':
+        threading.Thread(target=get_driver_pool().warm_up, daemon=True).start()
+    
+    if BOT_MODE == 'webhook':
+        # Updates arrive on the Flask webhook route; Flask serves in this thread
+        if not WEBHOOK_SECRET:
+            logging.warning("WEBHOOK_SECRET is not set; webhook requests are not authenticated")
+        ensure_bot_running()
+        run_flask()
+        return
     
     # Start Flask in a separate thread
-    from threading import Thread
-    Thread(target=run_flask).start()
+    threading.Thread(target=run_flask).start()
     
     # Start the bot
     app.run_polling(allowed_updates=Update.ALL_TYPES)
 
+# Under a WSGI server (gunicorn app:flask_app) main() never runs: each worker
+# starts the bot as it imports the app, so the webhook gets registered before
+# Telegram has anywhere to post updates
+if BOT_MODE == 'webhook' and __name__ != '__main__':
+    try:
+        ensure_bot_running()
+    except Exception as e:
+        logging.error(f"Starting the bot failed, retrying on the first webhook request: {str(e)}")
+
 if __name__ == '__main__':
     main()
@@ -0,0 +1,55 @@
+"""Keyword-lookup throughput under concurrent async handlers
+
+Compares the previous connect-per-call access with the pooled WAL layer.
+
+Usage: python bench_db.py [handlers] [lookups_per_handler]
+"""
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+import model
+
+def lookup_connect_per_call(phone):
+    db = sqlite3.connect(model.DATABASE_PATH)
+    try:
+        return db.execute('SELECT * FROM users WHERE phone = ?', (phone,)).fetchone()
+    finally:
+        db.close()
+
+async def run(handlers, lookups, lookup):
+    async def handler(index):
+        for n in range(lookups):
+            await lookup(str((index * lookups + n) % 1000))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(handler(i) for i in range(handlers)))
+    return handlers * lookups / (time.perf_counter() - start)
+
+def main():
+    handlers = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    lookups = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    with tempfile.TemporaryDirectory() as directory:
+        model.DATABASE_PATH = os.path.join(directory, 'users.db')
+        model.init_db()
+        for phone in range(1000):
+            model.save_user(str(phone), f'24L35A{phone:04d}', 'secret', f'kw{phone}')
+
+        async def blocking(phone):
+            return lookup_connect_per_call(phone)
+
+        async def threaded(phone):
+            return await model.run_db(lookup_connect_per_call, phone)
+
+        for name, lookup in (('connect per call, on loop', blocking),
+                             ('connect per call, threaded', threaded),
+                             ('pooled WAL, async API', model.aget_user)):
+            rate = asyncio.run(run(handlers, lookups, lookup))
+            print(f"{name:<28} {rate:10.0f} lookups/s")
+        model.close_pools()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""End-to-end get_attendance_report benchmark against the local mock portal
+
+Usage: python bench_e2e.py [--engine http|selenium] [--concurrency 1,2,4,8]
+                           [--requests 40] [--latency 0.05] [--jitter 0.05]
+                           [--export-latency 0] [--error-rate 0] [--drop-rate 0]
+                           [--reuse-sessions]
+
+Each concurrency level runs the same number of checks for distinct accounts
+(cold portal sessions unless --reuse-sessions) and reports latency
+percentiles, throughput and errors. Snapshots go to a throwaway database.
+"""
+import argparse
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import model
+import portal_http
+import scrapper
+from mock_portal import MockPortal
+from report_cache import is_error_report
+from session_cache import session_cache
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def run_level(engine, concurrency, requests, reuse_sessions):
+    if not reuse_sessions:
+        session_cache.entries.clear()
+    usernames = [f"24L35A{index % max(concurrency, 1) if reuse_sessions else index:04d}"
+                 for index in range(requests)]
+
+    def check(username):
+        start = time.perf_counter()
+        report = engine(username, username)
+        return time.perf_counter() - start, report
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(check, usernames))
+    elapsed = time.perf_counter() - start
+
+    timings = [duration for duration, _ in results]
+    errors = [report for _, report in results if is_error_report(report)]
+    return {
+        'concurrency': concurrency,
+        'requests': requests,
+        'errors': len(errors),
+        'first_error': errors[0] if errors else None,
+        'throughput': requests / elapsed,
+        'mean': statistics.mean(timings),
+        'p50': percentile(timings, 0.5),
+        'p95': percentile(timings, 0.95),
+        'max': max(timings),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--engine', choices=('http', 'selenium'), default='http')
+    parser.add_argument('--concurrency', default='1,2,4,8')
+    parser.add_argument('--requests', type=int, default=40)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--jitter', type=float, default=0.05)
+    parser.add_argument('--export-latency', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--drop-rate', type=float, default=0.0)
+    parser.add_argument('--reuse-sessions', action='store_true')
+    args = parser.parse_args()
+
+    engine = {'http': scrapper.get_attendance_report_http,
+              'selenium': scrapper.get_attendance_report_selenium}[args.engine]
+
+    with tempfile.TemporaryDirectory() as tmp, \
+            MockPortal(latency=args.latency, jitter=args.jitter, export_latency=args.export_latency,
+                       error_rate=args.error_rate, drop_rate=args.drop_rate, seed=1) as portal:
+        model.DATABASE_PATH = f"{tmp}/bench.db"
+        model.init_db()
+        login_url = portal.base_url + 'Default.aspx'
+        academic_url = portal.base_url + 'Academics/studentacadamicregister.aspx?scrid=2'
+        portal_http.LOGIN_URL = scrapper.LOGIN_URL = login_url
+        portal_http.ACADEMIC_URL = scrapper.ACADEMIC_URL = academic_url
+
+        print(f"engine={args.engine} latency={args.latency}s jitter={args.jitter}s "
+              f"error_rate={args.error_rate} drop_rate={args.drop_rate}")
+        print(f"{'conc':>4} {'reqs':>5} {'err':>4} {'req/s':>7} {'mean':>8} {'p50':>8} {'p95':>8} {'max':>8}")
+        for concurrency in (int(c) for c in args.concurrency.split(',')):
+            result = run_level(engine, concurrency, args.requests, args.reuse_sessions)
+            print(f"{result['concurrency']:>4} {result['requests']:>5} {result['errors']:>4} "
+                  f"{result['throughput']:>7.2f} " +
+                  ' '.join(f"{result[key] * 1000:>6.0f}ms" for key in ('mean', 'p50', 'p95', 'max')))
+            if result['first_error']:
+                print(f"     first error: {result['first_error']}")
+        print(f"portal requests={portal.requests} faults={portal.faults}")
+        model.close_pools()
+
+if __name__ == "__main__":
+    main()
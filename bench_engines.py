@@ -0,0 +1,42 @@
+"""Compare the Selenium and HTTP scraping engines against the local mock portal
+
+Usage: python bench_engines.py [runs]
+"""
+import statistics
+import sys
+import time
+
+import portal_http
+import scrapper
+from report_cache import is_error_report
+from mock_portal import MockPortal
+
+def bench(engine, runs, username='24L35A0500'):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        report = engine(username, username)
+        timings.append(time.perf_counter() - start)
+        if is_error_report(report):
+            return None, report
+    return timings, None
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    with MockPortal() as portal:
+        login_url = portal.base_url + 'Default.aspx'
+        academic_url = portal.base_url + 'Academics/studentacadamicregister.aspx?scrid=2'
+        portal_http.LOGIN_URL = scrapper.LOGIN_URL = login_url
+        portal_http.ACADEMIC_URL = scrapper.ACADEMIC_URL = academic_url
+
+        for name, engine in (('http', scrapper.get_attendance_report_http),
+                             ('selenium', scrapper.get_attendance_report_selenium)):
+            timings, error = bench(engine, runs)
+            if error:
+                print(f"{name:<9} failed: {error}")
+                continue
+            print(f"{name:<9} runs={runs} mean={statistics.mean(timings) * 1000:.1f}ms "
+                  f"min={min(timings) * 1000:.1f}ms max={max(timings) * 1000:.1f}ms")
+
+if __name__ == "__main__":
+    main()
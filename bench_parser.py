@@ -0,0 +1,89 @@
+"""Parse-time and peak-memory benchmark for the attendance export parser
+
+Compares scrapper.parse_attendance_html (lxml) with the previous
+BeautifulSoup/SoupStrainer implementation on small and large exports.
+Peak memory is the Python heap as seen by tracemalloc (libxml2's own
+allocations are not included).
+
+Usage: python bench_parser.py [iterations]
+"""
+import logging
+import sys
+import time
+import tracemalloc
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+from mock_portal import build_export, SUBJECTS
+from scrapper import parse_attendance_html, calculate_skippable_hours
+
+def parse_with_soup(content, today=None):
+    """Previous BeautifulSoup-based parser, kept as the baseline"""
+    soup = BeautifulSoup(content, 'lxml', parse_only=SoupStrainer(['tr', 'td']))
+    student_id = soup.select_one('td.reportData2').text.strip().replace(':', '').strip()
+    header_row = soup.select_one('tr.reportHeading2WithBackground')
+    dates = [td.text.strip() for td in header_row.select('td')]
+    today = today or time.strftime("%d/%m")
+    today_index = next((i for i, date in enumerate(dates) if today in date), None)
+
+    total_present = total_classes = 0
+    todays_attendance = []
+    subject_attendance = []
+    for row in soup.select('tr[title]'):
+        cells = row.select('td.cellBorder')
+        if len(cells) >= 2:
+            subject = cells[1].text.strip()
+            attendance = cells[-2].text.strip()
+            percentage = cells[-1].text.strip()
+            if attendance != "0/0":
+                present, total = map(int, attendance.split('/'))
+                total_present += present
+                total_classes += total
+                if today_index and today_index < len(cells):
+                    today_status = cells[today_index].text.strip()
+                    if 'P' in today_status or 'A' in today_status:
+                        todays_attendance.append(f"{subject}: {'P' if 'P' in today_status else 'A'}")
+                if percentage != ".00":
+                    subject_attendance.append(f"{subject:.<8} {attendance:<7} {percentage}%")
+
+    overall_percentage = (total_present / total_classes * 100) if total_classes > 0 else 0
+    return {
+        'student_id': student_id,
+        'total_present': total_present,
+        'total_classes': total_classes,
+        'overall_percentage': overall_percentage,
+        'todays_attendance': todays_attendance,
+        'subject_attendance': subject_attendance,
+        'skippable_hours': calculate_skippable_hours(total_present, total_classes),
+    }
+
+def measure(parser, content, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        parser(content)
+    elapsed = (time.perf_counter() - start) / iterations
+
+    tracemalloc.start()
+    parser(content)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+def main():
+    logging.disable(logging.INFO)
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    exports = {
+        'small (7 days, 10 subjects)': build_export('24L35A0500', days=7, seed=1),
+        'semester (120 days, 12 subjects)': build_export('24L35A0500', days=120, seed=2,
+                                                         subjects=SUBJECTS + ['IOT', 'NSS']),
+        'year (240 days, 20 subjects)': build_export('24L35A0500', days=240, seed=3,
+                                                     subjects=[f'SUBJECT {i}' for i in range(20)]),
+    }
+    for name, content in exports.items():
+        print(f"{name}: {len(content) / 1024:.0f} KiB")
+        for label, parser in (('lxml', parse_attendance_html), ('soup', parse_with_soup)):
+            elapsed, peak = measure(parser, content, iterations)
+            print(f"  {label:<5} {elapsed * 1000:8.2f} ms/parse  peak {peak / 1024:8.0f} KiB")
+
+if __name__ == "__main__":
+    main()
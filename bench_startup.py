@@ -0,0 +1,59 @@
+"""Cold start benchmark: import time and time-to-first-update
+
+Usage: python bench_startup.py [runs]
+
+Measures `import app` in a fresh interpreter, then starts `python app.py`
+against a mock Bot API with a /start update already waiting and times how
+long the process takes to answer it.
+"""
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from mock_telegram import MockTelegram
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def bot_env(tmp, api_url):
+    return {
+        **os.environ,
+        'TELEGRAM_TOKEN': '123456:BENCH',
+        'TELEGRAM_API_URL': api_url,
+        'DATABASE_PATH': os.path.join(tmp, 'users.db'),
+        'REFRESH_WINDOWS': '',
+    }
+
+def time_import(env):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', 'import app'], cwd=HERE, env=env, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+def time_first_update(env, telegram):
+    telegram.sent.clear()
+    telegram.push_message('/start')
+    start = time.monotonic()
+    process = subprocess.Popen([sys.executable, 'app.py'], cwd=HERE, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        answered = telegram.wait_for(1, timeout=60)[0][0]
+        return answered - start
+    finally:
+        # The Flask thread is not a daemon, so stop the whole process
+        process.kill()
+        process.wait()
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    with tempfile.TemporaryDirectory() as tmp, MockTelegram() as telegram:
+        env = bot_env(tmp, telegram.base_url)
+        imports = [time_import(env) for _ in range(runs)]
+        first = [time_first_update(env, telegram) for _ in range(runs)]
+    print(f"import app          mean={statistics.mean(imports) * 1000:.0f}ms min={min(imports) * 1000:.0f}ms")
+    print(f"time-to-first-update mean={statistics.mean(first) * 1000:.0f}ms min={min(first) * 1000:.0f}ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Update handling load test: synthetic chats through the bot's real handlers
+
+Usage: python bench_updates.py [--concurrency 1,8,32] [--chats 500]
+                               [--api-latency 0.02] [--scrape-latency 0.2]
+                               [--scrape-workers 8]
+
+Every chat sends /start, /set, /check and its saved keyword, interleaved
+with the other chats and queued as one burst. Bot API calls go to the local
+mock (mock_telegram.py) and scrapes are replaced by a sleep returning a fixed
+report. Reports throughput and p50/p99 latency from enqueue to the handler
+finishing, and checks that every chat's updates finished in order.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+
+from mock_telegram import MockTelegram, message_update
+
+TOKEN = '123456:BENCH'
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def chat_messages(chat_id):
+    username, keyword = f"24L35A{chat_id % 10000:04d}", f"kw{chat_id}"
+    return ['/start', f"/set {username} secret {keyword}", f"/check {username} secret", keyword]
+
+async def run_level(app, api_url, concurrency, chats, first_chat):
+    from telegram import Update
+    from telegram.ext import Application, TypeHandler
+    from update_processor import ChatOrderedUpdateProcessor
+
+    application = (
+        Application.builder()
+        .token(TOKEN)
+        .base_url(api_url)
+        .request(app.TimedRequest(connection_pool_size=256))
+        .concurrent_updates(ChatOrderedUpdateProcessor(concurrency))
+        .build()
+    )
+    app.register_handlers(application)
+
+    queued, finished, order = {}, {}, {}
+    done = asyncio.Event()
+    total = chats * len(chat_messages(0))
+
+    async def record(update, context):
+        finished[update.update_id] = time.perf_counter()
+        order.setdefault(update.effective_chat.id, []).append(update.update_id)
+        if len(finished) == total:
+            done.set()
+
+    # Group 1 runs after the command/message handler of group 0 has returned
+    application.add_handler(TypeHandler(Update, record), group=1)
+
+    await application.initialize()
+    await application.start()
+    updates = []
+    for step in range(len(chat_messages(0))):
+        for chat_id in range(first_chat, first_chat + chats):
+            update_id = len(updates) + 1
+            data = message_update(update_id, update_id, chat_messages(chat_id)[step], chat_id)
+            updates.append(Update.de_json(data, application.bot))
+
+    start = time.perf_counter()
+    for update in updates:
+        queued[update.update_id] = time.perf_counter()
+        await application.update_queue.put(update)
+    await done.wait()
+    elapsed = time.perf_counter() - start
+    await application.stop()
+    await application.shutdown()
+
+    latencies = [finished[update_id] - queued[update_id] for update_id in queued]
+    out_of_order = sum(ids != sorted(ids) for ids in order.values())
+    return {
+        'concurrency': concurrency,
+        'updates': total,
+        'throughput': total / elapsed,
+        'p50': percentile(latencies, 0.5),
+        'p99': percentile(latencies, 0.99),
+        'max': max(latencies),
+        'out_of_order': out_of_order,
+    }
+
+async def run(args, api_url):
+    import app
+    from job_queue import JobQueue
+    from report import AttendanceReport
+
+    def scrape(username, password):
+        time.sleep(args.scrape_latency)
+        return AttendanceReport(username, 40, 50, 3)
+
+    logging.getLogger().setLevel(logging.WARNING)
+
+    # Fixed-latency scraper with room for every queued check
+    app.job_queue = JobQueue(scrape, workers=args.scrape_workers, max_size=args.chats * 2)
+
+    print(f"chats={args.chats} api_latency={args.api_latency}s scrape_latency={args.scrape_latency}s "
+          f"scrape_workers={args.scrape_workers}")
+    print(f"{'conc':>4} {'updates':>7} {'upd/s':>8} {'p50':>8} {'p99':>8} {'max':>8} {'unordered':>9}")
+    for index, concurrency in enumerate(int(c) for c in args.concurrency.split(',')):
+        result = await run_level(app, api_url, concurrency, args.chats, (index + 1) * 100000)
+        print(f"{result['concurrency']:>4} {result['updates']:>7} {result['throughput']:>8.1f} " +
+              ' '.join(f"{result[key] * 1000:>6.0f}ms" for key in ('p50', 'p99', 'max')) +
+              f" {result['out_of_order']:>9}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--concurrency', default='1,8,32')
+    parser.add_argument('--chats', type=int, default=500)
+    parser.add_argument('--api-latency', type=float, default=0.02)
+    parser.add_argument('--scrape-latency', type=float, default=0.2)
+    parser.add_argument('--scrape-workers', type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp, MockTelegram(latency=args.api_latency) as telegram:
+        # app reads these at import time
+        os.environ.update({
+            'TELEGRAM_TOKEN': TOKEN,
+            'TELEGRAM_API_URL': telegram.base_url,
+            'DATABASE_PATH': os.path.join(tmp, 'users.db'),
+            'REFRESH_WINDOWS': '',
+        })
+        asyncio.run(run(args, telegram.base_url))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+import json
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from config import BROKER_URL, BROKER_POLL, BROKER_LEASE, BROKER_TIMEOUT
+from model import get_pool
+from report import AttendanceReport
+from report_cache import is_error_report
+
+WORKER_TIMEOUT = "❌ No scraper worker answered in time. Please try again later."
+
+def encode_result(report):
+    """Serialise a report (or error message) for the broker"""
+    if is_error_report(report):
+        return json.dumps({'error': report})
+    return json.dumps({'report': report.to_dict()}, separators=(',', ':'))
+
+def decode_result(payload):
+    data = json.loads(payload)
+    if 'error' in data:
+        return data['error']
+    return AttendanceReport.from_dict(data['report'])
+
+class SQLiteBroker:
+    """Job table shared by the bot and worker processes through one SQLite file
+
+    A claimed job that is not completed within `lease` seconds (its worker
+    died) is handed to the next worker that asks.
+    """
+
+    def __init__(self, path, poll=BROKER_POLL, lease=BROKER_LEASE):
+        self.path = path
+        self.poll = poll
+        self.lease = lease
+        self.pool = get_pool(path)
+        with self._db() as db:
+            db.execute('''
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    username TEXT,
+                    password TEXT,
+                    status TEXT,
+                    result TEXT,
+                    worker TEXT,
+                    created REAL,
+                    claimed_at REAL
+                )
+            ''')
+            db.execute('CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, id)')
+            db.commit()
+
+    @contextmanager
+    def _db(self):
+        db = self.pool.acquire()
+        try:
+            yield db
+        finally:
+            self.pool.release(db)
+
+    def submit(self, username, password):
+        with self._db() as db:
+            cursor = db.execute(
+                "INSERT INTO jobs (username, password, status, created) VALUES (?, ?, 'queued', ?)",
+                (username, password, time.time())
+            )
+            db.commit()
+            return cursor.lastrowid
+
+    def claim(self, worker, timeout=None):
+        """Next job as (job_id, username, password), or None after timeout seconds"""
+        deadline = time.monotonic() + (self.poll if timeout is None else timeout)
+        while True:
+            now = time.time()
+            with self._db() as db:
+                row = db.execute('''
+                    UPDATE jobs SET status = 'running', worker = ?, claimed_at = ?
+                    WHERE id = (
+                        SELECT id FROM jobs
+                        WHERE status = 'queued' OR (status = 'running' AND claimed_at < ?)
+                        ORDER BY id LIMIT 1
+                    )
+                    RETURNING id, username, password
+                ''', (worker, now, now - self.lease)).fetchone()
+                db.commit()
+            if row or time.monotonic() >= deadline:
+                return row
+            time.sleep(self.poll)
+
+    def complete(self, job_id, result):
+        with self._db() as db:
+            db.execute("UPDATE jobs SET status = 'done', result = ?, password = NULL WHERE id = ?",
+                       (result, job_id))
+            db.commit()
+
+    def wait(self, job_id, timeout=BROKER_TIMEOUT):
+        """Block until the job's result arrives (and remove the job), or None on timeout"""
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._db() as db:
+                row = db.execute("SELECT result FROM jobs WHERE id = ? AND status = 'done'",
+                                 (job_id,)).fetchone()
+                if row:
+                    db.execute('DELETE FROM jobs WHERE id = ?', (job_id,))
+                    db.commit()
+                    return row[0]
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(self.poll)
+
+    def cancel(self, job_id):
+        with self._db() as db:
+            db.execute('DELETE FROM jobs WHERE id = ?', (job_id,))
+            db.commit()
+
+    def stats(self):
+        with self._db() as db:
+            counts = dict(db.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall())
+        return {'backend': 'sqlite', 'queued': counts.get('queued', 0),
+                'running': counts.get('running', 0), 'done': counts.get('done', 0)}
+
+class RedisBroker:
+    """Same interface on a Redis-compatible server (jobs list plus one result list per job)
+
+    Jobs lost with a crashed worker are not re-queued; the waiting side times out.
+    """
+
+    JOBS_KEY = 'ecap:jobs'
+    RESULT_KEY = 'ecap:result:{}'
+
+    def __init__(self, url, poll=BROKER_POLL):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("BROKER_URL points at Redis but the 'redis' package is not installed")
+        self.client = redis.Redis.from_url(url)
+        self.poll = poll
+
+    def submit(self, username, password):
+        job_id = uuid.uuid4().hex
+        self.client.lpush(self.JOBS_KEY, json.dumps({'id': job_id, 'username': username, 'password': password}))
+        return job_id
+
+    def claim(self, worker, timeout=None):
+        item = self.client.brpop(self.JOBS_KEY, timeout=max(1, int(timeout or self.poll)))
+        if item is None:
+            return None
+        job = json.loads(item[1])
+        return job['id'], job['username'], job['password']
+
+    def complete(self, job_id, result):
+        key = self.RESULT_KEY.format(job_id)
+        self.client.lpush(key, result)
+        self.client.expire(key, int(BROKER_TIMEOUT))
+
+    def wait(self, job_id, timeout=BROKER_TIMEOUT):
+        item = self.client.brpop(self.RESULT_KEY.format(job_id), timeout=max(1, int(timeout)))
+        return item[1].decode('utf-8') if item else None
+
+    def cancel(self, job_id):
+        self.client.delete(self.RESULT_KEY.format(job_id))
+
+    def stats(self):
+        return {'backend': 'redis', 'queued': self.client.llen(self.JOBS_KEY)}
+
+def get_broker(url=BROKER_URL):
+    """Broker for a sqlite:///path or redis:// URL"""
+    if url.startswith('sqlite:///'):
+        return SQLiteBroker(url[len('sqlite:///'):])
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisBroker(url)
+    raise ValueError(f"Unsupported BROKER_URL: {url}")
+
+_broker = None
+_broker_lock = threading.Lock()
+
+def get_default_broker():
+    """Return the process-wide broker for BROKER_URL, creating it on first use"""
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = get_broker()
+        return _broker
+
+def remote_attendance_report(username, password):
+    """Drop-in for get_attendance_report that runs the scrape on a worker process"""
+    broker = get_default_broker()
+    job_id = broker.submit(username, password)
+    result = broker.wait(job_id)
+    if result is None:
+        broker.cancel(job_id)
+        return WORKER_TIMEOUT
+    return decode_result(result)
@@ -0,0 +1,87 @@
+"""Class-wide attendance checks: many students, bounded parallelism, streamed results"""
+import asyncio
+
+from config import BULK_CONCURRENCY, BULK_MAX_STUDENTS
+from report_cache import is_error_report
+
+MESSAGE_LIMIT = 4000  # Telegram allows 4096 characters per message
+
+def parse_students(tokens, limit=BULK_MAX_STUDENTS):
+    """[(username, password), ...] from "roll:password" tokens
+
+    Usernames keep the case they were typed in (as /set does); repeats of
+    one roll number in any case are dropped, keeping the first.
+    """
+    students = {}
+    for token in tokens:
+        username, sep, password = token.partition(':')
+        if not sep or not username or not password:
+            raise ValueError(f"Expected roll:password, got {token!r}")
+        students.setdefault(username.upper(), (username, password))
+    if not students:
+        raise ValueError("No students given")
+    if len(students) > limit:
+        raise ValueError(f"At most {limit} students per batch")
+    return list(students.values())
+
+async def check_all(students, fetch, concurrency=BULK_CONCURRENCY):
+    """Yield (username, report) as each student's fetch(username, password) finishes
+
+    At most `concurrency` fetches are in flight; reports come back in
+    completion order, errors as the scraper's message text.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def check(username, password):
+        async with semaphore:
+            try:
+                return username, await fetch(username, password)
+            except Exception as e:
+                return username, f"❌ Error: {str(e)}"
+
+    for finished in asyncio.as_completed([check(username, password) for username, password in students]):
+        yield await finished
+
+def format_result(username, report):
+    """One progress line for a finished student"""
+    if is_error_report(report):
+        return f"⚠️ {username}: {report.lstrip('❌ ')}"
+    mark = '✅' if report.overall_percentage >= 75 else '🔻'
+    return f"{mark} {username}: {report.overall_percentage:.2f}% ({report.total_present}/{report.total_classes})"
+
+def format_summary(results, threshold=75):
+    """Plain-text table of all students (lowest attendance first) and who is below threshold
+
+    The margin column is classes a student can miss (+) or must attend (-) to
+    stay at threshold, projected for the whole batch in one pass.
+    """
+    from projection import project_reports
+    
+    reports = sorted(((username, report) for username, report in results if not is_error_report(report)),
+                     key=lambda item: item[1].overall_percentage)
+    failed = [username for username, report in results if is_error_report(report)]
+    margins = [projection['overall'][threshold]
+               for projection in project_reports([report for _, report in reports], (threshold,))]
+    below = [username for (username, _), (_, need) in zip(reports, margins) if need]
+
+    lines = [f"{'Roll No':<12} {'Att/Held':>9} {'Margin':>7} {'%':>7}"]
+    lines.extend(f"{username:<12} {f'{report.total_present}/{report.total_classes}':>9} "
+                 f"{f'-{need}' if need else f'+{skip}':>7} "
+                 f"{report.overall_percentage:>6.2f}{'*' if need else ''}"
+                 for (username, report), (skip, need) in zip(reports, margins))
+    lines.append("")
+    lines.append(f"Below {threshold}%: {len(below)} of {len(reports)}" + (f" ({', '.join(below)})" if below else ""))
+    if failed:
+        lines.append(f"Not checked: {', '.join(failed)}")
+    return '\n'.join(lines)
+
+def split_message(text, limit=MESSAGE_LIMIT):
+    """Split text on line boundaries into chunks Telegram accepts"""
+    chunks, current = [], ''
+    for line in text.split('\n'):
+        if current and len(current) + len(line) + 1 > limit:
+            chunks.append(current)
+            current = ''
+        current = f"{current}\n{line}" if current else line
+    chunks.append(current)
+    return chunks
@@ -0,0 +1,88 @@
+import logging
+import random
+import threading
+import time
+
+from config import CIRCUIT_FAILURES, CIRCUIT_RESET, RETRY_BACKOFF_BASE, RETRY_BACKOFF_CAP
+
+# Shown instead of a report when the portal is failing (and nothing cached exists)
+PORTAL_UNAVAILABLE = "❌ The e-cap portal is not responding right now. Please try again in a few minutes."
+
+class PortalUnavailable(Exception):
+    """Raised by the scrapers when the portal itself failed (timeouts, page loads, 5xx)"""
+
+def backoff(attempt, base=RETRY_BACKOFF_BASE, cap=RETRY_BACKOFF_CAP):
+    """Seconds to wait before retry number attempt (0-based): full jitter up to base * 2**attempt"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+class CircuitBreaker:
+    """Shared health of the portal across scraper threads
+
+    closed: requests go through; `failures` consecutive portal failures open it.
+    open: requests fail fast until `reset_timeout` seconds have passed.
+    half_open: a single probe request is let through; its outcome closes or
+    re-opens the breaker.
+    """
+
+    def __init__(self, failures=CIRCUIT_FAILURES, reset_timeout=CIRCUIT_RESET, clock=time.monotonic):
+        self.threshold = max(1, failures)
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self.counters = {'opened': 0, 'rejected': 0}
+
+    def allow(self):
+        """True if a request may go to the portal now (claims the probe when half-open)"""
+        with self.lock:
+            if self.state == 'open' and self.clock() - self.opened_at >= self.reset_timeout:
+                self.state = 'half_open'
+                self.probing = False
+                logging.info("Portal circuit half-open, probing with one request")
+            if self.state == 'closed':
+                return True
+            if self.state == 'half_open' and not self.probing:
+                self.probing = True
+                return True
+            self.counters['rejected'] += 1
+            return False
+
+    def is_open(self):
+        """True while requests are being failed fast (retry loops stop early)"""
+        with self.lock:
+            return self.state == 'open'
+
+    def record_success(self):
+        with self.lock:
+            if self.state != 'closed':
+                logging.info("Portal circuit closed, portal is responding again")
+            self.state = 'closed'
+            self.failures = 0
+            self.probing = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.probing = False
+            if self.state == 'half_open' or (self.state == 'closed' and self.failures >= self.threshold):
+                self.state = 'open'
+                self.opened_at = self.clock()
+                self.counters['opened'] += 1
+                logging.warning(f"Portal circuit opened after {self.failures} consecutive failures")
+
+    def release(self):
+        """End a request whose outcome says nothing about portal health (frees the probe)"""
+        with self.lock:
+            self.probing = False
+
+    def stats(self):
+        with self.lock:
+            retry_in = None
+            if self.state == 'open':
+                retry_in = max(0.0, self.reset_timeout - (self.clock() - self.opened_at))
+            return {'state': self.state, 'failures': self.failures, 'retry_in': retry_in, **self.counters}
+
+portal_breaker = CircuitBreaker()
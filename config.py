@@ -0,0 +1,148 @@
+import os
+from dotenv import load_dotenv
+
+# Load environment variables before anything reads them
+load_dotenv()
+
+# SQLite database holding saved users and attendance snapshots
+DATABASE_PATH = os.getenv('DATABASE_PATH', 'users.db')
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '4'))
+# Seconds between checks for users saved by other processes (gunicorn workers)
+USER_DIRECTORY_CHECK = float(os.getenv('USER_DIRECTORY_CHECK', '1'))
+
+# Portal location (override to point the scraper at the local mock portal)
+ECAP_BASE_URL = os.getenv('ECAP_BASE_URL', 'https://webprosindia.com/vignanit/')
+if not ECAP_BASE_URL.endswith('/'):
+    ECAP_BASE_URL += '/'
+LOGIN_URL = ECAP_BASE_URL + 'Default.aspx'
+ACADEMIC_URL = ECAP_BASE_URL + 'Academics/studentacadamicregister.aspx?scrid=2'
+
+# Scraping engine: 'selenium' (headless browser) or 'http' (plain requests)
+SCRAPER_ENGINE = os.getenv('SCRAPER_ENGINE', 'selenium').lower()
+
+# Key used by the portal's encryptJSText(); read from the page when present
+ECAP_AES_KEY = os.getenv('ECAP_AES_KEY', '8701661282118308')
+
+# Timeout (seconds) for a single HTTP request to the portal
+HTTP_TIMEOUT = float(os.getenv('HTTP_TIMEOUT', '15'))
+
+# WebDriver pool sizing and recycling
+DRIVER_POOL_MIN = int(os.getenv('DRIVER_POOL_MIN', '1'))
+DRIVER_POOL_MAX = int(os.getenv('DRIVER_POOL_MAX', '3'))
+DRIVER_MAX_USES = int(os.getenv('DRIVER_MAX_USES', '50'))
+DRIVER_MAX_RSS_MB = int(os.getenv('DRIVER_MAX_RSS_MB', '600'))
+
+# Seconds an authenticated portal session is reused after its last use
+PORTAL_SESSION_TTL = float(os.getenv('PORTAL_SESSION_TTL', '900'))
+
+# Seconds a cached report is served as fresh, and how long a stale one may be
+# served while it is refreshed in the background
+REPORT_CACHE_TTL = float(os.getenv('REPORT_CACHE_TTL', '120'))
+REPORT_STALE_TTL = float(os.getenv('REPORT_STALE_TTL', '1800'))
+
+# Background refresh of saved users: off-peak windows as "HH:MM-HH:MM,..."
+# (empty disables the scheduler), parallel scrapes, starts per minute, and
+# the random delay (seconds) added before each scrape and between runs
+REFRESH_WINDOWS = os.getenv('REFRESH_WINDOWS', '')
+REFRESH_CONCURRENCY = int(os.getenv('REFRESH_CONCURRENCY', '1'))
+REFRESH_RATE_PER_MIN = float(os.getenv('REFRESH_RATE_PER_MIN', '6'))
+REFRESH_JITTER = float(os.getenv('REFRESH_JITTER', '30'))
+REFRESH_INTERVAL = float(os.getenv('REFRESH_INTERVAL', '1800'))
+
+# Oldest report a saved-keyword lookup is answered with while it refreshes
+SNAPSHOT_MAX_AGE = float(os.getenv('SNAPSHOT_MAX_AGE', '86400'))
+
+# Attendance thresholds (percent) used for skip/recover projections
+PROJECTION_THRESHOLDS = tuple(int(t) for t in os.getenv('PROJECTION_THRESHOLDS', '65,75,85').split(','))
+
+# Update ingestion: 'polling' (long-polling) or 'webhook' (Flask route).
+# WEBHOOK_URL is the public base URL Telegram should post to.
+# Webhook mode can run under several workers (gunicorn -w N app:flask_app,
+# without --preload, as each worker starts the bot when it imports the app):
+# saved users are shared through the database, and one worker at a time runs
+# the refresh scheduler, the outbox and set_webhook, holding a lease it renews
+# every third of BACKGROUND_LEASE seconds (the others take over once it
+# lapses). Report cache, job queue and portal sessions stay per worker, and
+# a chat's updates are only kept in order within one worker.
+BOT_MODE = os.getenv('BOT_MODE', 'polling').lower()
+WEBHOOK_URL = os.getenv('WEBHOOK_URL', '')
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', '/webhook')
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET', '')
+BACKGROUND_LEASE = float(os.getenv('BACKGROUND_LEASE', '60'))
+
+# Scrape job queue: jobs waiting beyond the running ones before new work is
+# shed, and the initial per-job duration estimate (seconds) used for ETAs
+JOB_QUEUE_SIZE = int(os.getenv('JOB_QUEUE_SIZE', '30'))
+JOB_ESTIMATE = float(os.getenv('JOB_ESTIMATE', '20'))
+
+# Where scrapes run: 'local' (thread pool in the bot process) or 'broker'
+# (worker processes started with worker.py, fed through BROKER_URL, which is
+# sqlite:///path/to/jobs.db or redis://host:port/db)
+SCRAPE_BACKEND = os.getenv('SCRAPE_BACKEND', 'local').lower()
+BROKER_URL = os.getenv('BROKER_URL', 'sqlite:///jobs.db')
+BROKER_POLL = float(os.getenv('BROKER_POLL', '0.5'))
+BROKER_LEASE = float(os.getenv('BROKER_LEASE', '300'))
+BROKER_TIMEOUT = float(os.getenv('BROKER_TIMEOUT', '240'))
+BROKER_INFLIGHT = int(os.getenv('BROKER_INFLIGHT', '8'))
+WORKER_PROCESSES = int(os.getenv('WORKER_PROCESSES', '1'))
+
+# Browser profile for the Selenium engine: 'lean' loads pages eagerly, turns
+# off extensions and background services and blocks the URL patterns below
+# (images, stylesheets, fonts, trackers) at the network layer; 'full' loads
+# everything like a normal browser
+BROWSER_PROFILE = os.getenv('BROWSER_PROFILE', 'lean').lower()
+BLOCKED_URL_PATTERNS = [p.strip() for p in os.getenv(
+    'BLOCKED_URL_PATTERNS',
+    '*.png,*.jpg,*.jpeg,*.gif,*.svg,*.ico,*.webp,*.bmp,*.css,*.woff,*.woff2,*.ttf,*.otf,'
+    '*google-analytics.com*,*googletagmanager.com*,*doubleclick.net*,*facebook.net*'
+).split(',') if p.strip()]
+
+# Browser driver binaries; an empty CHROMEDRIVER_PATH lets webdriver-manager
+# resolve (and if needed download) one at first use, once per process
+CHROMEDRIVER_PATH = os.getenv('CHROMEDRIVER_PATH', '')
+EDGEDRIVER_PATH = os.getenv('EDGEDRIVER_PATH', 'edgedriver_win64/msedgedriver.exe')
+
+# Bot API endpoint (point at mock_telegram.py for offline benchmarks)
+TELEGRAM_API_URL = os.getenv('TELEGRAM_API_URL', 'https://api.telegram.org/bot')
+
+# Bulk (class-wide) checks: students scraped in parallel per batch, and the
+# largest batch accepted
+BULK_CONCURRENCY = int(os.getenv('BULK_CONCURRENCY', '3'))
+BULK_MAX_STUDENTS = int(os.getenv('BULK_MAX_STUDENTS', '80'))
+
+# Proactive messages: change notices after each refresh and a daily digest at
+# DIGEST_TIME ("HH:MM", empty disables). Sends are limited globally and per
+# chat (messages per second, with a small per-chat burst)
+NOTIFY_CHANGES = os.getenv('NOTIFY_CHANGES', 'true').lower() in ('1', 'true', 'yes')
+DIGEST_TIME = os.getenv('DIGEST_TIME', '')
+OUTBOX_GLOBAL_RATE = float(os.getenv('OUTBOX_GLOBAL_RATE', '25'))
+OUTBOX_CHAT_RATE = float(os.getenv('OUTBOX_CHAT_RATE', '1'))
+OUTBOX_CHAT_BURST = int(os.getenv('OUTBOX_CHAT_BURST', '3'))
+OUTBOX_POLL = float(os.getenv('OUTBOX_POLL', '2'))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', '5'))
+
+# Minimum seconds between progress edits of one status message
+PROGRESS_EDIT_INTERVAL = float(os.getenv('PROGRESS_EDIT_INTERVAL', '1.5'))
+
+# Portal circuit breaker: consecutive failed scrapes that open it, seconds it
+# stays open before one probe is let through, and the jittered exponential
+# backoff (base and cap, seconds) between retries inside a scrape
+CIRCUIT_FAILURES = int(os.getenv('CIRCUIT_FAILURES', '5'))
+CIRCUIT_RESET = float(os.getenv('CIRCUIT_RESET', '60'))
+RETRY_BACKOFF_BASE = float(os.getenv('RETRY_BACKOFF_BASE', '0.5'))
+RETRY_BACKOFF_CAP = float(os.getenv('RETRY_BACKOFF_CAP', '8'))
+
+# Telegram updates handled concurrently (updates from one chat stay in order);
+# 1 processes them one after another
+UPDATE_CONCURRENCY = int(os.getenv('UPDATE_CONCURRENCY', '32'))
+
+# Adaptive scrape concurrency (local backend): the job queue runs between
+# SCRAPE_LIMIT_MIN and SCRAPE_LIMIT_MAX scrapes at once, adding one slot per
+# window of healthy portal calls and cutting by SCRAPE_LIMIT_BACKOFF on errors
+# or when portal latency exceeds SCRAPE_LIMIT_TOLERANCE times its baseline.
+# Selenium scrapes never exceed the browser pool, so its size is the default cap
+SCRAPE_LIMIT_MIN = int(os.getenv('SCRAPE_LIMIT_MIN', '1'))
+SCRAPE_LIMIT_MAX = int(os.getenv('SCRAPE_LIMIT_MAX', str(DRIVER_POOL_MAX if SCRAPER_ENGINE == 'selenium' else 8)))
+SCRAPE_LIMIT_INITIAL = int(os.getenv('SCRAPE_LIMIT_INITIAL', '3'))
+SCRAPE_LIMIT_TOLERANCE = float(os.getenv('SCRAPE_LIMIT_TOLERANCE', '2'))
+SCRAPE_LIMIT_BACKOFF = float(os.getenv('SCRAPE_LIMIT_BACKOFF', '0.7'))
@@ -0,0 +1,11 @@
+import pytest
+
+import model
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    """Fresh users.db in a temporary directory, pooled connections closed afterwards"""
+    monkeypatch.setattr(model, 'DATABASE_PATH', str(tmp_path / 'users.db'))
+    model.init_db()
+    yield
+    model.close_pools()
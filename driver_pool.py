@@ -0,0 +1,218 @@
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from config import DRIVER_POOL_MIN, DRIVER_POOL_MAX, DRIVER_MAX_USES, DRIVER_MAX_RSS_MB
+
+def process_tree_rss_mb(pid):
+    """Resident memory (MB) of a process and all its descendants, read from /proc"""
+    total_kb = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f'/proc/{current}/status') as status:
+                for line in status:
+                    if line.startswith('VmRSS:'):
+                        total_kb += int(line.split()[1])
+                        break
+            for task in os.listdir(f'/proc/{current}/task'):
+                with open(f'/proc/{current}/task/{task}/children') as children:
+                    pending.extend(int(child) for child in children.read().split())
+        except (OSError, ValueError):
+            continue
+    return total_kb / 1024
+
+class PooledDriver:
+    """A WebDriver plus the bookkeeping needed to decide when to recycle it"""
+    __slots__ = ('driver', 'uses', 'created')
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.uses = 0
+        self.created = time.time()
+
+    def rss_mb(self):
+        process = getattr(getattr(self.driver, 'service', None), 'process', None)
+        return process_tree_rss_mb(process.pid) if process else 0
+
+class DriverPool:
+    """Bounded pool of pre-warmed WebDrivers that are reset between checkouts"""
+
+    def __init__(self, factory, min_size=DRIVER_POOL_MIN, max_size=DRIVER_POOL_MAX,
+                 max_uses=DRIVER_MAX_USES, max_rss_mb=DRIVER_MAX_RSS_MB):
+        self.factory = factory
+        self.min_size = min(min_size, max_size)
+        self.max_size = max_size
+        self.max_uses = max_uses
+        self.max_rss_mb = max_rss_mb
+        self.idle = []
+        self.size = 0
+        self.closed = False
+        self.condition = threading.Condition()
+        self.counters = {
+            'created': 0, 'recycled': 0, 'unhealthy': 0, 'checkouts': 0,
+            'waits': 0, 'wait_seconds': 0.0,
+        }
+
+    def warm_up(self):
+        """Start drivers until min_size are idle and ready"""
+        while True:
+            with self.condition:
+                if self.closed or self.size >= self.min_size:
+                    return
+                self.size += 1
+            try:
+                entry = self._create()
+            except Exception as e:
+                with self.condition:
+                    self.size -= 1
+                logging.error(f"Driver pool warm-up failed: {str(e)}")
+                return
+            with self.condition:
+                self.idle.append(entry)
+                self.condition.notify()
+
+    def acquire(self, timeout=60):
+        """Check out a healthy driver, starting a new one if the pool has room"""
+        started = time.monotonic()
+        deadline = started + timeout
+        waited = False
+        while True:
+            with self.condition:
+                while not self.idle and self.size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if self.closed or remaining <= 0:
+                        raise TimeoutError("No WebDriver available in pool")
+                    waited = True
+                    self.condition.wait(remaining)
+                if self.closed:
+                    raise RuntimeError("Driver pool is closed")
+                if waited:
+                    self.counters['waits'] += 1
+                    self.counters['wait_seconds'] += time.monotonic() - started
+                    waited = False
+                entry = self.idle.pop() if self.idle else None
+                if entry is None:
+                    self.size += 1
+
+            if entry is None:
+                try:
+                    entry = self._create()
+                except Exception:
+                    self._discard(None)
+                    raise
+            elif not self._healthy(entry):
+                with self.condition:
+                    self.counters['unhealthy'] += 1
+                self._discard(entry)
+                continue
+
+            entry.uses += 1
+            with self.condition:
+                self.counters['checkouts'] += 1
+            return entry
+
+    def release(self, entry, broken=False):
+        """Return a driver to the pool, recycling it if broken, worn out or too large"""
+        if not broken:
+            broken = not self._reset(entry)
+        if not broken and (entry.uses >= self.max_uses or entry.rss_mb() > self.max_rss_mb):
+            with self.condition:
+                self.counters['recycled'] += 1
+            broken = True
+        if broken or self.closed:
+            self._discard(entry)
+            if not self.closed:
+                threading.Thread(target=self.warm_up, daemon=True).start()
+            return
+        with self.condition:
+            self.idle.append(entry)
+            self.condition.notify()
+
+    @contextmanager
+    def driver(self, timeout=60):
+        """Borrow a driver for the duration of a with-block"""
+        from selenium.common.exceptions import WebDriverException
+
+        entry = self.acquire(timeout)
+        broken = False
+        try:
+            yield entry.driver
+        except WebDriverException:
+            broken = True
+            raise
+        finally:
+            self.release(entry, broken)
+
+    def stats(self):
+        """Snapshot of pool size and usage counters"""
+        with self.condition:
+            return {
+                'size': self.size,
+                'idle': len(self.idle),
+                'in_use': self.size - len(self.idle),
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                **self.counters,
+            }
+
+    def close(self):
+        """Quit every idle driver; drivers in use are quit when released"""
+        with self.condition:
+            self.closed = True
+            idle, self.idle = self.idle, []
+            self.condition.notify_all()
+        for entry in idle:
+            self._discard(entry)
+
+    def _create(self):
+        entry = PooledDriver(self.factory())
+        with self.condition:
+            self.counters['created'] += 1
+        logging.info("Driver pool started a new WebDriver")
+        return entry
+
+    def _discard(self, entry):
+        with self.condition:
+            self.size -= 1
+            self.condition.notify()
+        if entry is not None:
+            try:
+                entry.driver.quit()
+            except Exception:
+                pass
+
+    def _healthy(self, entry):
+        try:
+            entry.driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def _reset(self, entry):
+        """Clear cookies and web storage so the next user starts clean"""
+        try:
+            entry.driver.delete_all_cookies()
+            try:
+                entry.driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+            except Exception:
+                pass
+            entry.driver.get('about:blank')
+            return True
+        except Exception:
+            return False
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_driver_pool():
+    """Return the process-wide driver pool, creating it on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            from scrapper import setup_driver
+            _pool = DriverPool(setup_driver)
+        return _pool
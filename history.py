@@ -0,0 +1,89 @@
+import hashlib
+import json
+import logging
+import time
+
+from model import get_snapshot, save_snapshot, get_snapshot_changes
+from report import AttendanceReport
+from report_cache import password_fingerprint
+from outbox import notify_changes
+
+def export_hash(content, today):
+    """Hash of an export as seen on a given day (today's column depends on the date)"""
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    return hashlib.sha256(today.encode('utf-8') + b'\n' + content).hexdigest()
+
+def diff_reports(old, new):
+    """Per-subject differences between two reports (new P/A marks and counts)"""
+    before = {subject.name: subject for subject in old.subjects}
+    changes = []
+    for subject in new.subjects:
+        previous = before.get(subject.name)
+        present, total = (previous.present, previous.total) if previous else (0, 0)
+        if (subject.present, subject.total) == (present, total):
+            continue
+        changes.append({
+            'subject': subject.name,
+            'present': subject.present,
+            'total': subject.total,
+            'new_present': subject.present - present,
+            'new_absent': (subject.total - subject.present) - (total - present),
+        })
+    return changes
+
+def load_or_parse(username, password, content, parse, today=None):
+    """Return the report for an export, reusing the stored snapshot when unchanged
+
+    A changed export is parsed with parse(content, today), stored as the new
+    snapshot, and its differences from the previous one are appended. The
+    snapshot is tagged with the fingerprint of the password that fetched it.
+    """
+    today = today or time.strftime("%d/%m")
+    digest = export_hash(content, today)
+    fingerprint = password_fingerprint(password)
+    try:
+        snapshot = get_snapshot(username)
+    except Exception as e:
+        logging.warning(f"Snapshot lookup failed: {str(e)}")
+        snapshot = None
+
+    if snapshot and snapshot[1] == digest:
+        logging.info(f"Export unchanged for user {username}, reusing snapshot")
+        if snapshot[4] != fingerprint:
+            # Same export fetched with a new password: hand the snapshot over to it
+            try:
+                save_snapshot(username, fingerprint, digest, snapshot[2])
+            except Exception as e:
+                logging.warning(f"Snapshot save failed: {str(e)}")
+        return AttendanceReport.from_dict(json.loads(snapshot[2]))
+
+    report = parse(content, today)
+    try:
+        changes = diff_reports(AttendanceReport.from_dict(json.loads(snapshot[2])), report) if snapshot else []
+        save_snapshot(
+            username, fingerprint, digest,
+            json.dumps(report.to_dict(), separators=(',', ':')),
+            json.dumps(changes, separators=(',', ':')) if changes else None
+        )
+    except Exception as e:
+        logging.warning(f"Snapshot save failed: {str(e)}")
+        return report
+    
+    try:
+        notify_changes(username, password, changes)
+    except Exception as e:
+        logging.warning(f"Queueing change notices failed: {str(e)}")
+    return report
+
+def last_snapshot(username, password):
+    """(report, fetched_at) of the stored snapshot, or None unless it was fetched with password"""
+    snapshot = get_snapshot(username)
+    if snapshot is None or snapshot[4] != password_fingerprint(password):
+        return None
+    return AttendanceReport.from_dict(json.loads(snapshot[2])), snapshot[3]
+
+def recent_changes(username, password, limit=5):
+    """[(fetched_at, [change, ...]), ...] newest first, of refreshes fetched with password"""
+    rows = get_snapshot_changes(username, password_fingerprint(password), limit)
+    return [(fetched_at, json.loads(changes)) for fetched_at, changes in rows]
@@ -0,0 +1,153 @@
+import asyncio
+import bisect
+import itertools
+import logging
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import DRIVER_POOL_MAX, JOB_QUEUE_SIZE, JOB_ESTIMATE
+from metrics import STAGE_SECONDS, SCRAPES, QUEUE_WAIT_SECONDS
+
+# Lower runs first: saved-keyword checks, then ad-hoc /check, then pre-fetching
+PRIORITY_KEYWORD = 0
+PRIORITY_CHECK = 1
+PRIORITY_BACKGROUND = 2
+
+QUEUE_BUSY = "❌ The bot is busy right now. Please try again in a few minutes."
+ALREADY_QUEUED = "❌ You already have a check waiting. Please wait for it to finish."
+
+class Job:
+    __slots__ = ('key', 'args', 'priority', 'future', 'on_position', 'position', 'submitted')
+
+    def __init__(self, key, args, priority, future, on_position):
+        self.key = key
+        self.args = args
+        self.priority = priority
+        self.future = future
+        self.on_position = on_position
+        self.position = None
+        self.submitted = time.monotonic()
+
+class JobQueue:
+    """Bounded scrape queue with priorities and one waiting job per user
+
+    run(username, password) is executed in a thread pool with at most
+    `workers` jobs at a time, or `limit.limit` (read at every dispatch) when
+    an adaptive limit is given, up to its max_limit. When `max_size` jobs are waiting, a new job
+    either displaces the lowest-priority waiting job or is turned away;
+    turned-away jobs resolve to an error message like any failed scrape.
+    on_position(position, eta_seconds) is awaited whenever a waiting job
+    moves in the queue, and with position 0 once it starts running.
+    """
+
+    def __init__(self, run, workers=DRIVER_POOL_MAX, max_size=JOB_QUEUE_SIZE,
+                 estimate=JOB_ESTIMATE, executor=None, limit=None):
+        self.run = run
+        self.limit = limit
+        self.max_workers = limit.max_limit if limit else max(1, workers)
+        self.max_size = max_size
+        self.estimate = estimate
+        self.executor = executor or ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='scrape')
+        self.pending = []   # sorted (priority, seq, job)
+        self.waiting = {}   # key -> waiting job
+        self.running = 0
+        self.sequence = itertools.count()
+        self.counters = {'submitted': 0, 'completed': 0, 'failed': 0, 'rejected': 0, 'shed': 0}
+
+    def submit(self, key, username, password, priority=PRIORITY_CHECK, on_position=None):
+        """Queue a scrape and return a future for its report (or error message)"""
+        future = asyncio.get_running_loop().create_future()
+        args = (username, password)
+        self.counters['submitted'] += 1
+
+        existing = self.waiting.get(key)
+        if existing is not None:
+            if existing.args == args:
+                return existing.future
+            self.counters['rejected'] += 1
+            future.set_result(ALREADY_QUEUED)
+            return future
+
+        if len(self.pending) >= self.max_size:
+            if self.pending[-1][0] <= priority:
+                self.counters['rejected'] += 1
+                future.set_result(QUEUE_BUSY)
+                return future
+            _, _, shed = self.pending.pop()
+            del self.waiting[shed.key]
+            self.counters['shed'] += 1
+            shed.future.set_result(QUEUE_BUSY)
+
+        job = Job(key, args, priority, future, on_position)
+        bisect.insort(self.pending, (priority, next(self.sequence), job))
+        self.waiting[key] = job
+        self._dispatch()
+        self._announce()
+        return future
+
+    @property
+    def workers(self):
+        """Jobs allowed to run at once right now"""
+        return self.limit.limit if self.limit else self.max_workers
+
+    def eta(self, position):
+        """Expected seconds until the job at this queue position starts"""
+        return math.ceil(position / self.workers) * self.estimate
+
+    def stats(self):
+        return {
+            'waiting': len(self.pending),
+            'running': self.running,
+            'workers': self.workers,
+            'max_size': self.max_size,
+            'estimate': round(self.estimate, 1),
+            **self.counters,
+        }
+
+    def _dispatch(self):
+        while self.running < self.workers and self.pending:
+            _, _, job = self.pending.pop(0)
+            del self.waiting[job.key]
+            self.running += 1
+            asyncio.ensure_future(self._execute(job))
+
+    async def _execute(self, job):
+        if job.position:
+            self._notify(job, 0)
+        started = time.monotonic()
+        QUEUE_WAIT_SECONDS.observe(started - job.submitted, priority=job.priority)
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self.executor, self.run, *job.args)
+            job.future.set_result(result)
+            self.counters['completed'] += 1
+            SCRAPES.inc(outcome='error' if isinstance(result, str) else 'ok')
+        except Exception as e:
+            job.future.set_exception(e)
+            self.counters['failed'] += 1
+            SCRAPES.inc(outcome='exception')
+        finally:
+            # Moving average of scrape time drives the ETAs
+            duration = time.monotonic() - started
+            STAGE_SECONDS.observe(duration, stage='scrape')
+            self.estimate = 0.8 * self.estimate + 0.2 * duration
+            self.running -= 1
+            self._dispatch()
+            self._announce()
+
+    def _announce(self):
+        for index, (_, _, job) in enumerate(self.pending):
+            if job.position != index + 1:
+                self._notify(job, index + 1)
+
+    def _notify(self, job, position):
+        job.position = position
+        if job.on_position is None:
+            return
+        task = asyncio.ensure_future(job.on_position(position, self.eta(position)))
+        task.add_done_callback(self._log_failure)
+
+    @staticmethod
+    def _log_failure(task):
+        if not task.cancelled() and task.exception():
+            logging.warning(f"Queue position update failed: {str(task.exception())}")
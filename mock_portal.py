@@ -0,0 +1,284 @@
+"""Local stand-in for the e-cap portal, used by tests and benchmarks
+
+    python mock_portal.py [--port 8080] [--latency 0.2] [--error-rate 0.05]
+
+then point ECAP_BASE_URL at the printed URL to run the bot against it.
+"""
+import argparse
+import base64
+import html
+import random
+import secrets
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qs, urlsplit
+
+from cryptography.hazmat.primitives import padding
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+MOCK_AES_KEY = '8701661282118308'
+
+LOGIN_PAGE = """<html><head><title>e-cap</title>
+<script type="text/javascript">
+// Real portal: CryptoJS.AES with CryptoJS.enc.Utf8.parse('{key}') as key and IV.
+// Browsers here have no CryptoJS, so the mock uses a reversible stand-in.
+function encryptJSText(id) {{
+  var pwd = document.getElementById('txtPwd' + id).value;
+  document.getElementById('hdnpwd' + id).value = 'mock:' + btoa(pwd);
+}}
+function setValue(id) {{ document.getElementById('txtPwd' + id).value = ''; }}
+</script></head><body>
+<form name="form1" method="post" action="Default.aspx" id="form1">
+<input type="hidden" name="__VIEWSTATE" id="__VIEWSTATE" value="{viewstate}" />
+<input type="hidden" name="__VIEWSTATEGENERATOR" id="__VIEWSTATEGENERATOR" value="CA0B0334" />
+<input type="hidden" name="__EVENTVALIDATION" id="__EVENTVALIDATION" value="{validation}" />
+<input name="txtId2" type="text" id="txtId2" />
+<input name="txtPwd2" type="password" id="txtPwd2" />
+<input type="hidden" name="hdnpwd2" id="hdnpwd2" value="" />
+<input type="image" name="imgBtn2" id="imgBtn2" src="images/login.png" />
+{error}
+</form></body></html>"""
+
+HOME_PAGE = """<html><body><form method="post" action="Default.aspx">
+<div id="divscreens" style="display:block">Welcome {username}</div>
+</form></body></html>"""
+
+REGISTER_PAGE = """<html><body>
+<form name="form1" method="post" action="studentacadamicregister.aspx?scrid=2" id="form1">
+<input type="hidden" name="__VIEWSTATE" id="__VIEWSTATE" value="{viewstate}" />
+<input type="hidden" name="__EVENTVALIDATION" id="__EVENTVALIDATION" value="{validation}" />
+<input type="submit" name="btnExport" value="Export" id="btnExport" />
+<div id="divRegister">Academic register for {username}</div>
+</form></body></html>"""
+
+SUBJECTS = ['DAA', 'OS', 'CN', 'SE', 'DBMS', 'ML', 'OS LAB', 'DBMS LAB', 'SOFT SKILLS', 'MATHS-III']
+
+def build_export(student_id, days=30, subjects=SUBJECTS, seed=None, today=None):
+    """Build an export document shaped like the portal's academic register .xls (HTML)"""
+    rng = random.Random(seed if seed is not None else student_id)
+    end = today or time.time()
+    dates = [time.strftime('%d/%m', time.localtime(end - 86400 * offset))
+             for offset in range(days - 1, -1, -1)]
+
+    rows = []
+    for number, subject in enumerate(subjects, 1):
+        marks = []
+        present = held = 0
+        for _ in dates:
+            roll = rng.random()
+            if roll < 0.35:
+                marks.append('&nbsp;')
+                continue
+            held += 1
+            if roll < 0.85:
+                present += 1
+                marks.append('P')
+            else:
+                marks.append('A')
+        percentage = f"{present / held * 100:.2f}" if held else ".00"
+        cells = [str(number), html.escape(subject)] + marks + [f"{present}/{held}", percentage]
+        rows.append(f'<tr title="{html.escape(subject)}">' +
+                    ''.join(f'<td class="cellBorder">{cell}</td>' for cell in cells) + '</tr>')
+
+    header = ['Sl.No', 'Subject'] + dates + ['Attended/Held', '%']
+    return (
+        '<html><body><table>'
+        f'<tr><td class="reportData1">Roll No</td><td class="reportData2">: {student_id}</td></tr>'
+        '<tr class="reportHeading2WithBackground">' + ''.join(f'<td>{h}</td>' for h in header) + '</tr>'
+        + ''.join(rows) + '</table></body></html>'
+    )
+
+def decrypt_password(value, key=MOCK_AES_KEY):
+    """Reverse either the real AES encryption or the mock JS stand-in"""
+    if value.startswith('mock:'):
+        return base64.b64decode(value[5:]).decode('utf-8')
+    key_bytes = key.encode('utf-8')
+    decryptor = Cipher(algorithms.AES(key_bytes), modes.CBC(key_bytes)).decryptor()
+    data = decryptor.update(base64.b64decode(value)) + decryptor.finalize()
+    unpadder = padding.PKCS7(128).unpadder()
+    return (unpadder.update(data) + unpadder.finalize()).decode('utf-8')
+
+class MockPortal:
+    """Threaded HTTP server mimicking Default.aspx, the academic register and its Export
+
+    Latency and faults can be injected (and changed while running):
+    every request waits `latency` plus up to `jitter` seconds, Export posts
+    wait `export_latency` more, and a request fails with HTTP 500 with
+    probability `error_rate` or has its connection dropped without a
+    response with probability `drop_rate`.
+    """
+
+    def __init__(self, accounts=None, host='127.0.0.1', port=0, latency=0.0, jitter=0.0,
+                 export_latency=0.0, error_rate=0.0, drop_rate=0.0, seed=None):
+        # accounts=None accepts any username whose password equals the username
+        self.accounts = accounts
+        self.sessions = {}
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.latency = latency
+        self.jitter = jitter
+        self.export_latency = export_latency
+        self.error_rate = error_rate
+        self.drop_rate = drop_rate
+        self.rng = random.Random(seed)
+        self.faults = {'error': 0, 'drop': 0}
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/vignanit/"
+
+    def check_password(self, username, password):
+        if self.accounts is None:
+            return bool(username) and password == username
+        return self.accounts.get(username) == password
+
+    def plan(self, path, export=False):
+        """Delay (seconds) and fault ('error', 'drop' or None) for the next request"""
+        with self.lock:
+            self.requests += 1
+            delay = self.latency + (self.rng.uniform(0, self.jitter) if self.jitter else 0)
+            if export:
+                delay += self.export_latency
+            roll = self.rng.random()
+            fault = None
+            if roll < self.error_rate:
+                fault = 'error'
+            elif roll < self.error_rate + self.drop_rate:
+                fault = 'drop'
+            if fault:
+                self.faults[fault] += 1
+        return delay, fault
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _handler(portal):
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def session_user(self):
+                cookie = SimpleCookie(self.headers.get('Cookie', ''))
+                morsel = cookie.get('ASP.NET_SessionId')
+                return portal.sessions.get(morsel.value) if morsel else None
+
+            def send_page(self, body, headers=None, status=200):
+                data = body.encode('utf-8')
+                headers = {'Content-Type': 'text/html; charset=utf-8', **(headers or {})}
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def login_page(self, error=''):
+                return LOGIN_PAGE.format(key=MOCK_AES_KEY, viewstate=secrets.token_hex(32),
+                                         validation=secrets.token_hex(16), error=error)
+
+            def inject(self, path, export=False):
+                """Apply planned latency/faults; False when the request was answered by a fault"""
+                delay, fault = portal.plan(path, export)
+                if delay:
+                    time.sleep(delay)
+                if fault == 'error':
+                    self.send_page('<html><body>Server Error in \'/vignanit\' Application.</body></html>',
+                                   status=500)
+                    return False
+                if fault == 'drop':
+                    self.close_connection = True
+                    return False
+                return True
+
+            def read_form(self):
+                length = int(self.headers.get('Content-Length', 0))
+                form = parse_qs(self.rfile.read(length).decode('utf-8'), keep_blank_values=True)
+                return {name: values[0] for name, values in form.items()}
+
+            def do_GET(self):
+                path = urlsplit(self.path).path
+                if not self.inject(path):
+                    return
+                if path.endswith('/Default.aspx'):
+                    self.send_page(self.login_page())
+                elif path.endswith('/studentacadamicregister.aspx'):
+                    username = self.session_user()
+                    if username is None:
+                        self.send_page(self.login_page())
+                    else:
+                        self.send_page(REGISTER_PAGE.format(viewstate=secrets.token_hex(32),
+                                                            validation=secrets.token_hex(16),
+                                                            username=username))
+                else:
+                    self.send_page('<html><body>Not Found</body></html>', status=404)
+
+            def do_POST(self):
+                path = urlsplit(self.path).path
+                form = self.read_form()
+                if not self.inject(path, export=form.get('btnExport') == 'Export'):
+                    return
+                if path.endswith('/Default.aspx'):
+                    username = form.get('txtId2', '')
+                    try:
+                        password = decrypt_password(form.get('hdnpwd2', ''))
+                    except Exception:
+                        password = None
+                    if '__VIEWSTATE' not in form or not portal.check_password(username, password):
+                        self.send_page(self.login_page('<span id="lblError">Invalid Credentials</span>'))
+                        return
+                    session_id = secrets.token_hex(12)
+                    with portal.lock:
+                        portal.sessions[session_id] = username
+                    self.send_page(HOME_PAGE.format(username=username), {
+                        'Set-Cookie': f'ASP.NET_SessionId={session_id}; path=/; HttpOnly'
+                    })
+                elif path.endswith('/studentacadamicregister.aspx'):
+                    username = self.session_user()
+                    if username is None or form.get('btnExport') != 'Export':
+                        self.send_page(self.login_page())
+                        return
+                    self.send_page(build_export(username), {
+                        'Content-Type': 'application/vnd.ms-excel',
+                        'Content-Disposition': 'attachment; filename=StudentAcademicRegister.xls',
+                    })
+                else:
+                    self.send_page('<html><body>Not Found</body></html>', status=404)
+
+        return Handler
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mock e-cap portal")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--export-latency', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--drop-rate', type=float, default=0.0)
+    args = parser.parse_args()
+    with MockPortal(host=args.host, port=args.port, latency=args.latency, jitter=args.jitter,
+                    export_latency=args.export_latency, error_rate=args.error_rate,
+                    drop_rate=args.drop_rate) as portal:
+        print(f"Mock portal running at {portal.base_url}Default.aspx")
+        try:
+            portal.thread.join()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,152 @@
+"""Local stand-in for the Telegram Bot API, used by startup and load benchmarks
+
+Serves getMe, getUpdates (long polling over queued updates), sendMessage,
+editMessageText and answers every other method with True. Point the bot at
+it with TELEGRAM_API_URL=<base_url>.
+"""
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+BOT_USER = {'id': 1, 'is_bot': True, 'first_name': 'Mock', 'username': 'mock_bot'}
+
+def message_update(update_id, message_id, text, chat_id=42, user_id=None):
+    """Bot API JSON for a private text message (commands get their entity)"""
+    user_id = user_id or chat_id
+    update = {
+        'update_id': update_id,
+        'message': {
+            'message_id': message_id,
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private'},
+            'from': {'id': user_id, 'is_bot': False, 'first_name': f'User{user_id}'},
+            'text': text,
+        },
+    }
+    if text.startswith('/'):
+        command = text.split()[0]
+        update['message']['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(command)}]
+    return update
+
+class MockTelegram:
+    """Threaded HTTP server speaking enough of the Bot API for benchmarks"""
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0):
+        self.latency = latency
+        self.updates = []
+        self.sent = []  # (monotonic time, method, params)
+        self.condition = threading.Condition()
+        self.update_ids = itertools.count(1)
+        self.message_ids = itertools.count(1)
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/bot"
+
+    def push_message(self, text, chat_id=42, user_id=None):
+        """Queue a private text message as the next update; returns its update_id"""
+        update_id = next(self.update_ids)
+        update = message_update(update_id, next(self.message_ids), text, chat_id, user_id)
+        with self.condition:
+            self.updates.append(update)
+            self.condition.notify_all()
+        return update_id
+
+    def wait_for(self, count, methods=('sendMessage',), timeout=30):
+        """Block until `count` calls to any of `methods` were received; returns them"""
+        deadline = time.monotonic() + timeout
+        with self.condition:
+            while True:
+                calls = [call for call in self.sent if call[1] in methods]
+                if len(calls) >= count:
+                    return calls
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"Got {len(calls)} of {count} {methods} calls")
+                self.condition.wait(remaining)
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def get_updates(self, params):
+        offset = int(params.get('offset') or 0)
+        timeout = min(float(params.get('timeout') or 0), 1.0)
+        deadline = time.monotonic() + timeout
+        with self.condition:
+            self.updates = [u for u in self.updates if u['update_id'] >= offset]
+            while not self.updates and time.monotonic() < deadline:
+                self.condition.wait(deadline - time.monotonic())
+            return list(self.updates)
+
+    def record(self, method, params):
+        with self.condition:
+            self.sent.append((time.monotonic(), method, params))
+            self.condition.notify_all()
+        if method in ('sendMessage', 'editMessageText'):
+            return {
+                'message_id': int(params.get('message_id') or next(self.message_ids)),
+                'date': int(time.time()),
+                'chat': {'id': int(params.get('chat_id') or 0), 'type': 'private'},
+                'from': BOT_USER,
+                'text': params.get('text', ''),
+            }
+        return True
+
+    def _handler(mock):
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def params(self):
+                length = int(self.headers.get('Content-Length', 0))
+                body = self.rfile.read(length).decode('utf-8') if length else ''
+                if self.headers.get('Content-Type', '').startswith('application/json'):
+                    return json.loads(body or '{}')
+                return {name: values[0] for name, values in parse_qs(body).items()}
+
+            def reply(self, result):
+                data = json.dumps({'ok': True, 'result': result}).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                try:
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # the bot process went away mid long-poll
+
+            def do_POST(self):
+                method = urlsplit(self.path).path.rsplit('/', 1)[-1]
+                params = self.params()
+                if method == 'getUpdates':
+                    self.reply(mock.get_updates(params))
+                    return
+                if mock.latency:
+                    time.sleep(mock.latency)
+                if method == 'getMe':
+                    self.reply(BOT_USER)
+                else:
+                    self.reply(mock.record(method, params))
+
+            do_GET = do_POST
+
+        return Handler
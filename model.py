@@ -1,13 +1,182 @@
+import asyncio
+import json
+import queue
 import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
+from config import DATABASE_PATH, DB_POOL_SIZE, USER_DIRECTORY_CHECK
+
+class ConnectionPool:
+    """Persistent SQLite connections shared by worker threads
+
+    Connections stay open, so sqlite3's per-connection statement cache keeps
+    the prepared statements below compiled between calls.
+    """
+
+    def __init__(self, path, size=DB_POOL_SIZE):
+        self.path = path
+        self.size = size
+        self.idle = queue.LifoQueue()
+        self.created = 0
+        self.lock = threading.Lock()
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, check_same_thread=False, cached_statements=64, timeout=10)
+        db.execute('PRAGMA journal_mode=WAL')
+        db.execute('PRAGMA synchronous=NORMAL')
+        db.execute('PRAGMA busy_timeout=5000')
+        return db
+
+    def acquire(self):
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self.lock:
+            if self.created < self.size:
+                self.created += 1
+                return self._connect()
+        return self.idle.get()
+
+    def release(self, db):
+        if db.in_transaction:
+            db.rollback()
+        self.idle.put(db)
+
+    def close(self):
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                break
+        with self.lock:
+            self.created = 0
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_pool(path=None):
+    """Connection pool for a database path (the configured one by default)"""
+    path = path or DATABASE_PATH
+    with _pools_lock:
+        pool = _pools.get(path)
+        if pool is None:
+            pool = _pools[path] = ConnectionPool(path)
+        return pool
+
+def close_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
 
 @contextmanager
 def get_db():
-    db = sqlite3.connect('users.db')
+    pool = get_pool(DATABASE_PATH)
+    db = pool.acquire()
     try:
         yield db
     finally:
-        db.close()
+        pool.release(db)
+
+# Prepared statements (compiled once per pooled connection)
+SAVE_USER_SQL = '''
+INSERT OR REPLACE INTO users (phone, username, password, keyword)
+VALUES (?, ?, ?, ?)
+'''
+GET_USER_SQL = 'SELECT * FROM users WHERE phone = ?'
+GET_USER_BY_KEYWORD_SQL = 'SELECT * FROM users WHERE phone = ? AND keyword = ?'
+GET_ALL_USERS_SQL = 'SELECT * FROM users'
+# Bumped with every save so other processes notice their copy is out of date
+BUMP_USERS_VERSION_SQL = '''
+INSERT INTO outbox_state (key, value) VALUES ('users_version', 1)
+ON CONFLICT(key) DO UPDATE SET value = value + 1
+'''
+GET_USERS_VERSION_SQL = "SELECT value FROM outbox_state WHERE key = 'users_version'"
+
+class UserDirectory:
+    """In-memory copy of the users table keyed by Telegram user id
+
+    Loaded once at startup and updated by save_user, so the keyword check
+    for every incoming message is a dict lookup instead of a query. aget and
+    amatch also reload it when another process (e.g. another gunicorn worker)
+    saved users, which they check with one query every `check_interval`
+    seconds at most, whatever the number of messages.
+    """
+
+    def __init__(self, check_interval=USER_DIRECTORY_CHECK, clock=time.monotonic):
+        self.users = {}
+        self.loaded = False
+        self.lock = threading.Lock()
+        self.hits = self.misses = self.reloads = 0
+        self.check_interval = check_interval
+        self.clock = clock
+        self.version = None
+        self.checked = None
+
+    def load(self):
+        # Version first: a save landing in between is picked up by the next check
+        version = get_users_version()
+        rows = get_all_users()
+        with self.lock:
+            self.users = {row[0]: row for row in rows}
+            self.version = version
+            self.checked = self.clock()
+            self.loaded = True
+        return len(rows)
+
+    def reload_if_changed(self):
+        """Reload when users were saved since the last load; True if it did"""
+        self.checked = self.clock()
+        if get_users_version() == self.version:
+            return False
+        self.reloads += 1
+        self.load()
+        return True
+
+    async def sync(self):
+        """Run reload_if_changed if the last check is older than check_interval"""
+        if self.loaded and self.clock() - self.checked >= self.check_interval:
+            self.checked = self.clock()
+            await run_db(self.reload_if_changed)
+
+    def get(self, phone):
+        """Saved users row for a Telegram user id, or None"""
+        if not self.loaded:
+            self.load()
+        user = self.users.get(phone)
+        if user is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return user
+
+    def match(self, phone, text):
+        """Row for this user if text is their saved keyword, else None"""
+        user = self.get(phone)
+        return user if user and text.lower() == user[3] else None
+
+    async def aget(self, phone):
+        """get, after picking up users saved by other processes"""
+        await self.sync()
+        return self.get(phone)
+
+    async def amatch(self, phone, text):
+        """match, after picking up users saved by other processes"""
+        await self.sync()
+        return self.match(phone, text)
+
+    def update(self, row):
+        with self.lock:
+            self.users[row[0]] = row
+
+    def stats(self):
+        return {'users': len(self.users), 'hits': self.hits, 'misses': self.misses, 'reloads': self.reloads}
+
+user_directory = UserDirectory()
 
 def init_db():
     with get_db() as db:
@@ -19,24 +188,243 @@ def init_db():
             keyword TEXT NOT NULL
         )
         ''')
+        # phone is the primary key already; drop the redundant index older databases have
+        db.execute('DROP INDEX IF EXISTS idx_users_phone_keyword')
+        db.execute('''
+        CREATE TABLE IF NOT EXISTS snapshots (
+            username TEXT PRIMARY KEY,
+            export_hash TEXT NOT NULL,
+            report TEXT NOT NULL,
+            fetched_at REAL NOT NULL,
+            fingerprint TEXT
+        )
+        ''')
+        # Snapshots stored before fingerprints were kept are served to no one until refreshed
+        add_column(db, 'snapshots', 'fingerprint TEXT')
+        db.execute('''
+        CREATE TABLE IF NOT EXISTS snapshot_changes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL,
+            fetched_at REAL NOT NULL,
+            changes TEXT NOT NULL,
+            fingerprint TEXT
+        )
+        ''')
+        add_column(db, 'snapshot_changes', 'fingerprint TEXT')
+        db.execute('''
+        CREATE INDEX IF NOT EXISTS idx_snapshot_changes_username
+        ON snapshot_changes (username, fetched_at)
+        ''')
+        db.execute('''
+        CREATE TABLE IF NOT EXISTS outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            chat_id TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            text TEXT NOT NULL,
+            created REAL NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt REAL NOT NULL
+        )
+        ''')
+        db.execute('''
+        CREATE INDEX IF NOT EXISTS idx_outbox_next_attempt
+        ON outbox (next_attempt, id)
+        ''')
+        db.execute('''
+        CREATE TABLE IF NOT EXISTS outbox_state (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        )
+        ''')
+        db.execute('''
+        CREATE TABLE IF NOT EXISTS groups (
+            phone TEXT NOT NULL,
+            name TEXT NOT NULL,
+            members TEXT NOT NULL,
+            PRIMARY KEY (phone, name)
+        )
+        ''')
         db.commit()
 
+def add_column(db, table, column):
+    """Add a column to a table created by an older version, if it is missing"""
+    name = column.split()[0]
+    if name not in {row[1] for row in db.execute(f'PRAGMA table_info({table})')}:
+        db.execute(f'ALTER TABLE {table} ADD COLUMN {column}')
+
 def save_user(phone, username, password, keyword):
     """Save user credentials - keyword is stored lowercase"""
+    row = (phone, username, password, keyword.lower())
     with get_db() as db:
-        db.execute('''
-        INSERT OR REPLACE INTO users (phone, username, password, keyword)
-        VALUES (?, ?, ?, ?)
-        ''', (phone, username, password, keyword.lower()))
+        db.execute(SAVE_USER_SQL, row)
+        db.execute(BUMP_USERS_VERSION_SQL)
         db.commit()
+    user_directory.update(row)
+
+def get_users_version():
+    """Counter bumped by every save_user, or None before the first one"""
+    with get_db() as db:
+        row = db.execute(GET_USERS_VERSION_SQL).fetchone()
+        return row[0] if row else None
 
 def get_user(phone):
     with get_db() as db:
-        cursor = db.execute('SELECT * FROM users WHERE phone = ?', (phone,))
+        cursor = db.execute(GET_USER_SQL, (phone,))
         return cursor.fetchone()
 
 def get_user_by_keyword(phone, keyword):
     with get_db() as db:
-        cursor = db.execute('SELECT * FROM users WHERE phone = ? AND keyword = ?', 
-                          (phone, keyword))
-        return cursor.fetchone()
\ No newline at end of file
+        cursor = db.execute(GET_USER_BY_KEYWORD_SQL, (phone, keyword))
+        return cursor.fetchone()
+
+def get_all_users():
+    with get_db() as db:
+        cursor = db.execute(GET_ALL_USERS_SQL)
+        return cursor.fetchall()
+
+def get_snapshot(username):
+    """Latest stored snapshot: (username, export_hash, report_json, fetched_at, fingerprint)"""
+    with get_db() as db:
+        cursor = db.execute('''
+        SELECT username, export_hash, report, fetched_at, fingerprint FROM snapshots WHERE username = ?
+        ''', (username,))
+        return cursor.fetchone()
+
+def save_snapshot(username, fingerprint, export_hash, report_json, changes_json=None):
+    """Replace the latest snapshot and append its differences, if any
+
+    fingerprint is the password's (report_cache.password_fingerprint) the
+    export was fetched with; only callers with the same one are shown it.
+    """
+    fetched_at = time.time()
+    with get_db() as db:
+        db.execute('''
+        INSERT OR REPLACE INTO snapshots (username, export_hash, report, fetched_at, fingerprint)
+        VALUES (?, ?, ?, ?, ?)
+        ''', (username, export_hash, report_json, fetched_at, fingerprint))
+        if changes_json:
+            db.execute('''
+            INSERT INTO snapshot_changes (username, fetched_at, changes, fingerprint)
+            VALUES (?, ?, ?, ?)
+            ''', (username, fetched_at, changes_json, fingerprint))
+        db.commit()
+
+def get_snapshot_changes(username, fingerprint, limit=5):
+    """Most recent (fetched_at, changes_json) rows recorded under fingerprint, newest first"""
+    with get_db() as db:
+        cursor = db.execute('''
+        SELECT fetched_at, changes FROM snapshot_changes
+        WHERE username = ? AND fingerprint = ? ORDER BY fetched_at DESC LIMIT ?
+        ''', (username, fingerprint, limit))
+        return cursor.fetchall()
+
+def get_chats_for_username(username, password):
+    """Telegram user ids that saved this portal account with this password"""
+    with get_db() as db:
+        cursor = db.execute('SELECT phone FROM users WHERE username = ? AND password = ?', (username, password))
+        return [row[0] for row in cursor.fetchall()]
+
+def enqueue_messages(messages):
+    """Append (chat_id, kind, text) rows to the persistent outbox"""
+    now = time.time()
+    with get_db() as db:
+        db.executemany('''
+        INSERT INTO outbox (chat_id, kind, text, created, next_attempt)
+        VALUES (?, ?, ?, ?, ?)
+        ''', [(chat_id, kind, text, now, now) for chat_id, kind, text in messages])
+        db.commit()
+
+def claim_messages(lease, limit=100):
+    """Due outbox rows (id, chat_id, kind, text, attempts), hidden from other senders for lease seconds"""
+    now = time.time()
+    with get_db() as db:
+        rows = db.execute('''
+        UPDATE outbox SET next_attempt = ?
+        WHERE id IN (SELECT id FROM outbox WHERE next_attempt <= ? ORDER BY id LIMIT ?)
+        RETURNING id, chat_id, kind, text, attempts
+        ''', (now + lease, now, limit)).fetchall()
+        db.commit()
+    return sorted(rows)
+
+def delete_messages(ids):
+    with get_db() as db:
+        db.executemany('DELETE FROM outbox WHERE id = ?', [(id,) for id in ids])
+        db.commit()
+
+def defer_messages(ids, next_attempt, failed=False):
+    """Make rows due again at next_attempt, counting a failed attempt if failed"""
+    with get_db() as db:
+        db.executemany('UPDATE outbox SET next_attempt = ?, attempts = attempts + ? WHERE id = ?',
+                       [(next_attempt, int(failed), id) for id in ids])
+        db.commit()
+
+def count_messages():
+    with get_db() as db:
+        return db.execute('SELECT COUNT(*) FROM outbox').fetchone()[0]
+
+def claim_state(key, value):
+    """Set a state key to value; True only for the caller that changed it"""
+    with get_db() as db:
+        cursor = db.execute('''
+        INSERT INTO outbox_state (key, value) VALUES (?, ?)
+        ON CONFLICT(key) DO UPDATE SET value = excluded.value WHERE value != excluded.value
+        ''', (key, value))
+        db.commit()
+        return cursor.rowcount == 1
+
+def claim_lease(key, owner, lease):
+    """Take or renew a state key for lease seconds; True if owner holds it now
+
+    The value is "expires:owner", so an owner that stops renewing (e.g. an
+    exited process) loses the key once its lease runs out.
+    """
+    now = time.time()
+    with get_db() as db:
+        cursor = db.execute('''
+        INSERT INTO outbox_state (key, value) VALUES (?, ?)
+        ON CONFLICT(key) DO UPDATE SET value = excluded.value
+        WHERE substr(value, instr(value, ':') + 1) = ?
+           OR CAST(substr(value, 1, instr(value, ':') - 1) AS REAL) < ?
+        ''', (key, f"{now + lease}:{owner}", owner, now))
+        db.commit()
+        return cursor.rowcount == 1
+
+def save_group(phone, name, members):
+    """Store a named list of (username, password) pairs for bulk checks - name is lowercase"""
+    with get_db() as db:
+        db.execute('INSERT OR REPLACE INTO groups (phone, name, members) VALUES (?, ?, ?)',
+                   (phone, name.lower(), json.dumps([list(member) for member in members])))
+        db.commit()
+
+def get_group(phone, name):
+    """[(username, password), ...] of a saved group, or None"""
+    with get_db() as db:
+        row = db.execute('SELECT members FROM groups WHERE phone = ? AND name = ?',
+                         (phone, name.lower())).fetchone()
+    return [tuple(member) for member in json.loads(row[0])] if row else None
+
+# Async API: database work runs on a dedicated thread pool so handlers never
+# block the event loop on disk I/O
+db_executor = ThreadPoolExecutor(max_workers=DB_POOL_SIZE, thread_name_prefix='db')
+
+def run_db(func, *args):
+    """Run a blocking database call on the database thread pool (awaitable)"""
+    return asyncio.get_running_loop().run_in_executor(db_executor, func, *args)
+
+async def asave_user(phone, username, password, keyword):
+    return await run_db(save_user, phone, username, password, keyword)
+
+async def aget_user(phone):
+    return await run_db(get_user, phone)
+
+async def aget_user_by_keyword(phone, keyword):
+    return await run_db(get_user_by_keyword, phone, keyword)
+
+async def aget_all_users():
+    return await run_db(get_all_users)
+
+async def asave_group(phone, name, members):
+    return await run_db(save_group, phone, name, members)
+
+async def aget_group(phone, name):
+    return await run_db(get_group, phone, name)
\ No newline at end of file
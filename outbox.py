@@ -0,0 +1,234 @@
+"""Proactive messages: persistent outbox drained under Telegram's flood limits"""
+import asyncio
+import json
+import logging
+import time
+
+from config import (NOTIFY_CHANGES, DIGEST_TIME, PROJECTION_THRESHOLDS, OUTBOX_GLOBAL_RATE,
+                    OUTBOX_CHAT_RATE, OUTBOX_CHAT_BURST, OUTBOX_POLL, OUTBOX_MAX_ATTEMPTS)
+from model import (run_db, get_all_users, get_snapshot, get_chats_for_username, enqueue_messages,
+                   claim_messages, delete_messages, defer_messages, count_messages, claim_state)
+from report import AttendanceReport
+from report_cache import password_fingerprint
+from bulk import split_message
+
+# Seconds claimed rows stay hidden from other senders (e.g. other gunicorn workers)
+CLAIM_LEASE = 120
+
+class TokenBucket:
+    """rate tokens per second, holding at most capacity"""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now=None):
+        """Seconds until a token is available (0 if one is available now)"""
+        self._refill(now if now is not None else time.monotonic())
+        return 0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now=None):
+        self._refill(now if now is not None else time.monotonic())
+        self.tokens -= 1
+
+def format_change_notice(changes):
+    """Plain-text notice for one refresh's differences"""
+    lines = ["📢 Attendance update"]
+    for change in changes:
+        marks = []
+        if change['new_absent'] > 0:
+            marks.append(f"marked absent {change['new_absent']}x")
+        if change['new_present'] > 0:
+            marks.append(f"marked present {change['new_present']}x")
+        if not marks:
+            marks.append("corrected")
+        lines.append(f"• {change['subject']}: {', '.join(marks)} ({change['present']}/{change['total']})")
+    return '\n'.join(lines)
+
+def digest_thresholds(threshold=75):
+    return tuple(sorted(set(PROJECTION_THRESHOLDS) | {threshold}))
+
+def format_digest(report, projection=None, threshold=75):
+    """Plain-text daily digest for one report and its projection (computed if not given)"""
+    from projection import project_report
+    
+    projection = projection or project_report(report, digest_thresholds(threshold))
+    lines = [
+        "☀️ Daily attendance digest",
+        f"Total: {report.total_present}/{report.total_classes} ({report.overall_percentage:.2f}%)",
+    ]
+    for t, (skip, need) in sorted(projection['overall'].items()):
+        lines.append(f"{t}%: attend {need} to recover" if need else f"{t}%: can skip {skip}")
+    low = [(s, projection['subjects'][s.name][threshold][1]) for s in report.subjects if s.total]
+    low = [(s, need) for s, need in low if need]
+    if low:
+        lines.append(f"Below {threshold}%: " + ', '.join(f"{s.name} ({s.percentage}%, attend {need})"
+                                                         for s, need in low))
+    return '\n'.join(lines)
+
+def notify_changes(username, password, changes):
+    """Queue a change notice for every chat that saved this portal account and password"""
+    if not NOTIFY_CHANGES or not changes:
+        return 0
+    chats = get_chats_for_username(username, password)
+    if chats:
+        text = format_change_notice(changes)
+        enqueue_messages([(chat_id, 'change', text) for chat_id in chats])
+    return len(chats)
+
+def enqueue_digests():
+    """Queue today's digest for every saved user with a snapshot fetched with their password"""
+    from projection import project_reports
+    
+    owners, reports = [], []
+    for phone, username, password, _ in get_all_users():
+        snapshot = get_snapshot(username)
+        if snapshot and snapshot[4] == password_fingerprint(password):
+            owners.append(phone)
+            reports.append(AttendanceReport.from_dict(json.loads(snapshot[2])))
+    # One vectorised projection for every saved user's report
+    projections = project_reports(reports, digest_thresholds())
+    messages = [(phone, 'digest', format_digest(report, projection))
+                for phone, report, projection in zip(owners, reports, projections)]
+    enqueue_messages(messages)
+    return len(messages)
+
+class Outbox:
+    """Drains the outbox table through bot.send_message
+
+    Everything pending for one chat is coalesced into a single message.
+    Sends respect a global and a per-chat token bucket; RetryAfter pauses
+    all sending for the requested time, other failures back off per row
+    and are dropped after OUTBOX_MAX_ATTEMPTS.
+    """
+
+    def __init__(self, bot, global_rate=OUTBOX_GLOBAL_RATE, chat_rate=OUTBOX_CHAT_RATE,
+                 chat_burst=OUTBOX_CHAT_BURST, poll=OUTBOX_POLL, digest_time=DIGEST_TIME):
+        self.bot = bot
+        self.global_bucket = TokenBucket(global_rate, max(1, int(global_rate)))
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.chat_buckets = {}
+        self.poll = poll
+        self.digest_time = digest_time
+        self.paused_until = 0
+        self.task = None
+        self.counters = {'sent': 0, 'coalesced': 0, 'retry_after': 0, 'failed': 0, 'dropped': 0}
+
+    def start(self):
+        """Schedule the sender loop on the running event loop"""
+        if self.task is None:
+            self.task = asyncio.get_running_loop().create_task(self.run_forever())
+        return self.task
+
+    def stop(self):
+        """Cancel the sender loop (start() schedules it again)"""
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    async def run_forever(self):
+        while True:
+            try:
+                await self.maybe_enqueue_digests()
+                sent = await self.send_due()
+            except Exception as e:
+                logging.error(f"Outbox run failed: {str(e)}")
+                sent = 0
+            if not sent:
+                await asyncio.sleep(self.poll)
+
+    async def maybe_enqueue_digests(self, now=None):
+        """Queue the daily digest once per day, after DIGEST_TIME (shared across processes)"""
+        if not self.digest_time:
+            return 0
+        now = time.localtime(now)
+        hours, minutes = (int(part) for part in self.digest_time.split(':'))
+        if (now.tm_hour, now.tm_min) < (hours, minutes):
+            return 0
+        if not await run_db(claim_state, 'digest_date', time.strftime('%Y-%m-%d', now)):
+            return 0
+        count = await run_db(enqueue_digests)
+        logging.info(f"Queued {count} daily digests")
+        return count
+
+    def _chat_bucket(self, chat_id):
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            if len(self.chat_buckets) > 10000:
+                self.chat_buckets = {c: b for c, b in self.chat_buckets.items() if b.delay() > 0}
+            bucket = self.chat_buckets[chat_id] = TokenBucket(self.chat_rate, self.chat_burst)
+        return bucket
+
+    async def send_due(self):
+        """Send one batch of due messages; returns how many Telegram messages went out"""
+        if time.monotonic() < self.paused_until:
+            await asyncio.sleep(self.paused_until - time.monotonic())
+        rows = await run_db(claim_messages, CLAIM_LEASE)
+        chats = {}
+        for row_id, chat_id, kind, text, attempts in rows:
+            chats.setdefault(chat_id, []).append((row_id, kind, text, attempts))
+
+        sent = 0
+        for chat_id, items in chats.items():
+            ids = [item[0] for item in items]
+            if time.monotonic() < self.paused_until:
+                await run_db(defer_messages, ids, time.time() + self.paused_until - time.monotonic())
+                continue
+            # Chats over their own limit wait for a later batch instead of stalling this one
+            bucket = self._chat_bucket(chat_id)
+            wait = bucket.delay()
+            if wait > 0:
+                await run_db(defer_messages, ids, time.time() + wait)
+                continue
+            chunks = split_message('\n\n'.join(item[2] for item in items))
+            try:
+                for chunk in chunks:
+                    await asyncio.sleep(max(self.global_bucket.delay(), bucket.delay()))
+                    self.global_bucket.take()
+                    bucket.take()
+                    await self.bot.send_message(chat_id=chat_id, text=chunk)
+                    sent += 1
+            except Exception as e:
+                await self._handle_failure(chat_id, items, e)
+                continue
+            self.counters['sent'] += len(chunks)
+            self.counters['coalesced'] += len(items) - 1
+            await run_db(delete_messages, ids)
+        return sent
+
+    async def _handle_failure(self, chat_id, items, error):
+        from telegram.error import RetryAfter, Forbidden, BadRequest
+
+        ids = [item[0] for item in items]
+        if isinstance(error, RetryAfter):
+            retry_after = error.retry_after
+            if hasattr(retry_after, 'total_seconds'):
+                retry_after = retry_after.total_seconds()
+            self.counters['retry_after'] += 1
+            self.paused_until = time.monotonic() + retry_after
+            logging.warning(f"Flood limit hit, pausing outbox for {retry_after:.0f}s")
+            await run_db(defer_messages, ids, time.time() + retry_after)
+        elif isinstance(error, (Forbidden, BadRequest)):
+            # Blocked the bot, deleted the chat, ...: retrying will not help
+            self.counters['dropped'] += len(ids)
+            logging.warning(f"Dropping {len(ids)} messages for chat {chat_id}: {str(error)}")
+            await run_db(delete_messages, ids)
+        else:
+            attempts = max(item[3] for item in items) + 1
+            self.counters['failed'] += 1
+            if attempts >= OUTBOX_MAX_ATTEMPTS:
+                self.counters['dropped'] += len(ids)
+                logging.error(f"Giving up on {len(ids)} messages for chat {chat_id}: {str(error)}")
+                await run_db(delete_messages, ids)
+            else:
+                await run_db(defer_messages, ids, time.time() + min(600, 5 * 2 ** attempts), True)
+
+    def stats(self):
+        return {'pending': count_messages(), 'chats': len(self.chat_buckets), **self.counters}
@@ -0,0 +1,161 @@
+import base64
+import logging
+import re
+import threading
+from urllib.parse import urljoin
+
+import requests
+from bs4 import BeautifulSoup, SoupStrainer
+from cryptography.hazmat.primitives import padding
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+from config import LOGIN_URL, ACADEMIC_URL, ECAP_AES_KEY, HTTP_TIMEOUT
+from session_cache import session_cache
+from metrics import STAGE_SECONDS, LOGIN_ATTEMPTS
+from progress import publish
+from adaptive_limit import scrape_limit
+
+# Regex for the key literal inside the portal's encryptJSText()
+AES_KEY_PATTERN = re.compile(r"CryptoJS\.enc\.Utf8\.parse\(\s*['\"]([^'\"]{16,32})['\"]\s*\)")
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 '
+                  '(KHTML, like Gecko) Chrome/120.0 Safari/537.36',
+}
+
+_local = threading.local()
+
+class PortalMarkupChanged(Exception):
+    """Raised when the portal pages no longer look like what this engine expects"""
+
+def get_session():
+    """Return a pooled requests session for the current worker thread"""
+    session = getattr(_local, 'session', None)
+    if session is None:
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=4)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers.update(HEADERS)
+        _local.session = session
+    return session
+
+def encrypt_password(password, key=ECAP_AES_KEY):
+    """Python equivalent of the portal's encryptJSText(): AES-CBC, PKCS7, key used as IV"""
+    key_bytes = key.encode('utf-8')
+    padder = padding.PKCS7(128).padder()
+    data = padder.update(password.encode('utf-8')) + padder.finalize()
+    encryptor = Cipher(algorithms.AES(key_bytes), modes.CBC(key_bytes)).encryptor()
+    return base64.b64encode(encryptor.update(data) + encryptor.finalize()).decode('ascii')
+
+def extract_form(page_html, submit_name=None, submit_value=None):
+    """Collect form fields (ASP.NET state included) the way a browser would submit them"""
+    soup = BeautifulSoup(page_html, 'lxml', parse_only=SoupStrainer(['form', 'input', 'select', 'textarea']))
+    form = soup.find('form')
+    if form is None:
+        raise PortalMarkupChanged("No form found on page")
+
+    fields = {}
+    for field in form.find_all(['input', 'select', 'textarea']):
+        name = field.get('name')
+        if not name:
+            continue
+        kind = (field.get('type') or '').lower()
+        if kind in ('submit', 'image', 'button', 'reset', 'file'):
+            continue
+        if kind in ('checkbox', 'radio') and not field.has_attr('checked'):
+            continue
+        if field.name == 'select':
+            option = field.find('option', selected=True) or field.find('option')
+            fields[name] = option.get('value', option.text) if option else ''
+        elif field.name == 'textarea':
+            fields[name] = field.text
+        else:
+            fields[name] = field.get('value', '')
+
+    if submit_value is not None:
+        button = form.find('input', attrs={'value': submit_value, 'type': 'submit'})
+        if button is None or not button.get('name'):
+            raise PortalMarkupChanged(f"Submit button '{submit_value}' not found")
+        fields[button['name']] = submit_value
+    elif submit_name is not None:
+        if form.find('input', attrs={'name': submit_name}) is None:
+            raise PortalMarkupChanged(f"Submit button '{submit_name}' not found")
+        # Image buttons post the click coordinates
+        fields[f'{submit_name}.x'] = '10'
+        fields[f'{submit_name}.y'] = '10'
+
+    return form.get('action') or '', fields
+
+@scrape_limit.measure
+@STAGE_SECONDS.timed(stage='http_login')
+def login(session, username, password):
+    """POST the login form on Default.aspx; returns (success, message)"""
+    response = session.get(LOGIN_URL, timeout=HTTP_TIMEOUT)
+    response.raise_for_status()
+    page = response.text
+
+    action, fields = extract_form(page, submit_name='imgBtn2')
+    if 'txtId2' not in fields or 'txtPwd2' not in fields:
+        raise PortalMarkupChanged("Login fields txtId2/txtPwd2 not found")
+
+    # Mirror encryptJSText(2) / setValue(2): encrypted copy goes to the hidden field
+    hidden = next((name for name in fields if name.lower().startswith('hdnpwd') and name.endswith('2')), None)
+    if hidden is None:
+        raise PortalMarkupChanged("Hidden password field not found")
+    match = AES_KEY_PATTERN.search(page)
+    fields['txtId2'] = username
+    fields[hidden] = encrypt_password(password, match.group(1) if match else ECAP_AES_KEY)
+    fields['txtPwd2'] = ''
+
+    response = session.post(urljoin(response.url, action), data=fields, timeout=HTTP_TIMEOUT)
+    response.raise_for_status()
+    if 'divscreens' not in response.text:
+        return False, "Login failed - invalid credentials"
+    return True, "Login successful"
+
+@scrape_limit.measure
+@STAGE_SECONDS.timed(stage='http_export')
+def fetch_export(session):
+    """Submit the Export button on the academic register page and return the export HTML"""
+    response = session.get(ACADEMIC_URL, timeout=HTTP_TIMEOUT)
+    response.raise_for_status()
+    if 'txtId2' in response.text:
+        return None, "Session expired - redirected to login"
+
+    action, fields = extract_form(response.text, submit_value='Export')
+    export = session.post(urljoin(response.url, action), data=fields, timeout=HTTP_TIMEOUT)
+    export.raise_for_status()
+    if 'reportData2' not in export.text:
+        raise PortalMarkupChanged("Export response is not an attendance register")
+    return export.text, "Data exported successfully"
+
+def get_attendance_html(username, password):
+    """Log in and download the attendance export over plain HTTP"""
+    session = get_session()
+    session.cookies.clear()
+    
+    # Skip the login round trips while the user's portal session is alive
+    cookies = session_cache.get(username, password)
+    if cookies:
+        for cookie in cookies:
+            session.cookies.set(cookie['name'], cookie['value'],
+                                domain=cookie.get('domain', ''), path=cookie.get('path', '/'))
+        content, message = fetch_export(session)
+        if content:
+            logging.info(f"Reused portal session for user {username}")
+            return content, message
+        session_cache.invalidate(username)
+        session.cookies.clear()
+    
+    success, message = login(session, username, password)
+    LOGIN_ATTEMPTS.inc(engine='http', result='ok' if success else 'failed')
+    if not success:
+        return None, message
+    logging.info(f"HTTP login successful for user {username}")
+    publish(username, password, 'login')
+    session_cache.put(username, password, [
+        {'name': c.name, 'value': c.value, 'domain': c.domain, 'path': c.path}
+        for c in session.cookies
+    ])
+    return fetch_export(session)
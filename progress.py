@@ -0,0 +1,109 @@
+"""Scrape progress: stage events from scraper threads, throttled status message edits"""
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+
+from config import PROGRESS_EDIT_INTERVAL
+
+# Stages in the order a scrape reaches them
+STAGES = ('browser', 'login', 'export')
+
+_subscribers = {}
+_lock = threading.Lock()
+
+def progress_key(username, password):
+    """Events are keyed by account and password so only callers with the password see them"""
+    return hashlib.sha256(f"{username}\0{password}".encode('utf-8')).hexdigest()
+
+def subscribe(username, password, callback):
+    """Deliver publish() events for this account to `await callback(stage)`
+
+    Must be called on the event loop the callback should run on. Returns a
+    function that removes the subscription.
+    """
+    key = progress_key(username, password)
+    entry = (asyncio.get_running_loop(), callback)
+    with _lock:
+        _subscribers.setdefault(key, []).append(entry)
+
+    def unsubscribe():
+        with _lock:
+            entries = _subscribers.get(key, [])
+            if entry in entries:
+                entries.remove(entry)
+            if not entries:
+                _subscribers.pop(key, None)
+    return unsubscribe
+
+def publish(username, password, stage):
+    """Report that a scrape reached a stage (safe to call from any thread)"""
+    with _lock:
+        entries = list(_subscribers.get(progress_key(username, password), ()))
+    for loop, callback in entries:
+        loop.call_soon_threadsafe(_deliver, callback, stage)
+
+def _deliver(callback, stage):
+    task = asyncio.ensure_future(callback(stage))
+    task.add_done_callback(_log_failure)
+
+def _log_failure(task):
+    if not task.cancelled() and task.exception():
+        logging.warning(f"Progress update failed: {str(task.exception())}")
+
+class StatusMessage:
+    """Edits one Telegram message, skipping unchanged text and throttling progress edits
+
+    Throttled text is not dropped: the latest one is shown once the interval
+    has passed, unless a newer or final text replaced it first.
+    """
+
+    def __init__(self, message, interval=PROGRESS_EDIT_INTERVAL):
+        self.message = message
+        self.interval = interval
+        self.shown = (message.text, None)
+        self.last_edit = time.monotonic()
+        self.pending = None
+        self.timer = None
+        self.final = False
+        self.lock = asyncio.Lock()
+        self.edits = self.skipped = 0
+
+    async def show(self, text, parse_mode='MarkdownV2'):
+        """Show progress text (throttled); ignored once the final text is shown"""
+        if self.final:
+            return
+        self.pending = (text, parse_mode)
+        wait = self.interval - (time.monotonic() - self.last_edit)
+        if wait <= 0:
+            await self._flush()
+        elif self.timer is None:
+            self.timer = asyncio.get_running_loop().call_later(wait, self._flush_later)
+
+    async def finish(self, text, parse_mode='MarkdownV2'):
+        """Show the final text now, dropping any throttled progress"""
+        self.final = True
+        self.pending = (text, parse_mode)
+        await self._flush()
+
+    def _flush_later(self):
+        self.timer = None
+        task = asyncio.ensure_future(self._flush())
+        task.add_done_callback(_log_failure)
+
+    async def _flush(self):
+        async with self.lock:
+            if self.timer is not None and self.final:
+                self.timer.cancel()
+                self.timer = None
+            if self.pending is None:
+                return
+            content, self.pending = self.pending, None
+            if content[0] == self.shown[0]:
+                self.skipped += 1
+                return
+            await self.message.edit_text(content[0], parse_mode=content[1])
+            self.shown = content
+            self.last_edit = time.monotonic()
+            self.edits += 1
@@ -0,0 +1,106 @@
+"""Closed-form attendance projections, vectorised with numpy
+
+For a threshold p (percent) and counts present/total:
+
+    skippable = max k >= 0 with 100 * present >= p * (total + k)
+              = floor((100 * present - p * total) / p)
+    needed    = min n >= 0 with 100 * (present + n) >= p * (total + n)
+              = ceil((p * total - 100 * present) / (100 - p))
+
+All arithmetic is integer, so results are exact at the boundary.
+"""
+import numpy as np
+
+from config import PROJECTION_THRESHOLDS
+
+def skippable(present, total, threshold=75):
+    """Classes that can be missed while staying at or above threshold percent"""
+    present = np.asarray(present, dtype=np.int64)
+    total = np.asarray(total, dtype=np.int64)
+    slack = 100 * present - threshold * total
+    return np.where(slack > 0, slack // threshold, 0)
+
+def needed(present, total, threshold=75):
+    """Consecutive classes to attend to get back to threshold percent"""
+    present = np.asarray(present, dtype=np.int64)
+    total = np.asarray(total, dtype=np.int64)
+    deficit = threshold * total - 100 * present
+    if threshold >= 100:
+        return np.where(deficit > 0, -1, 0)  # unreachable once a class is missed
+    return np.where(deficit > 0, -(-deficit // (100 - threshold)), 0)
+
+def percentage(present, total):
+    present = np.asarray(present, dtype=np.float64)
+    total = np.asarray(total, dtype=np.float64)
+    return np.divide(present * 100, total, out=np.zeros_like(total), where=total > 0)
+
+def project(present, total, thresholds=PROJECTION_THRESHOLDS):
+    """Skippable/needed counts for every (present, total) pair at every threshold
+
+    Returns {threshold: {'skippable': array, 'needed': array}} with one entry
+    per input pair, so a whole user base can be projected in one call.
+    """
+    present = np.asarray(present, dtype=np.int64)
+    total = np.asarray(total, dtype=np.int64)
+    return {t: {'skippable': skippable(present, total, t), 'needed': needed(present, total, t)}
+            for t in thresholds}
+
+def project_report(report, thresholds=PROJECTION_THRESHOLDS):
+    """Overall and per-subject projections for one AttendanceReport"""
+    return project_reports([report], thresholds)[0]
+
+def project_reports(reports, thresholds=PROJECTION_THRESHOLDS):
+    """Project many reports at once: one vectorised pass over all their rows
+
+    Each result is {'overall': {t: (skippable, needed)},
+                    'subjects': {name: {t: (skippable, needed)}}}.
+    """
+    present, total, owners = [], [], []
+    for index, report in enumerate(reports):
+        present.append(report.total_present)
+        total.append(report.total_classes)
+        owners.append((index, None))
+        for subject in report.subjects:
+            present.append(subject.present)
+            total.append(subject.total)
+            owners.append((index, subject.name))
+
+    projected = project(present, total, thresholds)
+    results = [{'overall': {}, 'subjects': {}} for _ in reports]
+    for row, (index, name) in enumerate(owners):
+        values = {t: (int(projected[t]['skippable'][row]), int(projected[t]['needed'][row]))
+                  for t in thresholds}
+        if name is None:
+            results[index]['overall'] = values
+        else:
+            results[index]['subjects'][name] = values
+    return results
+
+def what_if(report, miss=0, attend=0, subject=None):
+    """Attendance after missing/attending the next classes of one subject (or overall)
+
+    Returns {'subject': (name, present, total, pct) or None,
+             'overall': (present, total, pct)}.
+    """
+    row = None
+    if subject is not None:
+        row = find_subject(report, subject)
+        if row is None:
+            raise ValueError(f"Unknown subject: {subject}")
+
+    overall = (report.total_present + attend, report.total_classes + attend + miss)
+    result = {'subject': None, 'overall': (*overall, float(percentage(*overall)))}
+    if row is not None:
+        counts = (row.present + attend, row.total + attend + miss)
+        result['subject'] = (row.name, *counts, float(percentage(*counts)))
+    return result
+
+def find_subject(report, query):
+    """Case-insensitive match on subject name: exact first, then prefix, then substring"""
+    query = query.strip().lower()
+    subjects = report.subjects
+    for match in (lambda name: name == query, lambda name: name.startswith(query), lambda name: query in name):
+        found = [s for s in subjects if match(s.name.lower())]
+        if found:
+            return found[0]
+    return None
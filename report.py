@@ -0,0 +1,128 @@
+import html
+from dataclasses import dataclass, asdict
+from functools import lru_cache
+
+# Characters that must be escaped in Telegram MarkdownV2 text
+MARKDOWN_ESCAPE_TABLE = str.maketrans({
+    '_': '\\_', '*': '\\*', '[': '\\[', ']': '\\]',
+    '(': '\\(', ')': '\\)', '~': '\\~', '`': '\\`',
+    '>': '\\>', '#': '\\#', '+': '\\+', '-': '\\-',
+    '=': '\\=', '|': '\\|', '{': '\\{', '}': '\\}',
+    '.': '\\.', '!': '\\!', '\\': '\\\\'
+})
+
+def escape_markdown(text):
+    return text.translate(MARKDOWN_ESCAPE_TABLE)
+
+@dataclass(slots=True, frozen=True)
+class SubjectAttendance:
+    """One subject row of the academic register"""
+    name: str
+    present: int
+    total: int
+    percentage: str  # as printed by the portal, e.g. "83.33" (".00" before any attendance)
+
+    @property
+    def shown(self):
+        return self.percentage != ".00"
+
+@dataclass(slots=True, frozen=True)
+class TodayMark:
+    """Today's P/A mark for a subject"""
+    subject: str
+    status: str
+
+@dataclass(slots=True, frozen=True)
+class AttendanceReport:
+    """Parsed attendance for one student"""
+    student_id: str
+    total_present: int
+    total_classes: int
+    skippable_hours: int
+    today: tuple = ()
+    subjects: tuple = ()
+
+    @property
+    def overall_percentage(self):
+        return (self.total_present / self.total_classes * 100) if self.total_classes > 0 else 0
+
+    def to_dict(self):
+        data = asdict(self)
+        data['today'] = list(data['today'])
+        data['subjects'] = list(data['subjects'])
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            student_id=data['student_id'],
+            total_present=data['total_present'],
+            total_classes=data['total_classes'],
+            skippable_hours=data['skippable_hours'],
+            today=tuple(TodayMark(**mark) for mark in data['today']),
+            subjects=tuple(SubjectAttendance(**subject) for subject in data['subjects']),
+        )
+
+@lru_cache(maxsize=256)
+def _render(report, fmt):
+    # Reports are frozen and hash by content, so equal data shares one entry
+    return RENDERERS[fmt](report)
+
+def render(report, fmt='markdown'):
+    """Render a report as 'markdown' (Telegram MarkdownV2), 'html' or 'text'"""
+    return _render(report, fmt)
+
+def _markdown(report):
+    sections = [
+        f"*{escape_markdown(report.student_id)}*",
+        f"*{escape_markdown(f'Total: {report.total_present}/{report.total_classes} ({report.overall_percentage:.2f}%)')}*",
+    ]
+    if report.today:
+        lines = [escape_markdown("Today's Attendance:")]
+        lines.extend(f"• {escape_markdown(mark.subject)}: {mark.status}" for mark in report.today)
+        sections.append('\n'.join(lines))
+    sections.append(f"*{escape_markdown(f'You can skip {report.skippable_hours} hours and still maintain above 75%.')}*")
+    lines = [escape_markdown("Subject-wise Attendance:")]
+    lines.extend(
+        f"{escape_markdown(f'{subject.name:<20}')} *{subject.present}/{subject.total}* "
+        f"{escape_markdown(subject.percentage + '%')}"
+        for subject in report.subjects if subject.shown
+    )
+    sections.append('\n'.join(lines))
+    return '\n\n'.join(sections)
+
+def _html(report):
+    sections = [
+        f"<b>{html.escape(report.student_id)}</b>",
+        f"<b>Total: {report.total_present}/{report.total_classes} ({report.overall_percentage:.2f}%)</b>",
+    ]
+    if report.today:
+        lines = ["Today's Attendance:"]
+        lines.extend(f"• {html.escape(mark.subject)}: {mark.status}" for mark in report.today)
+        sections.append('\n'.join(lines))
+    sections.append(f"<b>You can skip {report.skippable_hours} hours and still maintain above 75%.</b>")
+    lines = ["Subject-wise Attendance:"]
+    lines.extend(
+        f"{html.escape(subject.name)} <b>{subject.present}/{subject.total}</b> {html.escape(subject.percentage)}%"
+        for subject in report.subjects if subject.shown
+    )
+    sections.append('\n'.join(lines))
+    return '\n\n'.join(sections)
+
+def _text(report):
+    output = []
+    output.append(f"Hi {report.student_id}")
+    output.append(f"Total: {report.total_present}/{report.total_classes} ({report.overall_percentage:.2f}%)\n")
+
+    if report.today:
+        output.append("Today's Attendance:")
+        output.extend(f"{mark.subject}: {mark.status}" for mark in report.today)
+        output.append("")
+
+    output.append(f"You can skip {report.skippable_hours} hours and still maintain above 75%.\n")
+    output.append("Subject-wise Attendance:")
+    output.extend(f"{subject.name:.<8} {f'{subject.present}/{subject.total}':<7} {subject.percentage}%"
+                  for subject in report.subjects if subject.shown)
+    return "\n".join(output)
+
+RENDERERS = {'markdown': _markdown, 'html': _html, 'text': _text}
@@ -0,0 +1,117 @@
+import asyncio
+import hashlib
+import logging
+import time
+
+from config import REPORT_CACHE_TTL, REPORT_STALE_TTL
+
+def is_error_report(report):
+    """Scraper failures come back as text (starting with ❌) instead of a report"""
+    return isinstance(report, str)
+
+def password_fingerprint(password):
+    """Stored in place of a password to tell whether a caller may see a report"""
+    return hashlib.sha256(password.encode('utf-8')).hexdigest()
+
+class ReportCache:
+    """Per-user report cache with stale-while-revalidate and single-flight fetches
+
+    Entries are keyed by portal username and only served to callers with the
+    same password. A fresh entry is returned as is; a stale one is returned
+    immediately while one background refresh runs; concurrent misses for the
+    same account share a single scrape.
+    """
+
+    def __init__(self, ttl=REPORT_CACHE_TTL, stale_ttl=REPORT_STALE_TTL):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.entries = {}
+        self.inflight = {}
+        self.counters = {'fresh': 0, 'stale': 0, 'miss': 0, 'joined': 0}
+
+    async def get(self, username, password, fetch, stale_ttl=None):
+        """Return (report, age_seconds); fetch() is an awaitable scrape factory
+
+        Errors are returned as the scraper's message text.
+        """
+        stale_ttl = self.stale_ttl if stale_ttl is None else stale_ttl
+        fingerprint = password_fingerprint(password)
+        entry = self.entries.get(username)
+        if entry and entry['fingerprint'] == fingerprint:
+            age = time.time() - entry['fetched_at']
+            if age < self.ttl:
+                self.counters['fresh'] += 1
+                return entry['report'], age
+            if age < stale_ttl:
+                self.counters['stale'] += 1
+                self._refresh(username, fingerprint, fetch)
+                return entry['report'], age
+
+        self.counters['miss'] += 1
+        result = await asyncio.shield(self._refresh(username, fingerprint, fetch))
+        return (result if is_error_report(result) else result['report']), 0.0
+
+    async def refresh(self, username, password, fetch):
+        """Scrape now (joining any in-flight scrape) and return the report or error"""
+        result = await asyncio.shield(self._refresh(username, password_fingerprint(password), fetch))
+        return result if is_error_report(result) else result['report']
+
+    def last_known(self, username, password):
+        """(report, age_seconds) of the cached report however old it is, or None"""
+        entry = self.entries.get(username)
+        if entry is None or entry['fingerprint'] != password_fingerprint(password):
+            return None
+        return entry['report'], time.time() - entry['fetched_at']
+
+    def age(self, username):
+        """Seconds since the cached report for username was fetched, or None"""
+        entry = self.entries.get(username)
+        return time.time() - entry['fetched_at'] if entry else None
+
+    def put(self, username, password, report, fetched_at=None):
+        """Store a successful report; error reports are never cached"""
+        if is_error_report(report):
+            return None
+        return self._store(username, password_fingerprint(password), report, fetched_at)['report']
+
+    def invalidate(self, username):
+        self.entries.pop(username, None)
+
+    def stats(self):
+        return {'entries': len(self.entries), 'inflight': len(self.inflight), **self.counters}
+
+    def _refresh(self, username, fingerprint, fetch):
+        """Start (or join) the single in-flight scrape for this account"""
+        key = (username, fingerprint)
+        task = self.inflight.get(key)
+        if task is not None:
+            self.counters['joined'] += 1
+            return task
+
+        async def run():
+            try:
+                report = await fetch()
+                if is_error_report(report):
+                    return report
+                return self._store(username, fingerprint, report)
+            finally:
+                self.inflight.pop(key, None)
+
+        task = asyncio.ensure_future(run())
+        task.add_done_callback(self._log_failure)
+        self.inflight[key] = task
+        return task
+
+    def _store(self, username, fingerprint, report, fetched_at=None):
+        entry = {
+            'fingerprint': fingerprint,
+            'report': report,
+            'fetched_at': fetched_at or time.time(),
+        }
+        self.entries[username] = entry
+        return entry
+
+    @staticmethod
+    def _log_failure(task):
+        if not task.cancelled() and task.exception():
+            logging.error(f"Report refresh failed: {str(task.exception())}")
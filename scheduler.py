@@ -0,0 +1,112 @@
+import asyncio
+import logging
+import random
+import time
+
+from config import (REFRESH_WINDOWS, REFRESH_CONCURRENCY, REFRESH_RATE_PER_MIN,
+                    REFRESH_JITTER, REFRESH_INTERVAL)
+from model import aget_all_users
+from report_cache import is_error_report
+
+def _minutes(hhmm):
+    hours, minutes = hhmm.strip().split(':')
+    return int(hours) * 60 + int(minutes)
+
+def parse_windows(spec):
+    """Parse "HH:MM-HH:MM,..." into (start_minute, end_minute) pairs"""
+    windows = []
+    for part in filter(None, (p.strip() for p in spec.split(','))):
+        start, end = part.split('-')
+        windows.append((_minutes(start), _minutes(end)))
+    return windows
+
+def in_window(windows, now=None):
+    """True if the local time falls inside any window (windows may wrap midnight)"""
+    now = time.localtime(now)
+    minute = now.tm_hour * 60 + now.tm_min
+    for start, end in windows:
+        if start <= end and start <= minute < end:
+            return True
+        if start > end and (minute >= start or minute < end):
+            return True
+    return False
+
+class RefreshScheduler:
+    """Pre-fetches reports for every saved account during off-peak windows"""
+
+    def __init__(self, report_cache, fetch, windows=REFRESH_WINDOWS,
+                 concurrency=REFRESH_CONCURRENCY, rate_per_min=REFRESH_RATE_PER_MIN,
+                 jitter=REFRESH_JITTER, interval=REFRESH_INTERVAL):
+        self.report_cache = report_cache
+        self.fetch = fetch
+        self.windows = parse_windows(windows) if isinstance(windows, str) else windows
+        self.concurrency = max(1, concurrency)
+        self.spacing = 60 / rate_per_min if rate_per_min > 0 else 0
+        self.jitter = jitter
+        self.interval = interval
+        self.task = None
+        self.last_run = {'started': None, 'finished': None, 'refreshed': 0, 'failed': 0, 'skipped': 0}
+
+    def start(self):
+        """Schedule the refresh loop on the running event loop"""
+        if self.windows and self.task is None:
+            self.task = asyncio.get_running_loop().create_task(self.run_forever())
+            logging.info(f"Refresh scheduler started for windows {REFRESH_WINDOWS or self.windows}")
+        return self.task
+
+    def stop(self):
+        """Cancel the refresh loop (start() schedules it again)"""
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    async def run_forever(self):
+        while True:
+            if in_window(self.windows):
+                try:
+                    await self.run_once()
+                except Exception as e:
+                    logging.error(f"Refresh run failed: {str(e)}")
+                delay = self.interval
+            else:
+                delay = 60
+            await asyncio.sleep(delay + random.uniform(0, self.jitter))
+
+    async def run_once(self):
+        """Refresh every saved account whose cached report is no longer fresh"""
+        stats = {'started': time.time(), 'finished': None, 'refreshed': 0, 'failed': 0, 'skipped': 0}
+        self.last_run = stats
+        semaphore = asyncio.Semaphore(self.concurrency)
+        users = await aget_all_users()
+        random.shuffle(users)
+
+        async def refresh(username, password):
+            try:
+                await asyncio.sleep(random.uniform(0, self.jitter))
+                report = await self.report_cache.refresh(username, password,
+                                                         lambda: self.fetch(username, password))
+                stats['failed' if is_error_report(report) else 'refreshed'] += 1
+            except Exception as e:
+                stats['failed'] += 1
+                logging.warning(f"Background refresh failed for {username}: {str(e)}")
+            finally:
+                semaphore.release()
+
+        tasks = []
+        for user in users:
+            username, password = user[1], user[2]
+            age = self.report_cache.age(username)
+            if age is not None and age < self.report_cache.ttl:
+                stats['skipped'] += 1
+                continue
+            if not in_window(self.windows):
+                break
+            await semaphore.acquire()
+            tasks.append(asyncio.create_task(refresh(username, password)))
+            await asyncio.sleep(self.spacing)
+
+        await asyncio.gather(*tasks)
+        stats['finished'] = time.time()
+        logging.info(f"Background refresh done: {stats['refreshed']} refreshed, "
+                     f"{stats['failed']} failed, {stats['skipped']} skipped")
+        return stats
@@ -1,52 +1,165 @@
-import pandas as pd
 import time
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, WebDriverException
 import os
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver import Chrome, Edge
-from bs4 import BeautifulSoup, SoupStrainer
+import tempfile
+import threading
+from lxml import html as lxml_html
 import logging
-from webdriver_manager.chrome import ChromeDriverManager
-from webdriver_manager.microsoft import EdgeChromiumDriverManager
+from config import ECAP_BASE_URL, LOGIN_URL, ACADEMIC_URL, SCRAPER_ENGINE
+from config import BROWSER_PROFILE, BLOCKED_URL_PATTERNS, CHROMEDRIVER_PATH, EDGEDRIVER_PATH
+from session_cache import session_cache
+from report import AttendanceReport, SubjectAttendance, TodayMark
+from history import load_or_parse
+from progress import publish
+from circuit_breaker import portal_breaker, PortalUnavailable, PORTAL_UNAVAILABLE, backoff
+from adaptive_limit import scrape_limit
+from metrics import STAGE_SECONDS, LOGIN_ATTEMPTS, PAGE_BYTES, PAGE_LOAD_SECONDS
+
+# Runs in the academic register page; resolves with the Export response body
+EXPORT_FETCH_SCRIPT = """
+var done = arguments[arguments.length - 1];
+var button = document.querySelector("input[value='Export']");
+if (!button || !button.form) { done(null); return; }
+var data = new URLSearchParams(new FormData(button.form));
+data.append(button.name, button.value);
+fetch(button.form.action, {method: 'POST', body: data, credentials: 'same-origin'})
+    .then(function (response) { return response.ok ? response.text() : null; })
+    .then(done, function () { done(null); });
+"""
+
+# Transfer size and load time of the current page from the Performance API
+# (cross-origin subresources without Timing-Allow-Origin count as 0 bytes)
+PAGE_STATS_SCRIPT = """
+var nav = performance.getEntriesByType('navigation')[0];
+var resources = performance.getEntriesByType('resource');
+var bytes = nav ? nav.transferSize : 0;
+for (var i = 0; i < resources.length; i++) { bytes += resources[i].transferSize || 0; }
+return {bytes: bytes, resources: resources.length,
+        load_ms: nav ? nav.domContentLoadedEventEnd - nav.startTime : 0};
+"""
+
+# Chromium switches for the lean profile: no extensions or background services
+LEAN_ARGUMENTS = [
+    '--disable-extensions',
+    '--disable-background-networking',
+    '--disable-component-update',
+    '--disable-default-apps',
+    '--disable-sync',
+    '--disable-features=Translate,MediaRouter,OptimizationHints',
+    '--no-first-run',
+    '--mute-audio',
+    '--blink-settings=imagesEnabled=false',
+]
+
+# Exports are declared UTF-8; skip charset sniffing and whitespace-only text nodes
+HTML_PARSER = lxml_html.HTMLParser(encoding='utf-8', remove_blank_text=True)
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+def retry_pause(attempt):
+    """Back off before retrying a portal page; give up early once the portal circuit opens"""
+    if portal_breaker.is_open():
+        raise PortalUnavailable("Portal circuit is open")
+    time.sleep(backoff(attempt))
+
+def apply_browser_profile(options):
+    """Configure Chromium options for BROWSER_PROFILE"""
+    if BROWSER_PROFILE != 'lean':
+        return options
+    options.page_load_strategy = 'eager'  # DOM ready is enough, don't wait for subresources
+    for argument in LEAN_ARGUMENTS:
+        options.add_argument(argument)
+    options.add_experimental_option('prefs', {
+        'profile.managed_default_content_settings.images': 2,
+        'profile.default_content_setting_values.notifications': 2,
+    })
+    return options
+
+def block_resources(driver):
+    """Drop requests for non-essential resources at the network layer (lean profile)"""
+    if BROWSER_PROFILE != 'lean' or not BLOCKED_URL_PATTERNS:
+        return driver
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': BLOCKED_URL_PATTERNS})
+    except Exception as e:
+        logging.warning(f"Could not block resources: {str(e)}")
+    return driver
+
+def record_page_stats(driver, page):
+    """Log and record bytes transferred and load time of the page just loaded"""
+    try:
+        stats = driver.execute_script(PAGE_STATS_SCRIPT)
+    except Exception:
+        return None
+    if not stats:
+        return None
+    PAGE_BYTES.inc(stats['bytes'], page=page)
+    PAGE_LOAD_SECONDS.observe(stats['load_ms'] / 1000, page=page)
+    logging.info(f"Page {page}: {stats['bytes'] / 1024:.1f} KB over {stats['resources']} resources, "
+                 f"DOM ready in {stats['load_ms']:.0f} ms")
+    return stats
+
+_driver_path = None
+_driver_path_lock = threading.Lock()
+
+def resolve_driver_path():
+    """ChromeDriver binary: CHROMEDRIVER_PATH, or installed by webdriver-manager once per process"""
+    global _driver_path
+    with _driver_path_lock:
+        if _driver_path is None:
+            if CHROMEDRIVER_PATH:
+                _driver_path = CHROMEDRIVER_PATH
+            else:
+                from webdriver_manager.chrome import ChromeDriverManager
+                with STAGE_SECONDS.time(stage='driver_resolve'):
+                    _driver_path = ChromeDriverManager().install()
+            logging.info(f"Using ChromeDriver at {_driver_path}")
+        return _driver_path
+
+@STAGE_SECONDS.timed(stage='driver_setup')
 def setup_driver():
     """Setup and return configured WebDriver for any environment"""
     try:
         if os.name == 'nt':  # Windows
             # Use Edge
-            driver_path = "edgedriver_win64/msedgedriver.exe"
+            from selenium.webdriver import Edge
             from selenium.webdriver.edge.service import Service as EdgeService
             from selenium.webdriver.edge.options import Options as EdgeOptions
             
             edge_options = EdgeOptions()
             edge_options.add_argument('--headless')
-            service = EdgeService(driver_path)
-            return Edge(service=service, options=edge_options)
+            apply_browser_profile(edge_options)
+            service = EdgeService(EDGEDRIVER_PATH)
+            return block_resources(Edge(service=service, options=edge_options))
         else:  # Linux
-            # Use Chrome with automatic driver installation
+            # Use Chrome; the driver binary is resolved once and reused
+            from selenium.webdriver import Chrome
+            from selenium.webdriver.chrome.service import Service
+            from selenium.webdriver.chrome.options import Options
+            
             chrome_options = Options()
             chrome_options.add_argument('--headless')
             chrome_options.add_argument('--no-sandbox')
             chrome_options.add_argument('--disable-dev-shm-usage')
             chrome_options.add_argument('--disable-gpu')
+            apply_browser_profile(chrome_options)
             
-            # Automatically download and setup ChromeDriver
-            service = Service(ChromeDriverManager().install())
-            return Chrome(service=service, options=chrome_options)
+            service = Service(resolve_driver_path())
+            return block_resources(Chrome(service=service, options=chrome_options))
             
     except Exception as e:
         logging.error(f"Failed to setup driver: {str(e)}")
         raise
 
+@scrape_limit.measure
+@STAGE_SECONDS.timed(stage='login')
 def login_to_portal(driver, username, password):
     """Handle login process"""
+    from selenium.common.exceptions import TimeoutException
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+    
     wait = WebDriverWait(driver, 10)
     try:
         # Clear cache and cookies
@@ -55,19 +168,23 @@ def login_to_portal(driver, username, password):
         # Navigate to login page with retry
         for attempt in range(3):
             try:
-                driver.get("https://webprosindia.com/vignanit/Default.aspx")
+                driver.get(LOGIN_URL)
                 break
             except Exception as e:
                 if attempt == 2:
-                    return False, f"Failed to load login page: {str(e)}"
-                time.sleep(2)
+                    raise PortalUnavailable(f"Failed to load login page: {str(e)}")
+                retry_pause(attempt)
         
         # Wait for and interact with elements
         try:
-            username_field = wait.until(
-                EC.presence_of_element_located((By.ID, "txtId2")),
-                message="Username field not found"
-            )
+            try:
+                username_field = wait.until(
+                    EC.presence_of_element_located((By.ID, "txtId2")),
+                    message="Username field not found"
+                )
+            except TimeoutException as e:
+                raise PortalUnavailable(f"Login page did not render: {str(e)}")
+            record_page_stats(driver, 'login')
             password_field = wait.until(
                 EC.presence_of_element_located((By.ID, "txtPwd2")),
                 message="Password field not found"
@@ -103,101 +220,166 @@ def login_to_portal(driver, username, password):
             # Verify login success
             if not success_element.is_displayed():
                 return False, "Login failed - authentication error"
+            record_page_stats(driver, 'home')
             
             return True, "Login successful"
             
         except TimeoutException as e:
             return False, f"Login timeout: {str(e)}"
             
+    except PortalUnavailable:
+        raise
     except Exception as e:
         return False, f"Login error: {str(e)}"
 
+def resume_session(driver, cookies):
+    """Load cached portal cookies into the browser without visiting the login page"""
+    try:
+        driver.delete_all_cookies()
+        for cookie in cookies:
+            driver.execute_cdp_cmd('Network.setCookie', {'url': ECAP_BASE_URL, **cookie})
+        return True
+    except Exception as e:
+        logging.warning(f"Could not restore portal session: {str(e)}")
+        return False
+
+@scrape_limit.measure
 def get_attendance_data(driver):
     """Extract attendance data from portal"""
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+    
     wait = WebDriverWait(driver, 10)
     try:
-        # Navigate to attendance page with retry
-        academic_url = "https://webprosindia.com/vignanit/Academics/studentacadamicregister.aspx?scrid=2"
-        for attempt in range(3):
-            try:
-                driver.get(academic_url)
-                break
-            except Exception:
-                if attempt == 2:
-                    return None, "Failed to load attendance page"
-                time.sleep(2)
-        
-        # Wait for export button with retry
-        export_button = None
-        for attempt in range(3):
-            try:
-                export_button = wait.until(
-                    EC.element_to_be_clickable((By.CSS_SELECTOR, "input[value='Export']"))
-                )
-                break
-            except Exception:
-                if attempt == 2:
-                    return None, "Export button not found"
-                time.sleep(2)
-        
-        downloads_path = os.path.join(os.path.expanduser("~"), "Downloads")
-        if not os.path.exists(downloads_path):
-            os.makedirs(downloads_path)
-        
-        # Track new files with improved timeout
-        initial_files = set(os.listdir(downloads_path))
-        export_button.click()
-        
-        # Wait for download with extended timeout
-        newest_file = None
-        timeout = time.time() + 15  # Extended timeout
-        while time.time() < timeout and not newest_file:
-            current_files = set(os.listdir(downloads_path))
-            new_files = current_files - initial_files
-            excel_files = [f for f in new_files if f.endswith(('.xls', '.xlsx'))]
-            if excel_files:
-                newest_file = max([os.path.join(downloads_path, f) for f in excel_files], 
-                                key=os.path.getmtime)
-                # Verify file is complete
-                if os.path.getsize(newest_file) > 0:
+        with STAGE_SECONDS.time(stage='navigate'):
+            # Navigate to attendance page with retry
+            for attempt in range(3):
+                try:
+                    driver.get(ACADEMIC_URL)
                     break
-            time.sleep(0.5)
+                except Exception:
+                    if attempt == 2:
+                        raise PortalUnavailable("Failed to load attendance page")
+                    retry_pause(attempt)
             
-        if not newest_file:
+            # Without a valid session the portal sends us back to the login form
+            if driver.find_elements(By.ID, "txtId2"):
+                return None, "Session expired"
+            
+            # Wait for export button with retry
+            export_button = None
+            for attempt in range(3):
+                try:
+                    export_button = wait.until(
+                        EC.element_to_be_clickable((By.CSS_SELECTOR, "input[value='Export']"))
+                    )
+                    break
+                except Exception:
+                    if attempt == 2:
+                        raise PortalUnavailable("Export button not found")
+                    retry_pause(attempt)
+            record_page_stats(driver, 'register')
+        
+        with STAGE_SECONDS.time(stage='export'):
+            # Submit the export form from inside the page and keep the response in memory
+            content = fetch_export_in_page(driver)
+            if content:
+                return content, "Data exported successfully"
+            
+            # Fall back to a real download into a directory owned by this job only
+            logging.warning("In-page export failed, falling back to isolated download")
+            content = download_export_isolated(driver, export_button)
+        if not content:
             return None, "No attendance data file downloaded"
             
-        return newest_file, "Data exported successfully"
+        return content, "Data exported successfully"
         
+    except PortalUnavailable:
+        raise
     except Exception as e:
         return None, f"Failed to get attendance data: {str(e)}"
 
-def parse_attendance_data(file_path):
-    """Parse attendance HTML and return formatted data"""
+def fetch_export_in_page(driver, timeout=15):
+    """POST the Export button's form with fetch() and return the response text"""
+    driver.set_script_timeout(timeout)
     try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            soup = BeautifulSoup(file.read(), 'lxml', parse_only=SoupStrainer(['tr', 'td']))
+        content = driver.execute_async_script(EXPORT_FETCH_SCRIPT)
+    except Exception as e:
+        logging.warning(f"In-page export error: {str(e)}")
+        return None
+    if not content or 'reportData2' not in content:
+        return None
+    return content
+
+def download_export_isolated(driver, export_button, timeout=15):
+    """Click Export with downloads sent to a per-job temp directory and read the file back"""
+    with tempfile.TemporaryDirectory(prefix='ecap-export-') as download_dir:
+        driver.execute_cdp_cmd('Page.setDownloadBehavior',
+                               {'behavior': 'allow', 'downloadPath': download_dir})
+        export_button.click()
         
-        # Get student ID
-        student_id = soup.select_one('td.reportData2').text.strip().replace(':', '').strip()
+        # The directory is private to this job, so any finished .xls is ours
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            names = os.listdir(download_dir)
+            finished = [n for n in names if n.endswith(('.xls', '.xlsx'))]
+            if finished and not any(n.endswith('.crdownload') for n in names):
+                path = os.path.join(download_dir, finished[0])
+                if os.path.getsize(path) > 0:
+                    with open(path, 'r', encoding='utf-8') as file:
+                        return file.read()
+            time.sleep(0.1)
+    return None
+
+def parse_attendance_data(file_path, today=None):
+    """Parse attendance export file into an AttendanceReport"""
+    with open(file_path, 'r', encoding='utf-8') as file:
+        return parse_attendance_html(file.read(), today)
+
+def _has_class(element, name):
+    return name in (element.get('class') or '').split()
+
+def _cell_text(element):
+    return element.text_content().strip()
+
+@STAGE_SECONDS.timed(stage='parse')
+def parse_attendance_html(content, today=None):
+    """Parse attendance HTML (export contents) into an AttendanceReport"""
+    try:
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        root = lxml_html.document_fromstring(content, parser=HTML_PARSER)
+        
+        # Single pass over the table rows: id cell, date header, subject rows
+        student_id = None
+        dates = None
+        rows = []
+        for row in root.iter('tr'):
+            if student_id is None:
+                id_cell = next((td for td in row.iter('td') if _has_class(td, 'reportData2')), None)
+                if id_cell is not None:
+                    student_id = _cell_text(id_cell).replace(':', '').strip()
+            if dates is None and _has_class(row, 'reportHeading2WithBackground'):
+                dates = [_cell_text(td) for td in row.iter('td')]
+            if row.get('title') is not None:
+                rows.append(row)
         
-        # Get dates and find today's column
-        header_row = soup.select_one('tr.reportHeading2WithBackground')
-        dates = [td.text.strip() for td in header_row.select('td')]
-        today = time.strftime("%d/%m")
+        # Find today's column
+        today = today or time.strftime("%d/%m")
         today_index = next((i for i, date in enumerate(dates) if today in date), None)
         
         # Process attendance data
-        rows = soup.select('tr[title]')
         total_present = total_classes = 0
         todays_attendance = []
-        subject_attendance = []
+        subjects = []
         
         for row in rows:
-            cells = row.select('td.cellBorder')
+            cells = [td for td in row.iter('td') if _has_class(td, 'cellBorder')]
             if len(cells) >= 2:
-                subject = cells[1].text.strip()
-                attendance = cells[-2].text.strip()
-                percentage = cells[-1].text.strip()
+                subject = _cell_text(cells[1])
+                attendance = _cell_text(cells[-2])
+                percentage = _cell_text(cells[-1])
                 
                 if attendance != "0/0":
                     present, total = map(int, attendance.split('/'))
@@ -206,115 +388,166 @@ def parse_attendance_data(file_path):
                     
                     # Only add subjects with clear P or A status
                     if today_index and today_index < len(cells):
-                        today_status = cells[today_index].text.strip()
+                        today_status = _cell_text(cells[today_index])
                         if 'P' in today_status or 'A' in today_status:
-                            todays_attendance.append(f"{subject}: {'P' if 'P' in today_status else 'A'}")
+                            todays_attendance.append(TodayMark(subject, 'P' if 'P' in today_status else 'A'))
                     
-                    if percentage != ".00":
-                        subject_attendance.append(f"{subject:.<8} {attendance:<7} {percentage}%")
+                    subjects.append(SubjectAttendance(subject, present, total, percentage))
         
-        # Calculate overall percentage and skippable hours
-        overall_percentage = (total_present / total_classes * 100) if total_classes > 0 else 0
-        skippable_hours = calculate_skippable_hours(total_present, total_classes)
-        
-        return {
-            'student_id': student_id,
-            'total_present': total_present,
-            'total_classes': total_classes,
-            'overall_percentage': overall_percentage,
-            'todays_attendance': todays_attendance,
-            'subject_attendance': subject_attendance,
-            'skippable_hours': skippable_hours
-        }
+        return AttendanceReport(
+            student_id=student_id,
+            total_present=total_present,
+            total_classes=total_classes,
+            skippable_hours=calculate_skippable_hours(total_present, total_classes),
+            today=tuple(todays_attendance),
+            subjects=tuple(subjects)
+        )
     except Exception as e:
         raise Exception(f"Failed to parse attendance data: {str(e)}")
 
 def calculate_skippable_hours(present, total):
     """Calculate how many hours can be skipped while maintaining 75%"""
-    current = (present / total * 100)
-    skippable = 0
-    while current >= 75 and total < total + 20:
-        skippable += 1
-        total += 1
-        current = (present / total * 100)
-    return skippable
+    from projection import skippable
+    
+    return int(skippable(present, total, 75))
 
 def get_attendance_report(username, password):
-    """Main function to get attendance report"""
-    driver = None
-    downloaded_file = None
+    """Main function to get attendance report using the configured engine
+    
+    Returns an AttendanceReport, or an error message string starting with ❌.
+    While the portal circuit is open this fails fast with PORTAL_UNAVAILABLE.
+    """
+    if not portal_breaker.allow():
+        logging.info(f"Portal circuit open, not scraping for user {username}")
+        return PORTAL_UNAVAILABLE
+    try:
+        report = scrape_attendance_report(username, password)
+    except PortalUnavailable as e:
+        portal_breaker.record_failure()
+        logging.error(f"Portal unavailable: {str(e)}")
+        return PORTAL_UNAVAILABLE
+    except BaseException:
+        portal_breaker.release()
+        raise
+    if isinstance(report, AttendanceReport):
+        portal_breaker.record_success()
+    else:
+        portal_breaker.release()
+    return report
+
+def scrape_attendance_report(username, password):
+    """Run the configured engine (raises PortalUnavailable when the portal fails)"""
+    if SCRAPER_ENGINE == 'http':
+        from portal_http import PortalMarkupChanged
+        try:
+            return get_attendance_report_http(username, password)
+        except PortalMarkupChanged as e:
+            logging.warning(f"HTTP engine could not read portal ({str(e)}), falling back to Selenium")
+    return get_attendance_report_selenium(username, password)
+
+def get_attendance_report_http(username, password):
+    """Get attendance report over plain HTTP (raises PortalMarkupChanged for fallback)"""
+    import requests
+    from portal_http import get_attendance_html, PortalMarkupChanged
+    
+    try:
+        logging.info(f"Starting HTTP attendance check for user {username}")
+        content, message = get_attendance_html(username, password)
+        logging.info(f"Data extraction: {message}")
+        if not content:
+            return f"❌ {message}"
+        publish(username, password, 'export')
+        
+        report = load_or_parse(username, password, content, parse_attendance_html)
+        logging.info(f"Data parsed successfully: {len(report.subjects)} subjects")
+        return report
+        
+    except requests.RequestException as e:
+        raise PortalUnavailable(f"Portal request error: {str(e)}")
+    except PortalMarkupChanged:
+        raise
+    except Exception as e:
+        logging.error(f"Error in attendance report: {str(e)}")
+        return f"❌ Error: {str(e)}"
+
+def get_attendance_report_selenium(username, password):
+    """Get attendance report by driving a headless browser borrowed from the pool"""
+    from selenium.common.exceptions import WebDriverException
+    from driver_pool import get_driver_pool
+    
+    pool = get_driver_pool()
+    entry = None
+    broken = False
     
     try:
         logging.info(f"Starting attendance check for user {username}")
         
-        # Initialize driver with retry
+        # Borrow a pre-warmed driver with retry
         retry_count = 3
         for attempt in range(retry_count):
             try:
-                driver = setup_driver()
+                with STAGE_SECONDS.time(stage='driver_acquire'):
+                    entry = pool.acquire()
                 break
             except WebDriverException as e:
                 if attempt == retry_count - 1:
                     raise
                 logging.warning(f"Driver setup failed (attempt {attempt + 1}): {str(e)}")
-                time.sleep(2)
+                time.sleep(backoff(attempt))
+        driver = entry.driver
+        publish(username, password, 'browser')
         
-        # Login with retry
-        for attempt in range(retry_count):
-            success, message = login_to_portal(driver, username, password)
-            if success:
-                break
-            if attempt == retry_count - 1:
-                return f"❌ Login failed after {retry_count} attempts: {message}"
-            logging.warning(f"Login failed (attempt {attempt + 1}): {message}")
-            time.sleep(2)
+        # Go straight to the register page if this user still has a portal session
+        content = None
+        cookies = session_cache.get(username, password)
+        if cookies and resume_session(driver, cookies):
+            content, message = get_attendance_data(driver)
+            if content:
+                logging.info(f"Reused portal session for user {username}")
+                publish(username, password, 'export')
+            else:
+                logging.info(f"Cached session unusable ({message}), logging in again")
+                session_cache.invalidate(username)
         
-        # Get attendance data
-        file_path, message = get_attendance_data(driver)
-        logging.info(f"Data extraction: {message}")
-        if not file_path:
-            return f"❌ {message}"
+        if not content:
+            # Login with retry
+            for attempt in range(retry_count):
+                success, message = login_to_portal(driver, username, password)
+                LOGIN_ATTEMPTS.inc(engine='selenium', result='ok' if success else 'failed')
+                if success:
+                    break
+                if attempt == retry_count - 1:
+                    return f"❌ Login failed after {retry_count} attempts: {message}"
+                logging.warning(f"Login failed (attempt {attempt + 1}): {message}")
+                retry_pause(attempt)
+            session_cache.put(username, password, driver.get_cookies())
+            publish(username, password, 'login')
             
-        # Parse and format data
-        data = parse_attendance_data(file_path)
-        downloaded_file = file_path
-        logging.info("Data parsed successfully")
-        
-        # Format output
-        output = []
-        output.append(f"Hi {data['student_id']}")
-        output.append(f"Total: {data['total_present']}/{data['total_classes']} ({data['overall_percentage']:.2f}%)\n")
-        
-        if data['todays_attendance']:
-            output.append("Today's Attendance:")
-            output.extend(data['todays_attendance'])
-            output.append("")
-        
-        output.append(f"You can skip {data['skippable_hours']} hours and still maintain above 75%.\n")
-        output.append("Subject-wise Attendance:")
-        output.extend(data['subject_attendance'])
+            # Get attendance data
+            content, message = get_attendance_data(driver)
+            logging.info(f"Data extraction: {message}")
+            if not content:
+                return f"❌ {message}"
+            publish(username, password, 'export')
+            
+        # Parse into a report object (skipped when the export is unchanged)
+        report = load_or_parse(username, password, content, parse_attendance_html)
+        logging.info(f"Data parsed successfully: {len(report.subjects)} subjects")
         
-        report = "\n".join(output)
-        logging.info(f"Report generated: {len(report)} characters")
         return report
         
+    except PortalUnavailable:
+        raise
     except WebDriverException as e:
+        broken = True
         logging.error(f"WebDriver error: {str(e)}")
         return "❌ Browser automation error. Please try again later."
     except Exception as e:
         logging.error(f"Error in attendance report: {str(e)}")
         return f"❌ Error: {str(e)}"
     finally:
-        if driver:
-            try:
-                driver.quit()
-            except:
-                pass
-        if downloaded_file and os.path.exists(downloaded_file):
-            try:
-                os.remove(downloaded_file)
-            except:
-                pass
+        if entry:
+            pool.release(entry, broken)
 
 if __name__ == "__main__":
     logging.info("Scraper module loaded successfully")
\ No newline at end of file
@@ -0,0 +1,59 @@
+import hashlib
+import threading
+import time
+
+from config import PORTAL_SESSION_TTL
+
+class SessionCache:
+    """Authenticated portal cookies per user, expiring after a sliding TTL
+
+    The portal keeps ASP.NET session state server-side, so the cookies are all
+    that is needed to skip the login page on a repeat check.
+    """
+
+    def __init__(self, ttl=PORTAL_SESSION_TTL):
+        self.ttl = ttl
+        self.entries = {}
+        self.lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    @staticmethod
+    def _fingerprint(password):
+        return hashlib.sha256(password.encode('utf-8')).hexdigest()
+
+    def get(self, username, password):
+        """Return cached cookies (list of dicts) or None if missing/expired"""
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(username)
+            if entry and now - entry['last_used'] >= self.ttl:
+                del self.entries[username]
+                entry = None
+            if entry and entry['password'] == self._fingerprint(password):
+                entry['last_used'] = now
+                self.hits += 1
+                return entry['cookies']
+            self.misses += 1
+            return None
+
+    def put(self, username, password, cookies):
+        """Remember the cookies of a freshly authenticated session"""
+        cookies = [{key: cookie[key] for key in ('name', 'value', 'domain', 'path') if cookie.get(key)}
+                   for cookie in cookies]
+        with self.lock:
+            self.entries[username] = {
+                'password': self._fingerprint(password),
+                'cookies': cookies,
+                'last_used': time.time(),
+            }
+
+    def invalidate(self, username):
+        """Forget a session the portal no longer accepts"""
+        with self.lock:
+            self.entries.pop(username, None)
+
+    def stats(self):
+        with self.lock:
+            return {'sessions': len(self.entries), 'hits': self.hits, 'misses': self.misses}
+
+session_cache = SessionCache()
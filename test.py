@@ -1,4 +1,3 @@
-import pandas as pd
 import time
 from selenium import webdriver
 from selenium.webdriver.edge.service import Service
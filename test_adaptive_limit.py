@@ -0,0 +1,92 @@
+import asyncio
+import threading
+
+import pytest
+
+from adaptive_limit import AdaptiveLimit
+from job_queue import JobQueue
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_healthy_samples_raise_the_limit_additively():
+    limit = AdaptiveLimit(min_limit=1, max_limit=4, initial=2)
+    for _ in range(3):
+        limit.observe(1.0)
+    assert limit.limit == 3
+    for _ in range(20):
+        limit.observe(1.0)
+    assert limit.limit == 4 and limit.stats()['increases'] == 2
+
+def test_errors_and_slow_portal_cut_the_limit():
+    clock = Clock()
+    limit = AdaptiveLimit(min_limit=1, max_limit=10, initial=8, tolerance=2, backoff=0.5, clock=clock)
+    limit.observe(1.0)
+    limit.observe(0, ok=False)
+    assert limit.limit == 4
+    limit.observe(0, ok=False)  # same latency window: already reacted
+    assert limit.limit == 4
+    clock.now = 5
+    for _ in range(10):
+        limit.observe(10.0)
+    assert limit.limit == 2 and limit.latency['portal'] > 2 * limit.baseline['portal']
+    clock.now = 100
+    limit.observe(10.0)
+    limit.observe(0, ok=False)
+    assert limit.limit == 1 and limit.stats()['errors'] == 3
+
+def test_calls_are_compared_with_their_own_baseline():
+    limit = AdaptiveLimit(min_limit=1, max_limit=3, initial=3, tolerance=2)
+    for _ in range(20):
+        limit.observe(0.4, call='login')
+        limit.observe(1.2, call='fetch_export')
+    assert limit.limit == 3 and limit.stats()['decreases'] == 0
+    assert limit.stats()['baseline'] == {'login': 0.4, 'fetch_export': 1.2}
+
+def test_measure_samples_results_and_exceptions():
+    limit = AdaptiveLimit(initial=1)
+    assert limit.measure(lambda: (True, "ok"))() == (True, "ok")
+    assert limit.measure(lambda: (False, "invalid credentials"))() == (False, "invalid credentials")
+
+    @limit.measure
+    def broken():
+        raise TimeoutError("portal timed out")
+
+    with pytest.raises(TimeoutError):
+        broken()
+    assert limit.stats()['samples'] == 2 and limit.stats()['errors'] == 1
+    assert list(limit.latency) == ['<lambda>']
+
+def test_job_queue_follows_the_limit():
+    async def run():
+        limit = AdaptiveLimit(min_limit=1, max_limit=3, initial=1)
+        gate, running, peak = threading.Event(), [0], [0]
+        lock = threading.Lock()
+
+        def scrape(username, password):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            gate.wait(5)
+            with lock:
+                running[0] -= 1
+            return username
+
+        queue = JobQueue(scrape, limit=limit, max_size=10)
+        first = [queue.submit(str(i), str(i), 'p') for i in range(3)]
+        await asyncio.sleep(0.05)
+        assert peak[0] == 1 and queue.stats()['workers'] == 1
+        limit.value = 3
+        gate.set()
+        await asyncio.gather(*first)
+        gate.clear()
+        second = [queue.submit(f"b{i}", f"b{i}", 'p') for i in range(3)]
+        await asyncio.sleep(0.05)
+        assert running[0] == 3
+        gate.set()
+        await asyncio.gather(*second)
+    asyncio.run(run())
@@ -0,0 +1,86 @@
+import asyncio
+import json
+import os
+import threading
+import time
+
+import model
+from report import AttendanceReport, SubjectAttendance
+from report_cache import password_fingerprint
+
+os.environ.setdefault('TELEGRAM_TOKEN', '123456:TEST-TOKEN')
+
+SNAPSHOT = AttendanceReport('24L35A0500', 40, 50, 3)
+
+class StatusMessage:
+    text = '🔄 Fetching...'
+
+    def __init__(self):
+        self.edits = []
+
+    async def edit_text(self, text, parse_mode=None):
+        self.edits.append(text)
+
+def test_stats_table():
+    import app as bot_app
+    from projection import project_report
+    report = AttendanceReport('24L35A0500', 30, 40, 0, subjects=(
+        SubjectAttendance('CN', 9, 10, '90.00'), SubjectAttendance('Lab', 0, 0, '.00')))
+    text = bot_app.format_stats(report, project_report(report, (65, 75, 85)), (65, 75, 85))
+    assert 'Overall          +6    +0   -27' in text
+    assert 'CN               +3    +2    +0' in text and 'Lab' not in text
+
+def test_keyword_lookup_starts_from_stored_snapshot(database, monkeypatch):
+    import app as bot_app
+    model.save_snapshot('24L35A0500', password_fingerprint('secret'), 'hash', json.dumps(SNAPSHOT.to_dict()))
+    with model.get_db() as db:
+        db.execute('UPDATE snapshots SET fetched_at = ?', (time.time() - 600,))
+        db.commit()
+    bot_app.report_cache.entries.clear()
+    scraped = threading.Event()
+
+    def scrape(username, password):
+        scraped.set()
+        return AttendanceReport(username, 41, 51, 3)
+    monkeypatch.setattr(bot_app.job_queue, 'run', scrape)
+
+    async def run():
+        message = StatusMessage()
+        start = time.perf_counter()
+        await bot_app.send_report(message, '24L35A0500', 'secret', '42', 0,
+                                  stale_ttl=bot_app.SNAPSHOT_MAX_AGE, saved=True)
+        assert time.perf_counter() - start < 1
+        assert '40/50' in message.edits[-1]
+        await asyncio.sleep(0.1)
+        assert scraped.is_set()
+        assert bot_app.report_cache.entries['24L35A0500']['report'].total_classes == 51
+    asyncio.run(run())
+
+def test_stored_snapshot_needs_the_same_password(database, monkeypatch):
+    import app as bot_app
+    model.save_snapshot('24L35A0500', password_fingerprint('secret'), 'hash', json.dumps(SNAPSHOT.to_dict()))
+    bot_app.report_cache.entries.clear()
+    monkeypatch.setattr(bot_app.job_queue, 'run', lambda username, password: '❌ Login failed')
+
+    async def run():
+        message = StatusMessage()
+        await bot_app.send_report(message, '24L35A0500', 'wrong', '42', 0,
+                                  stale_ttl=bot_app.SNAPSHOT_MAX_AGE, saved=True)
+        assert message.edits[-1] == '❌ Login failed'
+        assert not any('40/50' in text for text in message.edits)
+    asyncio.run(run())
+
+def test_portal_outage_falls_back_to_own_snapshot_only(database, monkeypatch):
+    import app as bot_app
+    from circuit_breaker import PORTAL_UNAVAILABLE
+    model.save_snapshot('24L35A0500', password_fingerprint('secret'), 'hash', json.dumps(SNAPSHOT.to_dict()))
+    bot_app.report_cache.entries.clear()
+    monkeypatch.setattr(bot_app.job_queue, 'run', lambda username, password: PORTAL_UNAVAILABLE)
+
+    async def run():
+        other, owner = StatusMessage(), StatusMessage()
+        await bot_app.send_report(other, '24L35A0500', 'wrong', '43', 0)
+        assert other.edits[-1] == PORTAL_UNAVAILABLE
+        await bot_app.send_report(owner, '24L35A0500', 'secret', '42', 0)
+        assert '40/50' in owner.edits[-1] and 'not responding' in owner.edits[-1]
+    asyncio.run(run())
@@ -0,0 +1,58 @@
+import threading
+import time
+
+import pytest
+
+import broker as broker_module
+from broker import SQLiteBroker, encode_result, decode_result, remote_attendance_report, WORKER_TIMEOUT
+from report import AttendanceReport, SubjectAttendance
+from worker import work
+
+REPORT = AttendanceReport('24L35A0500', 40, 50, 3, subjects=(SubjectAttendance('CN', 40, 50, '80.00'),))
+
+@pytest.fixture
+def broker(tmp_path):
+    return SQLiteBroker(str(tmp_path / 'jobs.db'), poll=0.01, lease=60)
+
+def test_results_round_trip():
+    assert decode_result(encode_result(REPORT)) == REPORT
+    assert decode_result(encode_result('❌ Login failed')) == '❌ Login failed'
+
+def test_claim_complete_wait(broker):
+    job_id = broker.submit('user', 'secret')
+    assert broker.claim('w1') == (job_id, 'user', 'secret')
+    assert broker.claim('w2', timeout=0) is None
+    broker.complete(job_id, encode_result(REPORT))
+    assert decode_result(broker.wait(job_id, timeout=1)) == REPORT
+    assert broker.stats() == {'backend': 'sqlite', 'queued': 0, 'running': 0, 'done': 0}
+
+def test_expired_lease_is_reclaimed(broker):
+    broker.lease = 0
+    job_id = broker.submit('user', 'secret')
+    broker.claim('dead-worker')
+    time.sleep(0.01)
+    assert broker.claim('w2', timeout=0) == (job_id, 'user', 'secret')
+
+def test_worker_serves_remote_requests(broker, monkeypatch):
+    monkeypatch.setattr(broker_module, '_broker', broker)
+    stop = threading.Event()
+
+    def run(username, password):
+        if password != 'secret':
+            raise RuntimeError('bad password')
+        return REPORT
+
+    thread = threading.Thread(target=work, args=(broker, run, 'w1', stop))
+    thread.start()
+    try:
+        assert remote_attendance_report('user', 'secret') == REPORT
+        assert remote_attendance_report('user', 'wrong') == '❌ Error: bad password'
+    finally:
+        stop.set()
+        thread.join()
+
+def test_wait_times_out_without_workers(broker, monkeypatch):
+    monkeypatch.setattr(broker_module, '_broker', broker)
+    monkeypatch.setattr(broker, 'wait', lambda job_id: None)
+    assert remote_attendance_report('user', 'secret') == WORKER_TIMEOUT
+    assert broker.stats()['queued'] == 0
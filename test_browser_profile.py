@@ -0,0 +1,41 @@
+from selenium.webdriver.chrome.options import Options
+
+import scrapper
+
+class CDPDriver:
+    def __init__(self, stats=None):
+        self.commands = []
+        self.stats = stats
+
+    def execute_cdp_cmd(self, command, params):
+        self.commands.append((command, params))
+
+    def execute_script(self, script):
+        return self.stats
+
+def test_lean_profile_options(monkeypatch):
+    monkeypatch.setattr(scrapper, 'BROWSER_PROFILE', 'lean')
+    options = scrapper.apply_browser_profile(Options())
+    assert options.page_load_strategy == 'eager'
+    assert '--disable-extensions' in options.arguments
+    assert options.experimental_options['prefs']['profile.managed_default_content_settings.images'] == 2
+
+def test_full_profile_is_untouched(monkeypatch):
+    monkeypatch.setattr(scrapper, 'BROWSER_PROFILE', 'full')
+    options = scrapper.apply_browser_profile(Options())
+    assert options.page_load_strategy == 'normal' and options.arguments == []
+    driver = scrapper.block_resources(CDPDriver())
+    assert driver.commands == []
+
+def test_resources_blocked_over_cdp(monkeypatch):
+    monkeypatch.setattr(scrapper, 'BROWSER_PROFILE', 'lean')
+    monkeypatch.setattr(scrapper, 'BLOCKED_URL_PATTERNS', ['*.png', '*.css'])
+    driver = scrapper.block_resources(CDPDriver())
+    assert driver.commands == [('Network.enable', {}),
+                               ('Network.setBlockedURLs', {'urls': ['*.png', '*.css']})]
+
+def test_page_stats_recorded():
+    before = scrapper.PAGE_BYTES.values.get(('login',), 0)
+    stats = scrapper.record_page_stats(CDPDriver({'bytes': 2048, 'resources': 3, 'load_ms': 120.0}), 'login')
+    assert stats['bytes'] == 2048
+    assert scrapper.PAGE_BYTES.values[('login',)] == before + 2048
@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+
+from bulk import parse_students, check_all, format_result, format_summary, split_message
+from report import AttendanceReport
+
+def test_parse_students():
+    assert parse_students(['24l35a0500:a', '24L35A0501:b:c', '24L35A0500:x']) == [
+        ('24l35a0500', 'a'), ('24L35A0501', 'b:c')]
+    with pytest.raises(ValueError):
+        parse_students(['24L35A0500'])
+    with pytest.raises(ValueError):
+        parse_students([f'R{i}:p' for i in range(5)], limit=4)
+
+def test_check_all_bounds_parallelism_and_streams_in_completion_order():
+    async def run():
+        active, peak = 0, 0
+
+        async def fetch(username, password):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.2 if username == 'SLOW' else 0.01)
+            active -= 1
+            if password == 'bad':
+                raise RuntimeError('boom')
+            return AttendanceReport(username, 30, 40, 0)
+
+        students = [('SLOW', 'p')] + [(f'R{i}', 'p') for i in range(5)] + [('BAD', 'bad')]
+        results = [item async for item in check_all(students, fetch, concurrency=2)]
+        assert peak == 2
+        assert len(results) == len(students)
+        assert results[-1][0] == 'SLOW'
+        assert dict(results)['BAD'] == '❌ Error: boom'
+    asyncio.run(run())
+
+def test_summary_table():
+    results = [('A', AttendanceReport('A', 45, 50, 0)),
+               ('B', AttendanceReport('B', 30, 50, 0)),
+               ('C', '❌ Login failed')]
+    summary = format_summary(results)
+    lines = summary.split('\n')
+    assert lines[1].startswith('B') and lines[1].endswith('-30  60.00*')
+    assert lines[2].startswith('A') and lines[2].endswith('+10  90.00')
+    assert 'Below 75%: 1 of 2 (B)' in summary
+    assert 'Not checked: C' in summary
+    assert format_result('C', '❌ Login failed') == '⚠️ C: Login failed'
+
+def test_split_message():
+    chunks = split_message('\n'.join(['x' * 30] * 10), limit=100)
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    assert '\n'.join(chunks).count('x' * 30) == 10
@@ -0,0 +1,54 @@
+import random
+
+from circuit_breaker import CircuitBreaker, backoff
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failures=3, reset_timeout=30, clock=Clock())
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.allow() and breaker.state == 'closed'
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    assert not breaker.allow() and breaker.stats()['rejected'] == 1
+
+def test_half_open_lets_one_probe_through():
+    clock = Clock()
+    breaker = CircuitBreaker(failures=1, reset_timeout=30, clock=clock)
+    breaker.record_failure()
+    clock.now = 29
+    assert not breaker.allow()
+    clock.now = 30
+    assert breaker.allow() and breaker.state == 'half_open'
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == 'open' and breaker.stats()['retry_in'] == 30
+    clock.now = 60
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == 'closed' and breaker.allow() and breaker.allow()
+
+def test_released_probe_can_be_retried():
+    clock = Clock()
+    breaker = CircuitBreaker(failures=1, reset_timeout=5, clock=clock)
+    breaker.record_failure()
+    clock.now = 5
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.state == 'half_open' and breaker.allow()
+
+def test_backoff_is_jittered_and_capped():
+    random.seed(1)
+    delays = [backoff(attempt, base=0.5, cap=4) for attempt in range(8) for _ in range(50)]
+    assert all(0 <= delay <= 4 for delay in delays)
+    assert max(backoff(0, base=0.5, cap=4) for _ in range(50)) <= 0.5
+    assert len(set(delays)) > 1
@@ -0,0 +1,66 @@
+import threading
+
+import pytest
+
+from driver_pool import DriverPool
+
+class FakeDriver:
+    def __init__(self):
+        self.alive = True
+        self.cookies_cleared = 0
+        self.quit_called = False
+
+    @property
+    def current_url(self):
+        if not self.alive:
+            raise RuntimeError("driver crashed")
+        return 'about:blank'
+
+    def delete_all_cookies(self):
+        self.cookies_cleared += 1
+
+    def execute_script(self, script):
+        pass
+
+    def get(self, url):
+        pass
+
+    def quit(self):
+        self.quit_called = True
+
+def test_warm_up_and_reuse():
+    pool = DriverPool(FakeDriver, min_size=2, max_size=3, max_uses=10, max_rss_mb=10_000)
+    pool.warm_up()
+    assert pool.stats()['idle'] == 2
+
+    entry = pool.acquire()
+    pool.release(entry)
+    again = pool.acquire()
+    assert again.driver is entry.driver
+    assert again.driver.cookies_cleared == 1
+    assert pool.stats()['created'] == 2
+
+def test_recycles_after_max_uses():
+    pool = DriverPool(FakeDriver, min_size=0, max_size=1, max_uses=2, max_rss_mb=10_000)
+    first = pool.acquire()
+    pool.release(first)
+    pool.release(pool.acquire())
+    assert first.driver.quit_called
+    assert pool.stats()['recycled'] == 1
+    assert pool.acquire().driver is not first.driver
+
+def test_unhealthy_driver_is_replaced():
+    pool = DriverPool(FakeDriver, min_size=1, max_size=1, max_uses=10, max_rss_mb=10_000)
+    pool.warm_up()
+    pool.idle[0].driver.alive = False
+    entry = pool.acquire()
+    assert entry.driver.alive
+    assert pool.stats()['unhealthy'] == 1
+
+def test_acquire_times_out_when_exhausted():
+    pool = DriverPool(FakeDriver, min_size=0, max_size=1, max_uses=10, max_rss_mb=10_000)
+    entry = pool.acquire()
+    threading.Timer(0.05, pool.release, (entry,)).start()
+    assert pool.acquire(timeout=2).driver is entry.driver
+    with pytest.raises(TimeoutError):
+        pool.acquire(timeout=0.05)
@@ -0,0 +1,58 @@
+import pytest
+
+from history import diff_reports, load_or_parse, recent_changes, last_snapshot
+from report import AttendanceReport, SubjectAttendance
+from scrapper import parse_attendance_html
+from mock_portal import build_export
+
+pytestmark = pytest.mark.usefixtures('database')
+
+def counting(parse):
+    calls = []
+    def wrapper(content, today):
+        calls.append(today)
+        return parse(content, today)
+    return wrapper, calls
+
+def test_unchanged_export_skips_parsing():
+    parse, calls = counting(parse_attendance_html)
+    content = build_export('24L35A0500', days=10)
+    first = load_or_parse('24L35A0500', 'a', content, parse, today='01/01')
+    second = load_or_parse('24L35A0500', 'a', content, parse, today='01/01')
+    assert first == second
+    assert len(calls) == 1
+    load_or_parse('24L35A0500', 'a', content, parse, today='02/01')
+    assert len(calls) == 2
+
+def test_snapshot_is_only_shown_with_the_password_that_fetched_it():
+    content = build_export('24L35A0500', days=10)
+    report = load_or_parse('24L35A0500', 'a', content, parse_attendance_html, today='01/01')
+    assert last_snapshot('24L35A0500', 'a')[0] == report
+    assert last_snapshot('24L35A0500', 'b') is None
+    # Same export after a password change: the snapshot moves to the new password
+    load_or_parse('24L35A0500', 'b', content, parse_attendance_html, today='01/01')
+    assert last_snapshot('24L35A0500', 'a') is None
+    assert last_snapshot('24L35A0500', 'b')[0] == report
+
+def test_changes_are_recorded_as_differences():
+    old = build_export('24L35A0500', days=10, seed=1)
+    new = build_export('24L35A0500', days=11, seed=1)
+    before = load_or_parse('24L35A0500', 'a', old, parse_attendance_html, today='01/01')
+    report = load_or_parse('24L35A0500', 'a', new, parse_attendance_html, today='01/01')
+
+    [(_, changes)] = recent_changes('24L35A0500', 'a')
+    assert recent_changes('24L35A0500', 'guess') == []
+    assert changes
+    for change in changes:
+        subject = next(s for s in report.subjects if s.name == change['subject'])
+        assert (change['present'], change['total']) == (subject.present, subject.total)
+        previous = next(s for s in before.subjects if s.name == change['subject'])
+        assert change['new_present'] + change['new_absent'] == subject.total - previous.total
+
+def test_diff_reports():
+    old = AttendanceReport('x', 10, 12, 0, subjects=(SubjectAttendance('OS', 10, 12, '83.33'),))
+    new = AttendanceReport('x', 11, 14, 0, subjects=(SubjectAttendance('OS', 11, 14, '78.57'),))
+    assert diff_reports(old, new) == [
+        {'subject': 'OS', 'present': 11, 'total': 14, 'new_present': 1, 'new_absent': 1}
+    ]
+    assert diff_reports(new, new) == []
@@ -0,0 +1,76 @@
+import asyncio
+import threading
+
+from job_queue import (JobQueue, PRIORITY_KEYWORD, PRIORITY_CHECK, PRIORITY_BACKGROUND,
+                       QUEUE_BUSY, ALREADY_QUEUED)
+
+def blocking_run(gate, order):
+    def run(username, password):
+        gate.wait(5)
+        order.append(username)
+        return f"report:{username}"
+    return run
+
+def test_priority_order_and_positions():
+    async def run():
+        gate, order, positions = threading.Event(), [], []
+        queue = JobQueue(blocking_run(gate, order), workers=1, max_size=5, estimate=10)
+
+        async def track(position, eta):
+            positions.append((position, eta))
+
+        first = queue.submit('a', 'first', 'p')
+        background = queue.submit('b', 'background', 'p', PRIORITY_BACKGROUND)
+        check = queue.submit('c', 'check', 'p', PRIORITY_CHECK, on_position=track)
+        keyword = queue.submit('d', 'keyword', 'p', PRIORITY_KEYWORD)
+        await asyncio.sleep(0.01)
+        assert queue.stats()['waiting'] == 3
+        gate.set()
+        results = await asyncio.gather(first, background, check, keyword)
+        await asyncio.sleep(0.01)
+        assert order == ['first', 'keyword', 'check', 'background']
+        assert results[2] == 'report:check'
+        assert [p for p, _ in positions] == [1, 2, 1, 0]
+        assert positions[0][1] == 10
+    asyncio.run(run())
+
+def test_one_waiting_job_per_user():
+    async def run():
+        gate, order = threading.Event(), []
+        queue = JobQueue(blocking_run(gate, order), workers=1, max_size=5)
+        queue.submit('busy', 'x', 'p')
+        first = queue.submit('user', 'acct', 'p')
+        assert queue.submit('user', 'acct', 'p') is first
+        assert await queue.submit('user', 'other', 'p') == ALREADY_QUEUED
+        gate.set()
+        assert await first == 'report:acct'
+    asyncio.run(run())
+
+def test_sheds_lower_priority_work_when_full():
+    async def run():
+        gate, order = threading.Event(), []
+        queue = JobQueue(blocking_run(gate, order), workers=1, max_size=2)
+        queue.submit('busy', 'x', 'p')
+        background = queue.submit('b', 'background', 'p', PRIORITY_BACKGROUND)
+        queue.submit('c', 'check', 'p')
+        keyword = queue.submit('k', 'keyword', 'p', PRIORITY_KEYWORD)
+        assert await background == QUEUE_BUSY
+        assert await queue.submit('c2', 'late', 'p') == QUEUE_BUSY
+        gate.set()
+        assert await keyword == 'report:keyword'
+        assert queue.stats()['shed'] == 1 and queue.stats()['rejected'] == 1
+    asyncio.run(run())
+
+def test_failures_propagate_and_free_the_worker():
+    async def run():
+        def run_job(username, password):
+            if username == 'bad':
+                raise RuntimeError('boom')
+            return username
+        queue = JobQueue(run_job, workers=1, max_size=2)
+        bad = queue.submit('a', 'bad', 'p')
+        good = queue.submit('b', 'good', 'p')
+        results = await asyncio.gather(bad, good, return_exceptions=True)
+        assert isinstance(results[0], RuntimeError) and results[1] == 'good'
+        assert queue.stats()['running'] == 0
+    asyncio.run(run())
@@ -0,0 +1,57 @@
+import asyncio
+
+import metrics
+from metrics import Counter, Gauge, Histogram, render_metrics
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram('test_duration_seconds', 'Test durations', ('stage',), buckets=(0.1, 1))
+    for value in (0.05, 0.5, 0.5, 3):
+        histogram.observe(value, stage='login')
+    lines = histogram.render()
+    assert lines[:2] == ['# HELP test_duration_seconds Test durations',
+                         '# TYPE test_duration_seconds histogram']
+    assert 'test_duration_seconds_bucket{stage="login",le="0.1"} 1' in lines
+    assert 'test_duration_seconds_bucket{stage="login",le="1.0"} 3' in lines
+    assert 'test_duration_seconds_bucket{stage="login",le="+Inf"} 4' in lines
+    assert 'test_duration_seconds_sum{stage="login"} 4.05' in lines
+    assert 'test_duration_seconds_count{stage="login"} 4' in lines
+
+def test_timed_decorator_handles_sync_async_and_errors():
+    histogram = Histogram('test_timed_seconds', 'Timed calls', ('stage',))
+
+    @histogram.timed(stage='sync')
+    def work():
+        raise ValueError('boom')
+
+    @histogram.timed(stage='async')
+    async def handler():
+        await asyncio.sleep(0)
+        return 'done'
+
+    try:
+        work()
+    except ValueError:
+        pass
+    assert asyncio.run(handler()) == 'done'
+    assert histogram.values[('sync',)][2] == 1
+    assert histogram.values[('async',)][2] == 1
+
+def test_counters_gauges_and_label_escaping():
+    counter = Counter('test_events_total', 'Events', ('result',))
+    counter.inc(result='ok')
+    counter.inc(2, result='say "hi"')
+    Gauge('test_depth', 'Depth', lambda: 7)
+    Gauge('test_broken', 'Broken gauge', lambda: 1 / 0)
+    text = render_metrics()
+    assert 'test_events_total{result="ok"} 1\n' in text
+    assert 'test_events_total{result="say \\"hi\\""} 2\n' in text
+    assert 'test_depth 7\n' in text
+    assert '# TYPE test_broken gauge\n' in text
+
+def test_parse_stage_is_recorded():
+    from scrapper import parse_attendance_html
+    from mock_portal import build_export
+
+    before = metrics.STAGE_SECONDS.values.get(('parse',), [None, 0, 0])[2]
+    parse_attendance_html(build_export('24L35A0500', seed=1))
+    assert metrics.STAGE_SECONDS.values[('parse',)][2] == before + 1
@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+import model
+
+pytestmark = pytest.mark.usefixtures('database')
+
+def test_connections_are_reused_in_wal_mode():
+    with model.get_db() as db:
+        first = db
+        assert db.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    with model.get_db() as db:
+        assert db is first
+
+def test_keyword_lookup_uses_primary_key():
+    with model.get_db() as db:
+        plan = db.execute('EXPLAIN QUERY PLAN ' + model.GET_USER_BY_KEYWORD_SQL, ('1', 'kw')).fetchall()
+        indexes = {row[0] for row in db.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert 'idx_users_phone_keyword' not in indexes
+    assert any('sqlite_autoindex_users_1' in row[-1] for row in plan)
+
+def test_async_api_round_trip():
+    async def run():
+        await model.asave_user('42', '24L35A0500', 'secret', 'MyKey')
+        assert (await model.aget_user('42'))[3] == 'mykey'
+        assert await model.aget_user_by_keyword('42', 'mykey')
+        assert len(await model.aget_all_users()) == 1
+    asyncio.run(run())
+
+def test_user_directory_follows_writes_without_queries():
+    model.save_user('7', '24L35A0507', 'secret', 'Attend')
+    directory = model.UserDirectory()
+    directory.load()
+    assert directory.match('7', 'ATTEND')[1] == '24L35A0507'
+    assert directory.match('7', 'hello') is None
+    assert directory.get('8') is None
+
+    model.user_directory.load()
+    model.save_user('8', '24L35A0508', 'secret', 'go')
+    assert model.user_directory.match('8', 'go')
+    assert model.user_directory.stats()['hits'] >= 1
+
+def test_user_directory_picks_up_other_processes_writes(monkeypatch):
+    clock = [0.0]
+    directory = model.UserDirectory(check_interval=1, clock=lambda: clock[0])
+    directory.load()
+    checks = []
+    version = model.get_users_version
+
+    async def run():
+        with monkeypatch.context() as patch:
+            patch.setattr(model, 'get_users_version', lambda: checks.append(1) or version())
+            patch.setattr(model, 'get_all_users', lambda: pytest.fail('reloaded without a save'))
+            # Chatter from unknown senders stays a dict lookup
+            for i in range(200):
+                assert await directory.amatch(str(i), 'hello') is None
+            clock[0] = 1
+            assert await directory.amatch('9', 'hello') is None
+            assert len(checks) == 1
+
+        model.save_user('9', '24L35A0509', 'secret', 'go')  # another process's directory sees this
+        assert await directory.amatch('9', 'go') is None
+        clock[0] = 2
+        assert (await directory.amatch('9', 'go'))[1] == '24L35A0509'
+        assert directory.stats()['reloads'] == 1
+    asyncio.run(run())
+
+def test_lease_has_one_owner_until_it_lapses():
+    assert model.claim_lease('owner', 'host:1', 60)
+    assert model.claim_lease('owner', 'host:1', 60)
+    assert not model.claim_lease('owner', 'host:2', 60)
+    assert model.claim_lease('owner', 'host:1', -1)  # renewed, but already expired
+    assert model.claim_lease('owner', 'host:2', 60)
+    assert not model.claim_lease('owner', 'host:1', 60)
+
+def test_groups_round_trip():
+    async def run():
+        await model.asave_group('42', 'CSE-A', [('24L35A0500', 'a'), ('24L35A0501', 'b')])
+        assert await model.aget_group('42', 'cse-a') == [('24L35A0500', 'a'), ('24L35A0501', 'b')]
+        assert await model.aget_group('43', 'cse-a') is None
+    asyncio.run(run())
@@ -0,0 +1,108 @@
+import asyncio
+import time
+
+import pytest
+from telegram.error import Forbidden, NetworkError, RetryAfter
+
+import model
+from history import load_or_parse
+from mock_portal import build_export
+from outbox import Outbox, TokenBucket, notify_changes, format_change_notice, format_digest
+from report import AttendanceReport, SubjectAttendance
+from scrapper import parse_attendance_html
+
+CHANGE = {'subject': 'CN', 'present': 40, 'total': 51, 'new_present': 0, 'new_absent': 1}
+
+pytestmark = pytest.mark.usefixtures('database')
+
+class FakeBot:
+    def __init__(self, errors=()):
+        self.errors = list(errors)
+        self.sent = []
+
+    async def send_message(self, chat_id, text):
+        if self.errors:
+            raise self.errors.pop(0)
+        self.sent.append((chat_id, text))
+
+def pending():
+    with model.get_db() as db:
+        return db.execute('SELECT chat_id, attempts FROM outbox ORDER BY id').fetchall()
+
+def test_token_bucket():
+    bucket = TokenBucket(rate=2, capacity=2)
+    now = bucket.updated
+    bucket.take(now)
+    bucket.take(now)
+    assert bucket.delay(now) == pytest.approx(0.5)
+    assert bucket.delay(now + 0.5) == 0
+
+def test_notices_go_to_every_chat_of_the_account():
+    model.save_user('1', '24L35A0500', 'a', 'k')
+    model.save_user('2', '24L35A0500', 'a', 'k')
+    model.save_user('3', '24L35A0599', 'b', 'k')
+    model.save_user('4', '24L35A0500', 'guess', 'k')
+    assert notify_changes('24L35A0500', 'a', [CHANGE]) == 2
+    assert [chat for chat, _ in pending()] == ['1', '2']
+    assert 'CN: marked absent 1x (40/51)' in format_change_notice([CHANGE])
+
+def test_refresh_with_changes_queues_a_notice():
+    model.save_user('1', '24L35A0500', 'a', 'k')
+    load_or_parse('24L35A0500', 'a', build_export('24L35A0500', days=10, seed=1), parse_attendance_html, today='01/01')
+    assert pending() == []
+    load_or_parse('24L35A0500', 'a', build_export('24L35A0500', days=11, seed=1), parse_attendance_html, today='01/01')
+    assert pending() == [('1', 0)]
+
+def test_pending_notices_are_coalesced_per_chat():
+    model.enqueue_messages([('1', 'change', 'first'), ('2', 'change', 'other'), ('1', 'change', 'second')])
+    bot = FakeBot()
+    outbox = Outbox(bot, global_rate=100, chat_rate=1, chat_burst=1)
+    assert asyncio.run(outbox.send_due()) == 2
+    assert bot.sent == [('1', 'first\n\nsecond'), ('2', 'other')]
+    assert pending() == [] and outbox.counters['coalesced'] == 1
+
+def test_per_chat_limit_defers_to_a_later_batch():
+    bot = FakeBot()
+    outbox = Outbox(bot, global_rate=100, chat_rate=0.5, chat_burst=1)
+    model.enqueue_messages([('1', 'change', 'first')])
+    asyncio.run(outbox.send_due())
+    model.enqueue_messages([('1', 'change', 'second')])
+    assert asyncio.run(outbox.send_due()) == 0
+    assert pending() == [('1', 0)]
+    with model.get_db() as db:
+        assert db.execute('SELECT next_attempt FROM outbox').fetchone()[0] > time.time() + 1
+
+def test_retry_after_pauses_and_keeps_messages():
+    model.enqueue_messages([('1', 'change', 'hello')])
+    outbox = Outbox(FakeBot([RetryAfter(30)]), global_rate=100)
+    asyncio.run(outbox.send_due())
+    assert pending() == [('1', 0)]
+    assert outbox.paused_until > time.monotonic() + 20
+    assert outbox.counters['retry_after'] == 1
+
+def test_failures_back_off_then_drop():
+    model.enqueue_messages([('1', 'change', 'hello'), ('2', 'change', 'blocked')])
+    outbox = Outbox(FakeBot([NetworkError('down'), Forbidden('bot was blocked by the user')]), global_rate=100)
+    asyncio.run(outbox.send_due())
+    assert pending() == [('1', 1)]
+    assert outbox.counters['dropped'] == 1
+
+def test_digest_is_queued_once_per_day():
+    model.save_user('1', '24L35A0500', 'a', 'k')
+    model.save_user('2', '24L35A0501', 'b', 'k')
+    model.save_user('3', '24L35A0500', 'guess', 'k')
+    load_or_parse('24L35A0500', 'a', build_export('24L35A0500', days=10), parse_attendance_html, today='01/01')
+    outbox = Outbox(FakeBot(), digest_time='00:00')
+    now = time.time()
+    assert asyncio.run(outbox.maybe_enqueue_digests(now)) == 1
+    assert asyncio.run(outbox.maybe_enqueue_digests(now)) == 0
+    with model.get_db() as db:
+        text = db.execute("SELECT text FROM outbox WHERE kind = 'digest'").fetchone()[0]
+    assert text.startswith('☀️ Daily attendance digest')
+
+def test_digest_uses_projections():
+    report = AttendanceReport('24L35A0500', 30, 50, 0, subjects=(
+        SubjectAttendance('CN', 9, 10, '90.00'), SubjectAttendance('DBMS', 3, 8, '37.50')))
+    text = format_digest(report)
+    assert '65%: attend 8 to recover' in text and '85%: attend 84 to recover' in text
+    assert text.endswith('Below 75%: DBMS (37.50%, attend 12)')
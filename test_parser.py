@@ -0,0 +1,21 @@
+import glob
+import json
+import os
+
+import pytest
+
+from scrapper import parse_attendance_data
+
+FIXTURES = sorted(glob.glob(os.path.join(os.path.dirname(__file__), 'fixtures', 'exports', '*.xls')))
+
+@pytest.mark.parametrize('path', FIXTURES, ids=os.path.basename)
+def test_parser_matches_saved_output(path):
+    with open(path[:-4] + '.json', encoding='utf-8') as file:
+        golden = json.load(file)
+    assert parse_attendance_data(path, golden['today']).to_dict() == golden['expected']
+
+def test_parser_reports_malformed_export(tmp_path):
+    path = tmp_path / 'broken.xls'
+    path.write_text('<html><body><p>Session expired</p></body></html>', encoding='utf-8')
+    with pytest.raises(Exception, match='Failed to parse attendance data'):
+        parse_attendance_data(str(path))
@@ -0,0 +1,86 @@
+import time
+
+import pytest
+
+import mock_portal
+import portal_http
+import scrapper
+from circuit_breaker import CircuitBreaker, PORTAL_UNAVAILABLE
+from session_cache import session_cache
+from mock_portal import MockPortal, decrypt_password
+
+@pytest.fixture
+def portal(database, monkeypatch):
+    with MockPortal(accounts={'24L35A0500': 'secret'}) as portal:
+        monkeypatch.setattr(portal_http, 'LOGIN_URL', portal.base_url + 'Default.aspx')
+        monkeypatch.setattr(portal_http, 'ACADEMIC_URL',
+                            portal.base_url + 'Academics/studentacadamicregister.aspx?scrid=2')
+        monkeypatch.setattr(scrapper, 'SCRAPER_ENGINE', 'http')
+        monkeypatch.setattr(scrapper, 'portal_breaker', CircuitBreaker(failures=3, reset_timeout=60))
+        portal_http.get_session().cookies.clear()
+        session_cache.entries.clear()
+        yield portal
+
+def test_encrypt_password_round_trip():
+    assert decrypt_password(portal_http.encrypt_password('Dummy@1234')) == 'Dummy@1234'
+
+def test_http_engine_report(portal):
+    report = scrapper.get_attendance_report('24L35A0500', 'secret')
+    assert report.student_id == '24L35A0500'
+    assert report.subjects and report.total_classes == sum(s.total for s in report.subjects)
+
+def test_http_engine_bad_password(portal):
+    report = scrapper.get_attendance_report('24L35A0500', 'wrong')
+    assert report.startswith('❌ Login failed')
+
+def test_markup_change_falls_back_to_selenium(portal, monkeypatch):
+    monkeypatch.setattr(mock_portal, 'LOGIN_PAGE', mock_portal.LOGIN_PAGE.replace('hdnpwd', 'hdnkey'))
+    monkeypatch.setattr(scrapper, 'get_attendance_report_selenium', lambda u, p: 'selenium')
+    assert scrapper.get_attendance_report('24L35A0500', 'secret') == 'selenium'
+
+def test_parse_failure_is_reported_as_error(portal, monkeypatch):
+    def broken(content, today):
+        raise ValueError("unexpected register layout")
+    monkeypatch.setattr(scrapper, 'parse_attendance_html', broken)
+    report = scrapper.get_attendance_report('24L35A0500', 'secret')
+    assert report == '❌ Error: unexpected register layout'
+
+def test_repeat_check_reuses_session(portal):
+    scrapper.get_attendance_report('24L35A0500', 'secret')
+    scrapper.get_attendance_report('24L35A0500', 'secret')
+    assert len(portal.sessions) == 1
+
+def test_expired_session_logs_in_again(portal):
+    scrapper.get_attendance_report('24L35A0500', 'secret')
+    portal.sessions.clear()
+    report = scrapper.get_attendance_report('24L35A0500', 'secret')
+    assert report.student_id == '24L35A0500'
+    assert len(portal.sessions) == 1
+
+def test_cached_session_needs_same_password(portal):
+    scrapper.get_attendance_report('24L35A0500', 'secret')
+    assert scrapper.get_attendance_report('24L35A0500', 'wrong').startswith('❌ Login failed')
+
+def test_injected_server_errors_are_reported(portal):
+    portal.error_rate = 1.0
+    report = scrapper.get_attendance_report('24L35A0500', 'secret')
+    assert report == PORTAL_UNAVAILABLE
+    assert portal.faults['error'] == 1
+
+def test_circuit_opens_and_fails_fast(portal):
+    portal.error_rate = 1.0
+    for _ in range(3):
+        assert scrapper.get_attendance_report('24L35A0500', 'secret') == PORTAL_UNAVAILABLE
+    assert scrapper.portal_breaker.state == 'open'
+    portal.error_rate = 0.0
+    assert scrapper.get_attendance_report('24L35A0500', 'secret') == PORTAL_UNAVAILABLE
+    assert portal.faults['error'] == 3 and scrapper.portal_breaker.stats()['rejected'] == 1
+
+def test_injected_drops_and_latency(portal):
+    portal.drop_rate = 1.0
+    assert scrapper.get_attendance_report('24L35A0500', 'secret').startswith('❌')
+    portal.drop_rate = 0.0
+    portal.latency = 0.05
+    start = time.perf_counter()
+    assert scrapper.get_attendance_report('24L35A0500', 'secret').student_id == '24L35A0500'
+    assert time.perf_counter() - start >= 0.05 * 4  # login page, login, register page, export
@@ -0,0 +1,61 @@
+import asyncio
+import threading
+
+import progress
+class FakeMessage:
+    def __init__(self, text='Fetching...'):
+        self.text = text
+        self.edits = []
+
+    async def edit_text(self, text, parse_mode=None):
+        self.edits.append(text)
+
+def test_events_cross_threads_and_need_the_password():
+    async def run():
+        events = []
+
+        async def record(stage):
+            events.append(stage)
+
+        unsubscribe = progress.subscribe('24L35A0500', 'secret', record)
+        thread = threading.Thread(target=lambda: (
+            progress.publish('24L35A0500', 'secret', 'login'),
+            progress.publish('24L35A0500', 'wrong', 'export'),
+            progress.publish('24L35A0500', 'secret', 'export'),
+        ))
+        thread.start()
+        thread.join()
+        await asyncio.sleep(0.01)
+        unsubscribe()
+        progress.publish('24L35A0500', 'secret', 'export')
+        await asyncio.sleep(0.01)
+        assert events == ['login', 'export']
+        assert not progress._subscribers
+    asyncio.run(run())
+
+def test_status_edits_are_throttled_and_deduplicated():
+    async def run():
+        message = FakeMessage()
+        status = progress.StatusMessage(message, interval=0.05)
+        status.last_edit -= 1
+        await status.show('one')
+        await status.show('two')
+        await status.show('three')
+        assert message.edits == ['one']
+        await asyncio.sleep(0.08)
+        assert message.edits == ['one', 'three']
+        await status.show('three')
+        await asyncio.sleep(0.08)
+        assert message.edits == ['one', 'three'] and status.skipped == 1
+    asyncio.run(run())
+
+def test_final_text_replaces_pending_progress():
+    async def run():
+        message = FakeMessage()
+        status = progress.StatusMessage(message, interval=0.05)
+        await status.show('progress')
+        await status.finish('done')
+        await status.show('late progress')
+        await asyncio.sleep(0.08)
+        assert message.edits == ['done']
+    asyncio.run(run())
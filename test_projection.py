@@ -0,0 +1,42 @@
+import numpy as np
+
+from projection import needed, project_reports, skippable, what_if
+from report import AttendanceReport, SubjectAttendance
+
+def brute_skippable(present, total, threshold):
+    k = 0
+    while 100 * present >= threshold * (total + k + 1):
+        k += 1
+    return k if 100 * present >= threshold * total else 0
+
+def brute_needed(present, total, threshold):
+    n = 0
+    while 100 * (present + n) < threshold * (total + n):
+        n += 1
+    return n
+
+def test_closed_form_matches_brute_force():
+    for total in range(0, 60):
+        for present in range(0, total + 1):
+            for threshold in (65, 75, 85):
+                assert skippable(present, total, threshold) == brute_skippable(present, total, threshold)
+                assert needed(present, total, threshold) == brute_needed(present, total, threshold)
+
+def test_vectorised_over_arrays():
+    present = np.array([75, 3, 0, 60])
+    total = np.array([100, 3, 4, 100])
+    assert skippable(present, total, 75).tolist() == [0, 1, 0, 0]
+    assert needed(present, total, 75).tolist() == [0, 0, 12, 60]
+
+def test_project_reports_and_what_if():
+    report = AttendanceReport('24L35A0500', 33, 40, 4, subjects=(
+        SubjectAttendance('DBMS', 15, 20, '75.00'),
+        SubjectAttendance('OS LAB', 18, 20, '90.00'),
+    ))
+    [projection] = project_reports([report], thresholds=(75,))
+    assert projection['overall'] == {75: (4, 0)}
+    assert projection['subjects']['OS LAB'] == {75: (4, 0)}
+
+    result = what_if(report, miss=2, subject='dbms')
+    assert result['subject'][:3] == ('DBMS', 15, 22)
+    assert result['overall'][:2] == (33, 42)
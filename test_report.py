@@ -0,0 +1,33 @@
+from report import AttendanceReport, SubjectAttendance, TodayMark, render
+
+REPORT = AttendanceReport(
+    student_id='24L35A0500',
+    total_present=45,
+    total_classes=60,
+    skippable_hours=0,
+    today=(TodayMark('C & DS (Lab)', 'P'),),
+    subjects=(
+        SubjectAttendance('C & DS (Lab)', 20, 25, '80.00'),
+        SubjectAttendance('Env. Sci [MC]', 25, 35, '71.43'),
+        SubjectAttendance('NSS', 0, 0, '.00'),
+    ),
+)
+
+def test_markdown_escapes_data_but_keeps_formatting():
+    text = render(REPORT, 'markdown')
+    assert text.startswith('*24L35A0500*\n\n*Total: 45/60 \\(75\\.00%\\)*')
+    assert '• C & DS \\(Lab\\): P' in text
+    assert 'Env\\. Sci \\[MC\\]' in text and '*25/35* 71\\.43%' in text
+    assert 'NSS' not in text
+
+def test_html_and_text_renderers():
+    assert '<b>20/25</b>' in render(REPORT, 'html')
+    assert 'C &amp; DS (Lab)' in render(REPORT, 'html')
+    text = render(REPORT, 'text')
+    assert text.startswith('Hi 24L35A0500\nTotal: 45/60 (75.00%)\n')
+    assert 'C & DS (Lab) 20/25   80.00%' in text
+
+def test_round_trip_shares_rendering():
+    copy = AttendanceReport.from_dict(REPORT.to_dict())
+    assert copy == REPORT
+    assert render(copy) is render(REPORT)
@@ -0,0 +1,48 @@
+import asyncio
+import time
+
+from report import AttendanceReport
+from report_cache import ReportCache
+
+OLD = AttendanceReport('24L35A0500', 40, 50, 3)
+NEW = AttendanceReport('24L35A0500', 41, 51, 3)
+
+def make_fetch(calls, report=NEW, delay=0.01):
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return report
+    return fetch
+
+def test_concurrent_requests_share_one_scrape():
+    async def run():
+        cache = ReportCache(ttl=60, stale_ttl=600)
+        calls = []
+        results = await asyncio.gather(*(cache.get('u', 'p', make_fetch(calls)) for _ in range(5)))
+        assert len(calls) == 1
+        assert {report for report, _ in results} == {NEW}
+        assert cache.stats()['joined'] == 4
+    asyncio.run(run())
+
+def test_stale_entry_served_while_refreshing():
+    async def run():
+        cache = ReportCache(ttl=10, stale_ttl=600)
+        cache.put('u', 'p', OLD, fetched_at=time.time() - 100)
+        calls = []
+        report, age = await cache.get('u', 'p', make_fetch(calls, NEW))
+        assert report == OLD and age > 0
+        await asyncio.sleep(0.05)
+        assert cache.entries['u']['report'] == NEW
+        assert len(calls) == 1
+    asyncio.run(run())
+
+def test_errors_are_not_cached_and_password_must_match():
+    async def run():
+        cache = ReportCache(ttl=60, stale_ttl=600)
+        calls = []
+        report, _ = await cache.get('u', 'p', make_fetch(calls, '❌ Login failed'))
+        assert report.startswith('❌') and 'u' not in cache.entries
+        await cache.get('u', 'p', make_fetch(calls))
+        await cache.get('u', 'other', make_fetch(calls))
+        assert len(calls) == 3
+    asyncio.run(run())
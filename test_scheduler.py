@@ -0,0 +1,43 @@
+import asyncio
+import time
+
+import scheduler
+from report import AttendanceReport
+from report_cache import ReportCache
+from scheduler import RefreshScheduler, in_window, parse_windows
+
+def test_windows_wrap_midnight():
+    windows = parse_windows('22:00-06:00, 13:00-13:30')
+    at = lambda hour, minute: time.mktime((2026, 1, 5, hour, minute, 0, 0, 0, -1))
+    assert in_window(windows, at(23, 15))
+    assert in_window(windows, at(5, 59))
+    assert in_window(windows, at(13, 10))
+    assert not in_window(windows, at(12, 0))
+
+def test_run_once_respects_concurrency_and_skips_fresh(monkeypatch):
+    users = [(str(i), f'user{i}', 'pw', 'kw') for i in range(6)]
+    async def all_users():
+        return list(users)
+    monkeypatch.setattr(scheduler, 'aget_all_users', all_users)
+
+    async def run():
+        cache = ReportCache(ttl=60, stale_ttl=600)
+        cache.put('user0', 'pw', AttendanceReport('user0', 1, 1, 0))
+        active = peak = 0
+
+        async def fetch(username, password):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return AttendanceReport(username, 1, 1, 0)
+
+        job = RefreshScheduler(cache, fetch, windows=[(0, 24 * 60)], concurrency=2,
+                               rate_per_min=0, jitter=0)
+        stats = await job.run_once()
+        assert stats['refreshed'] == 5 and stats['skipped'] == 1
+        assert peak <= 2
+        assert cache.entries['user5']['report'].student_id == 'user5'
+
+    asyncio.run(run())
@@ -0,0 +1,17 @@
+import subprocess
+import sys
+
+import scrapper
+
+def test_scraper_import_skips_heavy_modules():
+    code = ("import sys, scrapper; "
+            "print(sorted(m for m in ('pandas', 'selenium', 'webdriver_manager') if m in sys.modules))")
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == '[]'
+
+def test_driver_path_resolved_once(monkeypatch):
+    monkeypatch.setattr(scrapper, '_driver_path', None)
+    monkeypatch.setattr(scrapper, 'CHROMEDRIVER_PATH', '/opt/chromedriver')
+    assert scrapper.resolve_driver_path() == '/opt/chromedriver'
+    monkeypatch.setattr(scrapper, 'CHROMEDRIVER_PATH', '/elsewhere')
+    assert scrapper.resolve_driver_path() == '/opt/chromedriver'
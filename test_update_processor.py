@@ -0,0 +1,65 @@
+import asyncio
+
+from telegram import Update
+
+from mock_telegram import message_update
+from update_processor import ChatOrderedUpdateProcessor
+
+def make_update(update_id, chat_id):
+    return Update.de_json(message_update(update_id, update_id, 'hi', chat_id), None)
+
+async def process(processor, updates, handle):
+    await asyncio.gather(*(processor.process_update(update, handle(update)) for update in updates))
+
+def test_chats_run_concurrently_and_each_in_order():
+    async def run():
+        processor = ChatOrderedUpdateProcessor(8)
+        running, peak, finished = set(), [0], []
+
+        async def handle(update):
+            running.add(update.update_id)
+            peak[0] = max(peak[0], len(running))
+            # Earlier updates of a chat take longer, so only ordering keeps them first
+            await asyncio.sleep(0.03 if update.update_id <= 4 else 0.01)
+            running.discard(update.update_id)
+            finished.append((update.effective_chat.id, update.update_id))
+
+        updates = [make_update(update_id, chat_id=update_id % 4) for update_id in range(1, 17)]
+        await process(processor, updates, handle)
+        for chat in range(4):
+            ids = [update_id for chat_id, update_id in finished if chat_id == chat]
+            assert ids == sorted(ids) and len(ids) == 4
+        assert peak[0] == 4  # one slot per busy chat
+        assert processor.stats()['processed'] == 16 and processor.chats == {}
+    asyncio.run(run())
+
+def test_limit_caps_running_chats():
+    async def run():
+        processor = ChatOrderedUpdateProcessor(2)
+        running, peak = [0], [0]
+
+        async def handle(update):
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+            await asyncio.sleep(0.01)
+            running[0] -= 1
+
+        await process(processor, [make_update(i, chat_id=i) for i in range(1, 11)], handle)
+        assert peak[0] == 2
+    asyncio.run(run())
+
+def test_failure_does_not_drop_queued_updates():
+    async def run():
+        processor = ChatOrderedUpdateProcessor(4)
+        handled = []
+
+        async def handle(update):
+            await asyncio.sleep(0)
+            if update.update_id == 1:
+                raise RuntimeError("boom")
+            handled.append(update.update_id)
+
+        await process(processor, [make_update(i, chat_id=7) for i in range(1, 4)], handle)
+        assert handled == [2, 3]
+        assert processor.stats()['failed'] == 1 and processor.stats()['queued'] == 2
+    asyncio.run(run())
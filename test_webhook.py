@@ -0,0 +1,53 @@
+import asyncio
+import os
+import threading
+
+import pytest
+
+os.environ.setdefault('TELEGRAM_TOKEN', '123456:TEST-TOKEN')
+
+UPDATE = {
+    'update_id': 1001,
+    'message': {
+        'message_id': 5,
+        'date': 1700000000,
+        'chat': {'id': 42, 'type': 'private'},
+        'from': {'id': 42, 'is_bot': False, 'first_name': 'Test'},
+        'text': 'attend',
+    },
+}
+
+@pytest.fixture
+def webhook(database, monkeypatch):
+    import app as bot_app
+
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(bot_app, 'ensure_bot_running', lambda: loop)
+    monkeypatch.setattr(bot_app, 'WEBHOOK_SECRET', 's3cret')
+    yield bot_app, loop, bot_app.flask_app.test_client()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+
+def test_update_is_queued(webhook):
+    bot_app, loop, client = webhook
+    response = client.post('/webhook', json=UPDATE,
+                           headers={'X-Telegram-Bot-Api-Secret-Token': 's3cret'})
+    assert response.status_code == 200
+    update = asyncio.run_coroutine_threadsafe(bot_app.app.update_queue.get(), loop).result(1)
+    assert update.update_id == 1001
+    assert update.message.text == 'attend'
+    assert update.effective_user.id == 42
+
+def test_rejects_wrong_secret(webhook):
+    _, _, client = webhook
+    response = client.post('/webhook', json=UPDATE,
+                           headers={'X-Telegram-Bot-Api-Secret-Token': 'wrong'})
+    assert response.status_code == 403
+
+def test_rejects_malformed_update(webhook):
+    _, _, client = webhook
+    response = client.post('/webhook', data='not json',
+                           headers={'X-Telegram-Bot-Api-Secret-Token': 's3cret'})
+    assert response.status_code == 400
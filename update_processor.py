@@ -0,0 +1,71 @@
+import logging
+from collections import deque
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    """Processes updates concurrently while keeping each chat's updates in order
+
+    Up to max_concurrent_updates handlers run at once. An update for a chat that
+    already has one running is queued behind it and run by that same task, so
+    a busy chat holds a single slot instead of blocking others waiting on it.
+    """
+
+    def __init__(self, max_concurrent_updates):
+        super().__init__(max_concurrent_updates)
+        self.chats = {}
+        self.counters = {'processed': 0, 'queued': 0, 'failed': 0}
+
+    @staticmethod
+    def chat_key(update):
+        """Chat (or user) an update belongs to; None for updates without one"""
+        if not isinstance(update, Update):
+            return None
+        if update.effective_chat is not None:
+            return update.effective_chat.id
+        if update.effective_user is not None:
+            return ('user', update.effective_user.id)
+        return None
+
+    async def do_process_update(self, update, coroutine):
+        key = self.chat_key(update)
+        if key is None:
+            await self._run(coroutine)
+            return
+
+        waiting = self.chats.get(key)
+        if waiting is not None:
+            self.counters['queued'] += 1
+            waiting.append(coroutine)
+            return
+
+        self.chats[key] = waiting = deque()
+        try:
+            await self._run(coroutine)
+            while waiting:
+                await self._run(waiting.popleft())
+        finally:
+            del self.chats[key]
+
+    async def _run(self, coroutine):
+        try:
+            await coroutine
+            self.counters['processed'] += 1
+        except Exception as e:
+            self.counters['failed'] += 1
+            logging.error(f"Update processing failed: {str(e)}")
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    def stats(self):
+        return {
+            'limit': self.max_concurrent_updates,
+            'busy_chats': len(self.chats),
+            'waiting': sum(len(waiting) for waiting in self.chats.values()),
+            **self.counters,
+        }
@@ -0,0 +1,68 @@
+"""Scraper worker: claims jobs from BROKER_URL and runs get_attendance_report
+
+    python worker.py [--processes N]
+
+Run as many workers (on as many hosts sharing the broker) as needed; the
+bot only needs SCRAPE_BACKEND=broker and the same BROKER_URL.
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import socket
+
+from broker import get_broker, encode_result
+from config import BROKER_URL, SCRAPER_ENGINE, WORKER_PROCESSES
+
+def work(broker, run, name, stop=None):
+    """Process jobs until stop (a threading/multiprocessing Event) is set"""
+    while stop is None or not stop.is_set():
+        job = broker.claim(name)
+        if job is None:
+            continue
+        job_id, username, password = job
+        logging.info(f"{name} running job {job_id} for {username}")
+        try:
+            report = run(username, password)
+        except Exception as e:
+            logging.error(f"Job {job_id} failed: {str(e)}")
+            report = f"❌ Error: {str(e)}"
+        broker.complete(job_id, encode_result(report))
+
+def run_worker(index, stop=None):
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    from scrapper import get_attendance_report
+    from driver_pool import get_driver_pool
+
+    if SCRAPER_ENGINE == 'selenium':
+        get_driver_pool().warm_up()
+    name = f"{socket.gethostname()}:{os.getpid()}:{index}"
+    logging.info(f"Worker {name} consuming {BROKER_URL}")
+    try:
+        work(get_broker(BROKER_URL), get_attendance_report, name, stop)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if SCRAPER_ENGINE == 'selenium':
+            get_driver_pool().close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Attendance scraper worker")
+    parser.add_argument('--processes', type=int, default=WORKER_PROCESSES)
+    args = parser.parse_args()
+
+    if args.processes <= 1:
+        run_worker(0)
+        return
+    processes = [multiprocessing.Process(target=run_worker, args=(index,)) for index in range(args.processes)]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.join()
+
+if __name__ == "__main__":
+    main()